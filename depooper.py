@@ -5,9 +5,15 @@
 Симулятор человека‑совы, который хочет стать человеком-жаворонком.
 """
 
+import os
+import sys
+import json
+import math
 import random
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from array import array
+from operator import attrgetter
+from dataclasses import dataclass, field, fields
+from typing import List, Optional, Dict, Any, Tuple
 
 # --- Цветовой вывод ---
 def color_text(text, color):
@@ -23,9 +29,563 @@ def color_text(text, color):
     }
     return f"{colors.get(color, '')}{text}{colors['reset']}"
 
-@dataclass
+
+# --- Случайность ---
+class RandomStream(random.Random):
+    """Отдельный поток случайных чисел для героя или симуляции.
+
+    Это обычный random.Random (тот же API: random/randint/choice), плюс:
+    - spawn() порождает независимые дочерние потоки (например, по одному на
+      героя или воркер), так что параллельные прогоны не делят состояние;
+    - fork() копирует поток вместе с состоянием.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__(seed)
+
+    def spawn(self, n: Optional[int] = None):
+        """Дочерний поток (или список из n потоков) с сидом из текущего."""
+        if n is None:
+            return RandomStream(self.getrandbits(64))
+        return [RandomStream(self.getrandbits(64)) for _ in range(n)]
+
+    def fork(self) -> "RandomStream":
+        """Копия потока в том же состоянии: копия повторит те же броски."""
+        twin = RandomStream.__new__(RandomStream)
+        twin.setstate(self.getstate())
+        return twin
+
+# --- Журнал событий ---
+class EventLog:
+    """Ограниченный журнал событий: кольцевой буфер записей.
+
+    Запись — кортеж (day, minute, code, args), где code — шаблон сообщения
+    ("Баланс: {} ₽"), а args — его аргументы. Текст собирается только при
+    чтении (журнал в GUI, мини-лог), а не при каждом событии.
+
+    Для совместимости журнал ведёт себя как список строк: len(), итерация,
+    индексы и срезы (log[-7:]) отдают уже отформатированный текст.
+    Если задан spill_path, вытесняемые из буфера записи дописываются в файл
+    пачками; остаток пачки дописывают clear(), to_list() и close() — его
+    надо звать, когда игра или прогон заканчивается.
+    """
+
+    def __init__(self, maxlen: int = 2000, spill_path: Optional[str] = None):
+        self.maxlen = max(1, int(maxlen))
+        self.spill_path = spill_path
+        self.total = 0  # сколько записей добавлено за всё время
+        self._buf: List[tuple] = []
+        self._head = 0  # позиция самой старой записи, когда буфер заполнен
+        self._spill: List[str] = []
+        self._text_cache: Dict[int, str] = {}
+
+    # --- Запись ---
+    def add(self, day: int, minute: int, code: str, args: tuple = ()) -> None:
+        self.push((day, minute, code, args))
+
+    def push(self, record: tuple) -> None:
+        """Добавить готовую запись (day, minute, code, args)."""
+        buf = self._buf
+        if len(buf) < self.maxlen:
+            buf.append(record)
+        else:
+            if self.spill_path:
+                self._spill.append(self.format_record(buf[self._head]))
+                if len(self._spill) >= 256:
+                    self.flush()
+            buf[self._head] = record
+            self._head = (self._head + 1) % self.maxlen
+        self.total += 1
+
+    def append(self, message: str) -> None:
+        """Старое API: готовая строка без дня/времени."""
+        self.add(0, 0, message)
+
+    def extend(self, messages) -> None:
+        for m in messages:
+            self.append(m)
+
+    def clear(self) -> None:
+        """Выбросить буфер; уже вытесненное сначала дописывается в файл."""
+        self.flush()
+        self._buf = []
+        self._head = 0
+        self._text_cache.clear()
+
+    def flush(self) -> None:
+        """Дописать вытесненные записи в spill_path."""
+        if not self._spill or not self.spill_path:
+            return
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(self._spill))
+            f.write("\n")
+        self._spill = []
+
+    def close(self) -> None:
+        """Дописать всё вытесненное — при завершении игры или прогона."""
+        self.flush()
+
+    # --- Чтение ---
+    @staticmethod
+    def format_record(record: tuple) -> str:
+        _day, _minute, code, args = record
+        return code.format(*args) if args else code
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def record(self, i: int) -> tuple:
+        """Сырая запись по логическому индексу (0 — самая старая)."""
+        n = len(self._buf)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("event log index out of range")
+        return self._buf[(self._head + i) % n] if n == self.maxlen else self._buf[i]
+
+    def records(self):
+        """Все записи от старых к новым."""
+        buf, head = self._buf, self._head
+        return buf[head:] + buf[:head] if head else list(buf)
+
+    def text(self, i: int) -> str:
+        """Текст i-й записи; отформатированные строки кэшируются."""
+        n = len(self._buf)
+        if i < 0:
+            i += n
+        key = self.total - n + i  # абсолютный номер записи
+        cached = self._text_cache.get(key)
+        if cached is None:
+            cached = self.format_record(self.record(i))
+            if len(self._text_cache) >= 512:
+                self._text_cache.clear()
+            self._text_cache[key] = cached
+        return cached
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.text(i) for i in range(*index.indices(len(self._buf)))]
+        return self.text(index)
+
+    def __iter__(self):
+        for i in range(len(self._buf)):
+            yield self.text(i)
+
+    def copy(self) -> "EventLog":
+        """Независимая копия буфера (записи — кортежи, их не копируем).
+
+        Вытеснение в файл у копии выключено, чтобы форки не писали в чужой spill.
+        """
+        twin = EventLog.__new__(EventLog)
+        twin.__dict__.update(self.__dict__)
+        twin.spill_path = None
+        twin._buf = list(self._buf)
+        twin._spill = []
+        twin._text_cache = {}
+        return twin
+
+    # --- Сохранение ---
+    def to_list(self) -> List[list]:
+        self.flush()
+        return [[day, minute, code, list(args)] for (day, minute, code, args) in self.records()]
+
+    def load_list(self, items) -> None:
+        """Загрузить записи из to_list() или старого списка строк."""
+        self.clear()
+        for item in items:
+            if isinstance(item, str):
+                self.append(item)
+            else:
+                day, minute, code, args = item
+                self.add(int(day), int(minute), code, tuple(args))
+
+# --- Приёмники событий ---
+class LogSink:
+    """Куда дублировать события журнала (кроме самого event_log).
+
+    emit получает сырую запись (day, minute, code, args); форматировать её
+    или нет — решает приёмник.
+    """
+
+    def emit(self, record: tuple) -> None:
+        raise NotImplementedError
+
+    def emit_many(self, records: List[tuple]) -> None:
+        for record in records:
+            self.emit(record)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class NullSink(LogSink):
+    """Тихий режим: события никуда не дублируются."""
+
+    def emit(self, record: tuple) -> None:
+        pass
+
+    def emit_many(self, records: List[tuple]) -> None:
+        pass
+
+
+class StdoutSink(LogSink):
+    """Печать в stdout, как в консольной версии."""
+
+    def emit(self, record: tuple) -> None:
+        print(EventLog.format_record(record))
+
+    def emit_many(self, records: List[tuple]) -> None:
+        if records:
+            sys.stdout.write("\n".join(EventLog.format_record(r) for r in records) + "\n")
+
+    def flush(self) -> None:
+        sys.stdout.flush()
+
+
+class MemorySink(LogSink):
+    """Копит сырые записи в списке (для тестов и анализа прогонов)."""
+
+    def __init__(self):
+        self.records: List[tuple] = []
+
+    def emit(self, record: tuple) -> None:
+        self.records.append(record)
+
+    def emit_many(self, records: List[tuple]) -> None:
+        self.records.extend(records)
+
+    @property
+    def lines(self) -> List[str]:
+        return [EventLog.format_record(r) for r in self.records]
+
+
+class FileSink(LogSink):
+    """Дописывает события в текстовый файл: «день чч:мм сообщение»."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @staticmethod
+    def _line(record: tuple) -> str:
+        day, minute, _code, _args = record
+        return f"{day:>4} {minute // 60:02d}:{minute % 60:02d} {EventLog.format_record(record)}\n"
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def emit(self, record: tuple) -> None:
+        self._open().write(self._line(record))
+
+    def emit_many(self, records: List[tuple]) -> None:
+        if records:
+            self._open().write("".join(self._line(r) for r in records))
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BufferedSink(LogSink):
+    """Копит записи и отдаёт их вложенному приёмнику пачками по batch_size."""
+
+    def __init__(self, inner: LogSink, batch_size: int = 256):
+        self.inner = inner
+        self.batch_size = max(1, int(batch_size))
+        self._pending: List[tuple] = []
+
+    def emit(self, record: tuple) -> None:
+        pending = self._pending
+        pending.append(record)
+        if len(pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self.inner.emit_many(self._pending)
+            self._pending = []
+        self.inner.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.inner.close()
+
+
+# Общий тихий приёмник (без состояния, можно делить между героями)
+NULL_SINK = NullSink()
+
+# Рантайм-поля героя, которые не попадают в сохранение
+TRANSIENT_FIELDS = ("rng", "log_sink", "state_version")
+
+# --- Квесты ---
+# Статусы квестов храним кодами; подписи — только для отображения
+QUEST_HIDDEN, QUEST_ACTIVE, QUEST_DONE = 0, 1, 2
+QUEST_STATUS_LABELS = ("Скрыто", "В процессе", "Завершено")
+
+
+# Виды реакции квеста на событие (см. Person.quest_event)
+QUEST_COUNTER = "counter"      # прогресс += значение события
+QUEST_STREAK = "streak"        # прогресс = значение события (длина серии)
+QUEST_THRESHOLD = "threshold"  # квест открывается, когда значение <= threshold
+
+
+@dataclass(frozen=True)
+class QuestDef:
+    """Неизменяемое описание квеста, одно на все экземпляры Person.
+
+    event — игровое событие, на которое подписан квест; kind — как он на
+    него реагирует. reveal_on_progress: открывать ли скрытый квест при
+    первом продвижении (иначе он остаётся скрытым до завершения).
+    reveal_log: писать ли в журнал «Квест: <описание>» при открытии.
+    """
+    key: str
+    title: str
+    desc: str
+    target: int
+    reward_xp: int = 0
+    reward_rub: int = 0
+    event: str = ""
+    kind: str = QUEST_COUNTER
+    threshold: int = 0
+    reveal_on_progress: bool = True
+    reveal_log: bool = False
+
+    @property
+    def reward(self) -> Dict[str, int]:
+        reward = {"xp": self.reward_xp}
+        if self.reward_rub:
+            reward["rub"] = self.reward_rub
+        return reward
+
+
+QUEST_CATALOG: Tuple[QuestDef, ...] = (
+    QuestDef("main", "Стать жаворонком", "Держи серию 90 дней без вредных привычек", 90, 300, 2000,
+             event="streak", kind=QUEST_STREAK),
+    QuestDef("work_reports", "Рабочая рутина", "Собери 3 отчёта", 3, 80, 600,
+             event="work_report", reveal_on_progress=False),
+    QuestDef("buy_coffeemachine", "Кофе дома", "Купить кофемашину", 1, 40,
+             event="coffee_machine_bought", reveal_on_progress=False),
+    QuestDef("work_features", "Новые фичи", "Реализуй 5 задач", 5, 150, 800, event="work_feature"),
+    QuestDef("work_incidents", "Дежурство героя", "Разрули 3 инцидента", 3, 150, event="work_incident"),
+    QuestDef("work_presentations", "Слово за тобой", "Проведи 2 демо/встречи с клиентом", 2, 120, 500,
+             event="work_presentation"),
+    QuestDef("money_crunch", "Деньги на исходе", "Герой попал в ситуевину, ему срочно нужно рожать деньги!", 1, 50,
+             event="balance", kind=QUEST_THRESHOLD, threshold=-5000, reveal_log=True),
+)
+QUEST_INDEX: Dict[str, int] = {q.key: i for i, q in enumerate(QUEST_CATALOG)}
+
+
+def _build_quest_triggers() -> Dict[str, Tuple[int, ...]]:
+    triggers: Dict[str, List[int]] = {}
+    for i, q in enumerate(QUEST_CATALOG):
+        if q.event:
+            triggers.setdefault(q.event, []).append(i)
+    return {event: tuple(idx) for event, idx in triggers.items()}
+
+
+# Индекс событие → квесты-подписчики: событие трогает только свои квесты
+QUEST_TRIGGERS: Dict[str, Tuple[int, ...]] = _build_quest_triggers()
+
+
+# --- Каталог действий ---
+# Параметры кофе, еды, тренировок и поездок лежат в depooper_actions.json:
+# файл читается один раз при импорте и раскладывается в плоские таблицы,
+# которые читают и Person, и GUI, и векторизованная популяция.
+ACTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "depooper_actions.json")
+
+
+@dataclass(frozen=True, slots=True)
+class CoffeeDef:
+    key: str
+    label: str
+    title: str
+    cost: int
+    benefit_bonus: int
+    time_min: int
+    needs_machine: bool
+
+
+@dataclass(frozen=True, slots=True)
+class FoodDef:
+    """calories_min == calories_max — калорийность фиксирована и RNG не трогаем."""
+    key: str
+    label: str
+    title: str
+    cost: int
+    time_min: int
+    requires_home: bool
+    calories_min: int
+    calories_max: int
+    health: int
+    alertness: int
+    binge_protection: bool
+
+
+@dataclass(frozen=True, slots=True)
+class TrainingDef:
+    """Время: max(time_floor, time_min − time_per_stat·(stat−1)).
+    Потребность во сне снижается на sleep_relief + sleep_relief_per_stat·(stat−1).
+    """
+    key: str
+    label: str
+    cost: int
+    health: int
+    alertness: int
+    weight_loss: float
+    weight_loss_overeat: float
+    time_min: int
+    time_floor: int
+    time_per_stat: int
+    sleep_relief: float
+    sleep_relief_per_stat: float
+    stat: str
+    xp: int
+
+
+@dataclass(frozen=True, slots=True)
+class TravelMode:
+    """log — шаблон журнала: {0} куда, {1} минуты, {2} рубли, {3} сброшенный вес."""
+    key: str
+    title: str
+    stat_adjusted: bool
+    weight_loss: float
+    log: str
+
+
+@dataclass(frozen=True, slots=True)
+class TravelRoute:
+    target: str
+    label: str
+    mode: TravelMode
+    minutes: int
+    cost: int
+    tile: Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class ActionCatalog:
+    coffee: Dict[str, CoffeeDef]
+    food: Dict[str, FoodDef]
+    training: Dict[str, TrainingDef]
+    travel_modes: Tuple[TravelMode, ...]
+    # Маршруты в порядке файла: цель за целью, внутри — в порядке travel_modes
+    routes: Tuple[TravelRoute, ...]
+    route_index: Dict[Tuple[str, str], TravelRoute]
+    tiles: Dict[str, Tuple[int, int]]
+
+
+def compile_actions(data: Dict[str, Any]) -> ActionCatalog:
+    """Разложить описание действий (см. depooper_actions.json) по таблицам."""
+    coffee = {c["key"]: CoffeeDef(**c) for c in data["coffee"]}
+    food = {f["key"]: FoodDef(**f) for f in data["food"]}
+    training = {t["key"]: TrainingDef(**t) for t in data["training"]}
+    travel = data["travel"]
+    modes = tuple(TravelMode(**m) for m in travel["modes"])
+    routes: List[TravelRoute] = []
+    tiles: Dict[str, Tuple[int, int]] = {}
+    for target in travel["targets"]:
+        tile = tuple(target["tile"])
+        tiles[target["key"]] = tile
+        for mode in modes:
+            route = target["routes"].get(mode.key)
+            if route is None:
+                continue
+            routes.append(TravelRoute(target["key"], target["label"], mode,
+                                      int(route["minutes"]), int(route.get("cost", 0)), tile))
+    return ActionCatalog(
+        coffee=coffee,
+        food=food,
+        training=training,
+        travel_modes=modes,
+        routes=tuple(routes),
+        route_index={(r.target, r.mode.key): r for r in routes},
+        tiles=tiles,
+    )
+
+
+def load_actions(path: str = ACTIONS_PATH) -> ActionCatalog:
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_actions(json.load(f))
+
+
+ACTIONS: ActionCatalog = load_actions()
+COFFEE_ACTIONS = ACTIONS.coffee
+FOOD_ACTIONS = ACTIONS.food
+TRAINING_ACTIONS = ACTIONS.training
+
+
+# --- Перемотка дней (Person.fast_forward) ---
+@dataclass(frozen=True, slots=True)
+class DayPlan:
+    """Неизменный распорядок дня: первая еда, смена, остальная еда, сон.
+
+    Ключи еды — из FOOD_ACTIONS. Смена — как depooper_sim.work_shift:
+    продуктивно и без опозданий, если герой трудоустроен.
+    """
+    meals: Tuple[str, ...] = ("balanced", "balanced")
+    work: bool = True
+    sleep_hours: float = 8.0
+
+
+# Дней пошагово, после которых перемотка сдаётся, если бодрость/здоровье/сон не устоялись
+FAST_FORWARD_WARMUP = 28
+# С какого ожидаемого числа успехов биномиальное распределение заменяем нормальным
+NORMAL_APPROX_MIN = 30
+SUPER_EVENT_CHANCE = 0.15
+SUPER_EVENTS = ["phone_repair", "relative_funeral", "relative_wedding"]
+
+
+def sample_binomial(rng, n: int, p: float) -> int:
+    """Число успехов в n испытаниях с вероятностью p, без n бросков.
+
+    Мало успехов — точно, прыжками по геометрическим промежуткам между ними
+    (бросков столько, сколько успехов); много — нормальное приближение.
+    """
+    if n <= 0 or p <= 0.0:
+        return 0
+    if p >= 1.0:
+        return n
+    mean = n * p
+    if min(mean, n - mean) >= NORMAL_APPROX_MIN:
+        k = int(round(rng.gauss(mean, math.sqrt(mean * (1.0 - p)))))
+        return max(0, min(n, k))
+    log_q = math.log(1.0 - p)
+    k = 0
+    trial = 0
+    while True:
+        trial += int(math.log(1.0 - rng.random()) / log_q) + 1
+        if trial > n:
+            return k
+        k += 1
+
+
+def sample_randint_sum(rng, k: int, lo: int, hi: int) -> int:
+    """Сумма k бросков randint(lo, hi); при большом k — нормальное приближение."""
+    if k < NORMAL_APPROX_MIN:
+        return sum(rng.randint(lo, hi) for _ in range(k))
+    width = hi - lo + 1
+    total = int(round(rng.gauss(k * (lo + hi) / 2.0, math.sqrt(k * (width * width - 1) / 12.0))))
+    return max(k * lo, min(k * hi, total))
+
+
+@dataclass(slots=True)
 class Person:
-    """Основной объект – персонаж."""
+    """Основной объект – персонаж.
+
+    Все поля объявлены заранее и лежат в __slots__: у героя нет __dict__,
+    так что память на экземпляр меньше, а доступ к атрибутам быстрее.
+    Новые поля нужно объявлять здесь — присвоить произвольный атрибут нельзя.
+    """
     name: str = "Артем"
     # Состояние бодрости и сна (0–100)
     alertness: int = 50          # насколько он бодрый сегодня
@@ -50,9 +610,20 @@ class Person:
     
     # Флаги событий дня
     overeaten_today: bool = False  # переедал ли сегодня
+    calories_today: int = 0  # суммарные калории за день
+    night_binge_protection_today: bool = False  # защита от ночных жоров (супер-еда)
 
     # Журнал событий (лог)
-    event_log: List[str] = field(default_factory=list)
+    event_log: EventLog = field(default_factory=EventLog)
+    # Куда дублировать события: stdout в консоли, NULL_SINK в GUI и headless-прогонах
+    log_sink: LogSink = field(default_factory=StdoutSink, repr=False, compare=False)
+    # Версия состояния: растёт при каждом изменении (см. touch), GUI по ней
+    # понимает, что кнопки и панели пора перестроить
+    state_version: int = field(default=0, repr=False, compare=False)
+    # Источник случайности: по умолчанию свой RandomStream() без сида, так что
+    # random.seed() на героя не влияет; для воспроизводимых прогонов передаём
+    # RandomStream(seed)
+    rng: Any = field(default_factory=RandomStream, repr=False, compare=False)
 
     # Прогресс и мета
     days_elapsed: int = 0
@@ -100,74 +671,94 @@ class Person:
     utilities_weekly: int = 1500
     # Социальное
     has_girlfriend: bool = False
-    # Квесты
-    quests: Dict[str, Dict[str, Any]] = field(default_factory=lambda: {
-        "main": {
-            "title": "Стать жаворонком",
-            "desc": "Держи серию 90 дней без вредных привычек",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 90,
-            "reward": {"xp": 300, "rub": 2000},
-        },
-        "work_reports": {
-            "title": "Рабочая рутина",
-            "desc": "Собери 3 отчёта",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 3,
-            "reward": {"xp": 80, "rub": 600},
-        },
-        "buy_coffeemachine": {
-            "title": "Кофе дома",
-            "desc": "Купить кофемашину",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 1,
-            "reward": {"xp": 40},
-        },
-        "work_features": {
-            "title": "Новые фичи",
-            "desc": "Реализуй 5 задач",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 5,
-            "reward": {"xp": 150, "rub": 800},
-        },
-        "work_incidents": {
-            "title": "Дежурство героя",
-            "desc": "Разрули 3 инцидента",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 3,
-            "reward": {"xp": 150},
-        },
-        "work_presentations": {
-            "title": "Слово за тобой",
-            "desc": "Проведи 2 демо/встречи с клиентом",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 2,
-            "reward": {"xp": 120, "rub": 500},
-        },
-        "money_crunch": {
-            "title": "Деньги на исходе",
-            "desc": "Герой попал в ситуевину, ему срочно нужно рожать деньги!",
-            "status": "Скрыто",
-            "progress": 0,
-            "target": 1,
-            "reward": {"xp": 50},
-        },
-    })
+    # Квесты: описания в общем QUEST_CATALOG, у героя только статус и прогресс по индексу
+    quest_status: bytearray = field(default_factory=lambda: bytearray(len(QUEST_CATALOG)))
+    quest_progress: array = field(default_factory=lambda: array("l", [0]) * len(QUEST_CATALOG))
 
     # --- Логгер событий ---
-    def log_event(self, message: str, color: Optional[str] = None) -> None:
+    def log_event(self, message: str, *args: Any, color: Optional[str] = None) -> None:
         """Сохраняем событие в журнал и дублируем в stdout.
 
+        Если переданы args, message — шаблон ("Баланс: {} ₽"), и текст
+        собирается лениво, только когда его читают. Дублирование (stdout,
+        файл, ничего) определяет log_sink.
         color аргумент оставлен для совместимости, но сейчас не используется в GUI.
         """
-        self.event_log.append(message)
-        print(message)
+        record = (self.days_elapsed, self.time_minutes, message, args)
+        self.event_log.push(record)
+        self.log_sink.emit(record)
+        # Каждое действие героя пишет в журнал — это и есть сигнал об изменении
+        self.state_version += 1
+
+    def touch(self) -> None:
+        """Отметить изменение состояния, сделанное без записи в журнал."""
+        self.state_version += 1
+
+    # --- Сохранение ---
+    def state_dict(self) -> Dict[str, Any]:
+        """Сохраняемое состояние героя (без RNG и прочих рантайм-объектов)."""
+        data = dict(zip(SAVED_FIELDS, _get_saved_fields(self)))
+        data["event_log"] = self.event_log.to_list()
+        data["quest_status"] = list(self.quest_status)
+        data["quest_progress"] = list(self.quest_progress)
+        return data
+
+    def load_state_dict(self, data: Dict[str, Any]) -> None:
+        """Восстановить известные поля из state_dict()."""
+        for k, v in data.items():
+            if k == "event_log":
+                self.event_log.load_list(v)
+            elif k == "quests":
+                self.load_legacy_quests(v)
+            elif k == "quest_status":
+                self.quest_status = bytearray(v)
+            elif k == "quest_progress":
+                self.quest_progress = array("l", v)
+            elif k not in TRANSIENT_FIELDS and hasattr(self, k):
+                setattr(self, k, v)
+        self.touch()
+
+    # --- Снимки и форки ---
+    def snapshot(self, with_log: bool = True) -> Dict[str, Any]:
+        """Лёгкий снимок для restore()/clone(), в разы дешевле copy.deepcopy.
+
+        Скаляры копируются как есть, статусы и прогресс квестов — два
+        коротких массива (описания квестов общие, в QUEST_CATALOG). Буфер
+        журнала копируется списком кортежей; with_log=False даёт пустой
+        журнал. RandomStream копируется с состоянием. state_version в снимок
+        не входит: restore() её только увеличивает, иначе кэши GUI увидели бы
+        уже знакомую версию у изменившегося героя.
+        """
+        state = dict(zip(SNAPSHOT_FIELDS, _get_snapshot_fields(self)))
+        state["quest_status"] = bytearray(self.quest_status)
+        state["quest_progress"] = array("l", self.quest_progress)
+        state["last_quit_attempt_day_by_habit"] = dict(self.last_quit_attempt_day_by_habit)
+        state["event_log"] = self.event_log.copy() if with_log else EventLog(self.event_log.maxlen)
+        if isinstance(self.rng, RandomStream):
+            state["rng"] = self.rng.fork()
+        return state
+
+    def restore(self, snap: Dict[str, Any]) -> None:
+        """Вернуться к snapshot(); один снимок можно восстанавливать много раз."""
+        log = self.event_log
+        for name, value in snap.items():
+            if name != "event_log":
+                setattr(self, name, value)
+        # Изменяемые части снимка не отдаём герою напрямую, иначе следующий restore увидит правки
+        self.quest_status = bytearray(snap["quest_status"])
+        self.quest_progress = array("l", snap["quest_progress"])
+        self.last_quit_attempt_day_by_habit = dict(snap["last_quit_attempt_day_by_habit"])
+        # Вытесненное своим журналом дописываем в файл, а вытеснение продолжает копия снимка
+        log.close()
+        self.event_log = snap["event_log"].copy()
+        self.event_log.spill_path = log.spill_path
+        if isinstance(snap["rng"], RandomStream):
+            self.rng = snap["rng"].fork()
+        self.touch()
+
+    def clone(self, with_log: bool = True) -> "Person":
+        """Независимая копия героя для поиска и what-if прогонов."""
+        return Person(**self.snapshot(with_log))
 
     # Функция, вызываемая в начале каждого дня.
     def reset_daily_counters(self):
@@ -178,18 +769,31 @@ class Person:
         self.night_binge_protection_today = False  # защита от ночных жоров (супер-еда)
 
     # Проверка и корректировка состояния после всех действий за день.
+    # Фазы — отдельные методы, чтобы профилировщик и трассировка видели их по отдельности.
     def end_of_day_update(self):
         """Обновляем сон, здоровье, вес."""
-        # Сон: если бодрость < порог – персонаж спит меньше нужного времени
-        if self.alertness < 30:
-            sleep_hours = max(0.5, self.sleep_need * (self.alertness / 50))
-        else:
-            sleep_hours = self.sleep_need
+        self.end_of_day_habits()
+        self.end_of_day_job()
+        self.end_of_day_sleep()
+        self.night_binge()
 
-        # Влияние переедания на сон (если сегодня переедал)
-        if self.overeaten_today:
-            sleep_hours -= self.overeating_cost
+        # Счетчик дней
+        self.days_elapsed += 1
+        # Сброс времени дня к утру
+        self.time_minutes = 8 * 60
+        # Сброс рабочих флагов на новый день
+        self.worked_today = False
+        self.work_productive_today = False
+        self.work_minutes_today = 0
+        self.job_bonus_eligibility_today = True
+        self.job_late_today = False
 
+        # Недельные выплаты и проценты по займу каждые 7 дней
+        if self.days_elapsed % 7 == 0:
+            self.weekly_payout()
+
+    def end_of_day_habits(self) -> None:
+        """Восстановление здоровья и серия дней без привычек (квесты)."""
         # Восстановление здоровья, если не было вредных привычек за день
         if self.coffee_cups_today == 0 and self.cigarettes_smoked_today == 0 and (not self.has_overeat_habit or self.weight_kg == 70.0):
             self.health_score = min(200, self.health_score + 5)
@@ -205,17 +809,10 @@ class Person:
         else:
             self.goal_streak_days = 0
         # Прогресс по главному квесту
-        try:
-            # Показать основной квест только когда серия >= 1
-            if self.goal_streak_days >= 1 and self.quests["main"]["status"] == "Скрыто":
-                self.quests["main"]["status"] = "В процессе"
-            self.quests["main"]["progress"] = int(self.goal_streak_days)
-            if self.quests["main"]["status"] != "Завершено" and self.goal_streak_days >= int(self.quests["main"]["target"]):
-                self.complete_quest("main")
-        except Exception:
-            pass
+        self.quest_event("streak", self.goal_streak_days)
 
-        # Работа: итоги дня, если трудоустроен
+    def end_of_day_job(self) -> None:
+        """Работа: итоги дня, если трудоустроен."""
         if self.employed:
             if self.worked_today:
                 # Лишение премии при опоздании/недоработке было учтено во время смены
@@ -228,7 +825,7 @@ class Person:
                 fine = 300
                 self.change_money(-fine)
                 self.change_morale(-6)
-                self.log_event(f"Прогул. Предупреждение #{self.job_warnings}. Штраф {fine} ₽ и мораль -6.")
+                self.log_event("Прогул. Предупреждение #{}. Штраф {} ₽ и мораль -6.", self.job_warnings, fine)
                 if self.job_warnings >= 3:
                     self.employed = False
                     self.fired_reason = "Систематические прогулы/опоздания"
@@ -237,6 +834,18 @@ class Person:
         self.worked_today = False
         self.work_productive_today = False
 
+    def end_of_day_sleep(self) -> None:
+        """Ночной сон: сколько удалось поспать и как сдвинулась потребность во сне."""
+        # Сон: если бодрость < порог – персонаж спит меньше нужного времени
+        if self.alertness < 30:
+            sleep_hours = max(0.5, self.sleep_need * (self.alertness / 50))
+        else:
+            sleep_hours = self.sleep_need
+
+        # Влияние переедания на сон (если сегодня переедал)
+        if self.overeaten_today:
+            sleep_hours -= self.overeating_cost
+
         # Переход к следующему дню – сброс бодрости и сна до нормального уровня
         self.alertness = min(100, max(0, self.alertness))
         if sleep_hours < 0:                  # если сон отрицательный → здоровье падает
@@ -244,71 +853,201 @@ class Person:
         else:
             self.sleep_need = max(4.0, min(self.sleep_need + (sleep_hours - 8), 12))
 
-        # Ночные жоры: шанс, если калорий много и нет защиты
+    def night_binge(self) -> None:
+        """Ночные жоры: шанс, если калорий много и нет защиты."""
         try:
-            import random as _r
+            rng = self.rng
             if not self.night_binge_protection_today:
                 # базовый шанс 0.2, +0.1 если калорий > 3000
                 chance = 0.2 + (0.1 if self.calories_today > 3000 else 0)
-                if _r.random() < chance and self.has_overeat_habit:
-                    extra_cal = _r.randint(400, 1200)
+                if rng.random() < chance and self.has_overeat_habit:
+                    extra_cal = rng.randint(400, 1200)
                     self.calories_today += extra_cal
                     self.weight_kg = max(40.0, self.weight_kg + (extra_cal / 7700.0))
                     self.change_money(-200)
                     self.overeaten_today = True
-                    self.log_event(f"Ночной жор на {extra_cal} ккал. Вес теперь {self.weight_kg:.1f} кг.")
+                    self.log_event("Ночной жор на {} ккал. Вес теперь {:.1f} кг.", extra_cal, self.weight_kg)
         except Exception:
             pass
 
-        # Счетчик дней
-        self.days_elapsed += 1
-        # Сброс времени дня к утру
-        self.time_minutes = 8 * 60
-        # Сброс рабочих флагов на новый день
-        self.worked_today = False
-        self.work_productive_today = False
-        self.work_minutes_today = 0
-        self.job_bonus_eligibility_today = True
-        self.job_late_today = False
-
-        # Недельные выплаты и проценты по займу каждые 7 дней
-        if self.days_elapsed % 7 == 0:
-            # Буст выплат: фикс + премия + бонусы за РПГ
+    def weekly_payout(self) -> None:
+        """Конец недели: выплата, коммуналка, проценты по займу, супер-события."""
+        # Буст выплат: фикс + премия + бонусы за РПГ
+        rpg_bonus = int(max(0, (self.charisma - 1)) * 100 + max(0, (self.level - 1)) * 50)
+        payout = self.wage_accrued + self.bonus_accrued + 7500 + 1500 + rpg_bonus
+        if payout > 0:
+            self.rubles += payout
+            self.log_event("Выплата за неделю: ставка {} ₽ + премии {} ₽ + 7500 фикс + 1500 премия + РПГ-бонус {} ₽ = {} ₽.", self.wage_accrued, self.bonus_accrued, rpg_bonus, payout)
+            self.wage_accrued = 0
+            self.bonus_accrued = 0
+        # Коммунальные платежи
+        if self.utilities_weekly > 0:
+            self.rubles -= self.utilities_weekly
+            self.log_event("Оплачены коммунальные услуги: −{} ₽.", self.utilities_weekly)
+        # Начисление процентов по микрозайму
+        if self.loan_principal > 0:
+            interest = int(math.ceil(self.loan_principal * self.loan_weekly_interest_pct / 100.0))
+            self.loan_principal += interest
+            self.log_event("Начислены проценты по микрозайму: +{} ₽. Долг: {} ₽.", interest, self.loan_principal)
+        # Супер-события недели (редкие неожиданности)
+        if self.rng.random() < SUPER_EVENT_CHANCE:
+            self.super_event(self.rng.choice(SUPER_EVENTS))
+
+    def super_event(self, event: str) -> None:
+        if event == "phone_repair":
+            cost = 3500
+            self.rubles -= cost
+            self.log_event("Неожиданность: Сломался телефон. Ремонт −{} ₽.", cost)
+        elif event == "relative_funeral":
+            cost = 2000
+            self.rubles -= cost
+            self.change_morale(-10)
+            self.log_event("Горе в семье. Расходы −{} ₽, мораль −10.", cost)
+        else:
+            cost = 5000
+            self.rubles -= cost
+            self.change_morale(6)
+            self.log_event("Свадьба у родственников. Подарки −{} ₽, мораль +6.", cost)
+
+    # --- Распорядок и перемотка дней ---
+    def work_day(self, productive: bool = True) -> None:
+        """Упрощённая смена: 10:00–17:00 на работе, итоги как после мини-игры."""
+        self.current_location = 'work'
+        if self.time_minutes < 10 * 60:
+            self.advance_time(10 * 60 - self.time_minutes)
+        if self.time_minutes // 60 >= 17:
+            return
+        self.advance_time(7 * 60)
+        self.worked_today = True
+        self.work_productive_today = productive
+        self.current_location = 'home'
+
+    def play_day(self, plan: DayPlan) -> None:
+        """Прожить один день по плану, включая конец дня и сброс счётчиков."""
+        meals = plan.meals
+        if meals:
+            self.eat_food(meals[0])
+        if plan.work and self.employed:
+            self.work_day()
+        for kind in meals[1:]:
+            self.eat_food(kind)
+        self.sleep(plan.sleep_hours)
+        self.end_of_day_update()
+        self.reset_daily_counters()
+
+    def fast_forward(self, days: int, plan: DayPlan) -> None:
+        """Прожить days дней по плану plan, не проигрывая каждый день.
+
+        Вызывать с утра, после reset_daily_counters. Сначала дни идут по
+        одному (play_day), пока бодрость, здоровье и потребность во сне не
+        выйдут на неподвижную точку — у фиксированного плана это неделя-две.
+        Дальше дни до следующего «события» (новый уровень, завершение квеста
+        серии) пропускаются разом, а сам день события проживается обычно:
+        см. _skip_days. Если калорийность еды в плане случайна или состояние
+        не устоялось за FAST_FORWARD_WARMUP дней подряд, дни идут по одному.
+        """
+        remaining = max(0, int(days))
+        meals = [FOOD_ACTIONS.get(kind) or FOOD_ACTIONS["fast"] for kind in plan.meals]
+        bulk = all(m.calories_min == m.calories_max and not m.requires_home for m in meals)
+        steady = False
+        unsettled = 0
+        while remaining > 0:
+            if bulk and steady:
+                n = min(remaining, self._days_to_event(plan, meals) - 1)
+                if n > 0:
+                    self._skip_days(n, plan, meals)
+                    remaining -= n
+                steady = False  # день события — по-настоящему
+                continue
+            before = self._steady_key()
+            self.play_day(plan)
+            remaining -= 1
+            steady = self._steady_key() == before
+            unsettled = 0 if steady else unsettled + 1
+            if unsettled >= FAST_FORWARD_WARMUP:
+                bulk = False
+
+    def _steady_key(self) -> Tuple[Any, ...]:
+        """Что должно повторяться изо дня в день, чтобы дни можно было пропускать."""
+        return (self.alertness, self.health_score, self.sleep_need, self.employed,
+                self.job_warnings, self.current_location)
+
+    def _days_to_event(self, plan: DayPlan, meals: List[FoodDef]) -> int:
+        """Через сколько дней плана случится новый уровень или завершится квест серии."""
+        days = sys.maxsize
+        if meals:
+            # Каждая еда даёт 1 XP
+            days = -(-(self.level * 100 - self.xp) // len(meals))
+        if sum(m.calories_min for m in meals) <= 2500:
+            for i in QUEST_TRIGGERS.get("streak", ()):
+                target = QUEST_CATALOG[i].target
+                if self.quest_status[i] != QUEST_DONE and target > self.goal_streak_days:
+                    days = min(days, target - self.goal_streak_days)
+        return max(1, days)
+
+    def _skip_days(self, n: int, plan: DayPlan, meals: List[FoodDef]) -> None:
+        """n дней устоявшегося плана разом.
+
+        Бодрость, здоровье и потребность во сне стоят на месте (это проверил
+        fast_forward), уровень и харизма в отрезке не меняются. Еда, ставка,
+        премии, недельные выплаты, коммуналка, серия и вес считаются в
+        замкнутой форме, проценты по займу — по неделям (округление вверх
+        каждую неделю). Ночные жоры и супер-события недели разыгрываются
+        одной выборкой на весь отрезок. Журнал получает сводку вместо
+        записей за каждый день.
+        """
+        rng = self.rng
+        day0 = self.days_elapsed
+        start_rubles = self.rubles
+        calories = sum(m.calories_min for m in meals)
+        meal_cost = sum(self.discounted_amount(-m.cost) for m in meals)
+        self.rubles += n * meal_cost
+        self.weight_kg = max(40.0, self.weight_kg + n * calories / 7700.0)
+        self.xp += n * len(meals)
+
+        wage = bonus = 0
+        if plan.work and self.employed:
+            wage = self.job_daily_wage
+            bonus = 500
+        weeks = (day0 + n) // 7 - day0 // 7
+        if weeks:
+            # Выплаты забирают всё накопленное к последней неделе отрезка
+            last = (day0 + n) // 7 * 7 - day0
             rpg_bonus = int(max(0, (self.charisma - 1)) * 100 + max(0, (self.level - 1)) * 50)
-            payout = self.wage_accrued + self.bonus_accrued + 7500 + 1500 + rpg_bonus
-            if payout > 0:
-                self.rubles += payout
-                self.log_event(f"Выплата за неделю: ставка {self.wage_accrued} ₽ + премии {self.bonus_accrued} ₽ + 7500 фикс + 1500 премия + РПГ-бонус {rpg_bonus} ₽ = {payout} ₽.")
-                self.wage_accrued = 0
-                self.bonus_accrued = 0
-            # Коммунальные платежи
+            paid = self.wage_accrued + self.bonus_accrued + last * (wage + bonus) + weeks * (7500 + 1500 + rpg_bonus)
+            self.rubles += paid
+            self.wage_accrued = (n - last) * wage
+            self.bonus_accrued = (n - last) * bonus
             if self.utilities_weekly > 0:
-                self.rubles -= self.utilities_weekly
-                self.log_event(f"Оплачены коммунальные услуги: −{self.utilities_weekly} ₽.")
-            # Начисление процентов по микрозайму
-            if self.loan_principal > 0:
-                import math as _m
-                interest = int(_m.ceil(self.loan_principal * self.loan_weekly_interest_pct / 100.0))
-                self.loan_principal += interest
-                self.log_event(f"Начислены проценты по микрозайму: +{interest} ₽. Долг: {self.loan_principal} ₽.")
-            # Супер-события недели (редкие неожиданности)
-            import random as _r
-            if _r.random() < 0.15:
-                event = _r.choice(["phone_repair", "relative_funeral", "relative_wedding"])
-                if event == "phone_repair":
-                    cost = 3500
-                    self.rubles -= cost
-                    self.log_event(f"Неожиданность: Сломался телефон. Ремонт −{cost} ₽.")
-                elif event == "relative_funeral":
-                    cost = 2000
-                    self.rubles -= cost
-                    self.change_morale(-10)
-                    self.log_event(f"Горе в семье. Расходы −{cost} ₽, мораль −10.")
-                else:
-                    cost = 5000
-                    self.rubles -= cost
-                    self.change_morale(6)
-                    self.log_event(f"Свадьба у родственников. Подарки −{cost} ₽, мораль +6.")
+                self.rubles -= weeks * self.utilities_weekly
+            for _ in range(weeks if self.loan_principal > 0 else 0):
+                self.loan_principal += int(math.ceil(self.loan_principal * self.loan_weekly_interest_pct / 100.0))
+            for _ in range(sample_binomial(rng, weeks, SUPER_EVENT_CHANCE)):
+                self.super_event(rng.choice(SUPER_EVENTS))
+        else:
+            self.wage_accrued += n * wage
+            self.bonus_accrued += n * bonus
+
+        binges = 0
+        if self.has_overeat_habit and not any(m.binge_protection for m in meals):
+            chance = 0.2 + (0.1 if calories > 3000 else 0)
+            binges = sample_binomial(rng, n, chance)
+            if binges:
+                extra = sample_randint_sum(rng, binges, 400, 1200)
+                self.weight_kg = max(40.0, self.weight_kg + extra / 7700.0)
+                self.rubles += binges * self.discounted_amount(-200)
+
+        if calories <= 2500:
+            self.goal_streak_days += n
+        else:
+            self.goal_streak_days = 0
+        self.days_elapsed += n
+        self.quest_event("streak", self.goal_streak_days)
+        # Самый низкий баланс в отрезке — перед первой выплатой (или в конце)
+        first = min(n, 7 - day0 % 7)
+        self.quest_event("balance", min(start_rubles + first * meal_cost, self.rubles))
+        self.log_event("Перемотка на {} дн.: баланс {} ₽ ({:+d}), вес {:.1f} кг, серия {} дн., ночных жоров {}.",
+                       n, self.rubles, self.rubles - start_rubles, self.weight_kg, self.goal_streak_days, binges)
 
     # --- Время суток ---
     def advance_time(self, minutes: int) -> None:
@@ -331,6 +1070,32 @@ class Person:
         # bus/taxi без изменений времени, но можно в будущем влиять харизмой/интеллектом на цену/маршрут
         return minutes
 
+    def enter_location(self, location: str) -> None:
+        """Оказаться в локации без поездки (герой дошёл по комнате сам)."""
+        if location != self.current_location:
+            self.current_location = location
+            self.touch()
+
+    def travel(self, target: str, mode: str = "walk") -> bool:
+        """Переместиться в target способом mode по маршруту из каталога.
+        Возвращает False, если такого маршрута нет.
+        """
+        route = ACTIONS.route_index.get((target, mode))
+        if route is None:
+            return False
+        travel_mode = route.mode
+        if route.cost:
+            self.change_money(-route.cost)
+        minutes = route.minutes
+        if travel_mode.stat_adjusted:
+            minutes = self.compute_travel_minutes(travel_mode.key, minutes)
+        self.advance_time(minutes)
+        if travel_mode.weight_loss:
+            self.weight_kg = max(40.0, self.weight_kg - travel_mode.weight_loss)
+        self.current_location = target
+        self.log_event(travel_mode.log, route.label, minutes, route.cost, travel_mode.weight_loss)
+        return True
+
     def format_time(self) -> str:
         h = (self.time_minutes // 60) % 24
         m = self.time_minutes % 60
@@ -347,31 +1112,29 @@ class Person:
             self.xp -= self.level * 100
             self.level += 1
             # На апе случайно +1 к одной из характеристик и мораль +5
-            import random as _r
-            attr = _r.choice(['strength', 'agility', 'intelligence', 'charisma'])
+            attr = self.rng.choice(['strength', 'agility', 'intelligence', 'charisma'])
             setattr(self, attr, getattr(self, attr) + 1)
             self.morale = min(100, self.morale + 5)
-            self.log_event(f"Новый уровень {self.level}! +1 к {attr} и мораль +5.")
+            self.log_event("Новый уровень {}! +1 к {} и мораль +5.", self.level, attr)
 
     def change_morale(self, delta: int) -> None:
         self.morale = max(0, min(100, self.morale + int(delta)))
 
     # --- Деньги ---
-    def change_money(self, delta: int) -> None:
+    def discounted_amount(self, delta: int) -> int:
+        """Сколько на самом деле спишет change_money(delta)."""
         amount = int(delta)
         # Небольшие бонусы/скидки от РПГ: харизма улучшает сделки на 1% за уровень >1 (до 10%)
         if amount != 0 and amount < 0:
             discount_pct = min(10, max(0, self.charisma - 1))
             amount = int(round(amount * (100 - discount_pct) / 100.0))
-        self.rubles += amount
-        self.log_event(f"Баланс: {self.rubles} ₽")
+        return amount
+
+    def change_money(self, delta: int) -> None:
+        self.rubles += self.discounted_amount(delta)
+        self.log_event("Баланс: {} ₽", self.rubles)
         # Авто-квест на минусовый баланс
-        try:
-            if self.rubles <= -5000 and self.quests.get('money_crunch', {}).get('status') == 'Скрыто':
-                self.quests['money_crunch']['status'] = 'В процессе'
-                self.log_event("Квест: Герой попал в ситуевину, ему срочно нужно рожать деньги!")
-        except Exception:
-            pass
+        self.quest_event("balance", self.rubles)
 
     def _normalize_habit_key(self, habit_name: str) -> str:
         return {
@@ -424,7 +1187,7 @@ class Person:
 
         ok, reason = self.can_attempt_to_kick_habit(habit_name)
         if not ok:
-            self.log_event(f"[{self.name}] Не готов к попытке бросить '{habit_name}': {reason}")
+            self.log_event("[{}] Не готов к попытке бросить '{}': {}", self.name, habit_name, reason)
             return False
 
         base_chance_map = {'coffee': 0.15, 'smoking': 0.10, 'overeating': 0.12}
@@ -443,19 +1206,19 @@ class Person:
 
         chance = max(0.02, min(0.6, chance))
 
-        roll = random.random()
+        roll = self.rng.random()
         self.last_quit_attempt_day_by_habit[habit_name] = self.days_elapsed
         if roll < chance:
             setattr(self, f"has_{normalized}_habit", False)
             self.log_event(
-                f"[{self.name}] Собрался с силами и бросил привычку '{habit_name}'! (шанс {int(chance*100)}%)"
+                "[{}] Собрался с силами и бросил привычку '{}'! (шанс {}%)", self.name, habit_name, int(chance*100)
             )
             return True
         else:
             # Цена неудачной попытки
             self.alertness = max(0, self.alertness - 10)
             self.log_event(
-                f"[{self.name}] Не удалось бросить '{habit_name}' (шанс {int(chance*100)}%). Отдохни и попробуй позже."
+                "[{}] Не удалось бросить '{}' (шанс {}%). Отдохни и попробуй позже.", self.name, habit_name, int(chance*100)
             )
             return False
 
@@ -468,24 +1231,16 @@ class Person:
             self.log_event("[Внимание] У тебя уже нет кофе‑привычки!")
             return False
 
-        quality_key = (quality or "instant").lower()
-        # Базовые параметры напитков
-        # benefit основан на self.coffee_benefit
-        options = {
-            "instant": {"cost": 100, "benefit": self.coffee_benefit, "time_min": 10, "needs_machine": False, "label": "растворимый"},
-            "ground":  {"cost": 150, "benefit": self.coffee_benefit + 4, "time_min": 10, "needs_machine": True,  "label": "молотый"},
-            "premium": {"cost": 300, "benefit": self.coffee_benefit + 8, "time_min": 12, "needs_machine": True,  "label": "супер премиум"},
-        }
-        opt = options.get(quality_key, options["instant"]) 
-        if opt["needs_machine"] and not self.has_coffee_machine:
+        opt = COFFEE_ACTIONS.get((quality or "instant").lower()) or COFFEE_ACTIONS["instant"]
+        if opt.needs_machine and not self.has_coffee_machine:
             self.log_event("[Внимание] Нужна кофемашина для такого кофе.")
             return False
 
         self.coffee_cups_today += 1
-        self.alertness = min(100, self.alertness + int(opt["benefit"]))
-        self.change_money(-int(opt["cost"]))
-        self.log_event(f"[{self.name}] Выпил {opt['label']} кофе (−{opt['cost']} ₽). Бодрость: {self.alertness}.")
-        self.advance_time(int(opt["time_min"]))
+        self.alertness = min(100, self.alertness + self.coffee_benefit + opt.benefit_bonus)
+        self.change_money(-opt.cost)
+        self.log_event("[{}] Выпил {} кофе (−{} ₽). Бодрость: {}.", self.name, opt.label, opt.cost, self.alertness)
+        self.advance_time(opt.time_min)
         self.gain_xp(2)
         return True
 
@@ -499,11 +1254,8 @@ class Person:
             return False
         self.change_money(-int(price))
         self.has_coffee_machine = True
-        self.log_event(f"Купил кофемашину за {price} ₽.")
-        try:
-            self.increment_quest("buy_coffeemachine", 1)
-        except Exception:
-            pass
+        self.log_event("Купил кофемашину за {} ₽.", price)
+        self.quest_event("coffee_machine_bought")
         return True
 
     def smoke(self):
@@ -514,7 +1266,7 @@ class Person:
         self.health_score = max(0, self.health_score + self.smoke_penalty)
         self.alertness = max(0, self.alertness - 5)   # небольшое снижение бодрости после сигареты
         self.change_money(-20)
-        self.log_event(f"[{self.name}] Курил (−20 ₽). Здоровье: {self.health_score}.")
+        self.log_event("[{}] Курил (−20 ₽). Здоровье: {}.", self.name, self.health_score)
         self.advance_time(7)
         self.change_morale(-3)
 
@@ -529,34 +1281,23 @@ class Person:
         - super: >=500 ккал, даёт защиту от ночного жора
         Возвращает True, если удалось поесть.
         """
-        key = (food_type or "fast").lower()
-        # Определим параметры
-        # super требует дома
-        options = {
-            "fast": {"cost": 150, "time_min": 20, "label": "фастфуд", "requires_home": False},
-            "balanced": {"cost": 300, "time_min": 40, "label": "сбалансированная еда", "requires_home": False},
-            "super": {"cost": 500, "time_min": 50, "label": "супер полезная еда", "requires_home": True},
-        }
-        opt = options.get(key, options["fast"])
-        if opt["requires_home"] and self.current_location != "home":
+        opt = FOOD_ACTIONS.get((food_type or "fast").lower()) or FOOD_ACTIONS["fast"]
+        if opt.requires_home and self.current_location != "home":
             self.log_event("Супер-полезную еду лучше готовить дома.")
             return False
         # денежный вопрос будет обработан change_money (учтёт скидки)
-        self.change_money(-int(opt["cost"]))
+        self.change_money(-opt.cost)
         # калории и эффекты
-        calories = 0
-        if key == "fast":
-            calories = random.randint(500, 1500)
-            self.health_score = max(0, self.health_score - 1)  # не самая полезная
-            self.alertness = min(100, self.alertness + 2)
-        elif key == "balanced":
-            calories = 800
-            self.health_score = min(200, self.health_score + 3)
-            self.alertness = min(100, self.alertness + 3)
-        else:  # super
-            calories = random.randint(500, 900)
-            self.health_score = min(200, self.health_score + 7)
-            self.alertness = min(100, self.alertness + 4)
+        if opt.calories_min == opt.calories_max:
+            calories = opt.calories_min
+        else:
+            calories = self.rng.randint(opt.calories_min, opt.calories_max)
+        if opt.health < 0:
+            self.health_score = max(0, self.health_score + opt.health)
+        else:
+            self.health_score = min(200, self.health_score + opt.health)
+        self.alertness = min(100, self.alertness + opt.alertness)
+        if opt.binge_protection:
             self.night_binge_protection_today = True
 
         self.calories_today += calories
@@ -566,9 +1307,9 @@ class Person:
         if self.calories_today > 2500:
             self.overeaten_today = True
         # Риск ночного жора, если много фастфуда: обработаем в end_of_day_update, если нет защиты
-        self.advance_time(int(opt["time_min"]))
+        self.advance_time(opt.time_min)
         self.gain_xp(1)
-        self.log_event(f"[{self.name}] Съел: {opt['label']} (−{opt['cost']} ₽, {calories} ккал). Зд: {self.health_score}, Бодр: {self.alertness}, Вес: {self.weight_kg:.1f} кг.")
+        self.log_event("[{}] Съел: {} (−{} ₽, {} ккал). Зд: {}, Бодр: {}, Вес: {:.1f} кг.", self.name, opt.label, opt.cost, calories, self.health_score, self.alertness, self.weight_kg)
         return True
 
     def sleep(self, hours: float):
@@ -586,40 +1327,42 @@ class Person:
         self.sleep_need = max(4.0, min(12.0, self.sleep_need - 0.2))
 
         self.log_event(
-            f"[{self.name}] Сон {hours:.1f} ч. (эффективно {effective_hours:.1f}) → Бодрость +{alert_gain}, Здоровье +{health_gain}."
+            "[{}] Сон {:.1f} ч. (эффективно {:.1f}) → Бодрость +{}, Здоровье +{}.", self.name, hours, effective_hours, alert_gain, health_gain
         )
         self.advance_time(int(hours * 60))
         return alert_gain, health_gain
 
     # --- Тренировки ---
-    def train_gym(self):
+    def train(self, kind: str) -> None:
+        """Тренировка по описанию из TRAINING_ACTIONS ('gym' | 'park')."""
+        opt = TRAINING_ACTIONS[kind]
         # Скидка по харизме уже учтётся в change_money
-        self.change_money(-300)
-        health_gain = 8
-        alert_gain = 5
-        weight_loss = 0.5 if self.has_overeat_habit else 0.7
-        self.health_score = min(200, self.health_score + health_gain)
-        self.alertness = min(100, self.alertness + alert_gain)
+        if opt.cost:
+            self.change_money(-opt.cost)
+        weight_loss = opt.weight_loss_overeat if self.has_overeat_habit else opt.weight_loss
+        self.health_score = min(200, self.health_score + opt.health)
+        self.alertness = min(100, self.alertness + opt.alertness)
         self.weight_kg = max(40.0, self.weight_kg - weight_loss)
-        # Сила ускоряет восстановление сна
-        self.sleep_need = max(4.0, min(12.0, self.sleep_need - (0.1 + 0.02 * max(0, self.strength - 1))))
-        self.advance_time(90)
-        self.log_event(f"Тренировка в качалке: здоровье +{health_gain}, бодрость +{alert_gain}, вес −{weight_loss:.1f} кг (−300 ₽).")
-        self.strength += 1
-        self.gain_xp(12)
+        stat = max(0, getattr(self, opt.stat) - 1)
+        # Сила ускоряет восстановление сна, ловкость — саму тренировку
+        if opt.sleep_relief or opt.sleep_relief_per_stat:
+            relief = opt.sleep_relief + opt.sleep_relief_per_stat * stat
+            self.sleep_need = max(4.0, min(12.0, self.sleep_need - relief))
+        self.advance_time(max(opt.time_floor, opt.time_min - opt.time_per_stat * stat))
+        if opt.cost:
+            self.log_event("Тренировка {}: здоровье +{}, бодрость +{}, вес −{:.1f} кг (−{} ₽).",
+                           opt.label, opt.health, opt.alertness, weight_loss, opt.cost)
+        else:
+            self.log_event("Тренировка {}: здоровье +{}, бодрость +{}, вес −{:.1f} кг.",
+                           opt.label, opt.health, opt.alertness, weight_loss)
+        setattr(self, opt.stat, getattr(self, opt.stat) + 1)
+        self.gain_xp(opt.xp)
+
+    def train_gym(self):
+        self.train("gym")
 
     def train_park(self):
-        health_gain = 4
-        alert_gain = 4
-        weight_loss = 0.3 if self.has_overeat_habit else 0.4
-        self.health_score = min(200, self.health_score + health_gain)
-        self.alertness = min(100, self.alertness + alert_gain)
-        self.weight_kg = max(40.0, self.weight_kg - weight_loss)
-        # Ловкость ускоряет время тренировки на площадке
-        self.advance_time(max(30, 60 - 3 * max(0, self.agility - 1)))
-        self.log_event(f"Тренировка на спортплощадке: здоровье +{health_gain}, бодрость +{alert_gain}, вес −{weight_loss:.1f} кг.")
-        self.agility += 1
-        self.gain_xp(9)
+        self.train("park")
 
     def read_in_library(self):
         # Чтение повышает интеллект, иногда поднимает мораль
@@ -628,8 +1371,7 @@ class Person:
         self.gain_xp(10)
         self.log_event("Почитал в библиотеке: интеллект +1.")
         # Забавное событие: журнал с голыми бабами
-        import random as _r
-        if _r.random() < 0.25:
+        if self.rng.random() < 0.25:
             self.change_morale(12)
             self.log_event("Нашёл журнал с голыми бабами. Мораль +12.")
         else:
@@ -643,10 +1385,14 @@ class Person:
     def roll_dice(self, sides: int = 20) -> int:
         """Бросок кубика как в DnD (по умолчанию D20)."""
         sides = max(2, int(sides))
-        value = random.randint(1, sides)
-        self.log_event(f"Бросок D{sides}: {value}")
+        value = self.rng.randint(1, sides)
+        self.log_event("Бросок D{}: {}", sides, value)
         return value
 
+    def roll_chance(self, chance: float) -> bool:
+        """Бросок «случится ли» с вероятностью chance (для фоновых встреч в GUI)."""
+        return self.rng.random() < chance
+
     # --- Баланс и сложность ---
     def apply_difficulty(self, mode: str = "normal") -> None:
         """Применяем пресет сложности."""
@@ -669,76 +1415,135 @@ class Person:
         Возвращает словарь: {'type', 'message'}
         """
         hardcore = mode.lower() == "hardcore"
-        encounter_type = forced_type or random.choice(["drunk", "gopnik", "janitor"])
+        encounter_type = forced_type or self.rng.choice(["drunk", "gopnik", "janitor"])
         msg = ""
         if encounter_type == "drunk":
-            delta_health = - (12 if hardcore else 7) - random.randint(0, 5)
+            delta_health = - (12 if hardcore else 7) - self.rng.randint(0, 5)
             delta_alert = - (12 if hardcore else 8)
             msg = f"Подозрительный алкаш пристал к тебе. Здоровье {delta_health}, бодрость {delta_alert}."
             if apply:
                 self.health_score = max(0, self.health_score + delta_health)
                 self.alertness = max(0, self.alertness + delta_alert)
-                self.log_event(f"Случайная встреча: {msg}")
+                self.log_event("Случайная встреча: {}", msg)
         elif encounter_type == "gopnik":
-            delta_health = - (15 if hardcore else 8) - random.randint(0, 6)
+            delta_health = - (15 if hardcore else 8) - self.rng.randint(0, 6)
             delta_alert = - (10 if hardcore else 6)
             # Шанс вырубили
-            knocked = random.random() < (0.25 if hardcore else 0.15)
+            knocked = self.rng.random() < (0.25 if hardcore else 0.15)
             base_msg = f"Гопники докопались. Здоровье {delta_health}, бодрость {delta_alert}."
             msg = ("Вас вырубили. " + base_msg) if knocked else base_msg
             if apply:
                 self.health_score = max(0, self.health_score + delta_health)
                 self.alertness = max(0, self.alertness + delta_alert)
-                if self.has_smoking_habit and random.random() < (0.6 if hardcore else 0.35):
+                if self.has_smoking_habit and self.rng.random() < (0.6 if hardcore else 0.35):
                     self.smoke()
                 else:
-                    self.log_event(f"Случайная встреча: {msg}")
+                    self.log_event("Случайная встреча: {}", msg)
             if apply:
                 self.last_encounter_minute = self.time_minutes
             return {"type": encounter_type, "message": msg, "knockout": knocked}
         else:  # janitor
-            if self.has_smoking_habit and random.random() < (0.5 if hardcore else 0.3):
+            if self.has_smoking_habit and self.rng.random() < (0.5 if hardcore else 0.3):
                 delta_alert = - (6 if hardcore else 4)
                 msg = f"Дворник сделал замечание за окурки. Бодрость {delta_alert}."
                 if apply:
                     self.alertness = max(0, self.alertness + delta_alert)
-                    self.log_event(f"Случайная встреча: {msg}")
+                    self.log_event("Случайная встреча: {}", msg)
             else:
                 bonus = 3 if hardcore else 5
                 msg = f"Дворник пожелал доброго утра и подбодрил. Здоровье +{bonus}."
                 if apply:
                     self.health_score = min(200, self.health_score + bonus)
-                    self.log_event(f"Случайная встреча: {msg}")
+                    self.log_event("Случайная встреча: {}", msg)
 
         if apply:
             self.last_encounter_minute = self.time_minutes
         return {"type": encounter_type, "message": msg, "knockout": False}
 
     # --- Квесты ---
+    @property
+    def quests(self) -> Dict[str, Dict[str, Any]]:
+        """Старый вид квестов (словарь словарей) — только для чтения и отображения.
+
+        Собирается заново при каждом обращении; изменения в нём герою не
+        передаются — для этого есть reveal_quest/increment_quest/complete_quest.
+        """
+        return {
+            q.key: {
+                "title": q.title,
+                "desc": q.desc,
+                "status": QUEST_STATUS_LABELS[self.quest_status[i]],
+                "progress": self.quest_progress[i],
+                "target": q.target,
+                "reward": q.reward,
+            }
+            for i, q in enumerate(QUEST_CATALOG)
+        }
+
+    def quest_state(self, key: str) -> int:
+        """Код статуса квеста: QUEST_HIDDEN / QUEST_ACTIVE / QUEST_DONE."""
+        return self.quest_status[QUEST_INDEX[key]]
+
+    def reveal_quest(self, key: str) -> bool:
+        """Открыть скрытый квест; True, если он действительно был скрыт."""
+        i = QUEST_INDEX[key]
+        if self.quest_status[i] != QUEST_HIDDEN:
+            return False
+        self.quest_status[i] = QUEST_ACTIVE
+        return True
+
+    def quest_event(self, event: str, value: int = 1) -> None:
+        """Игровое событие для квестов: обрабатывают его только подписчики из QUEST_TRIGGERS."""
+        for i in QUEST_TRIGGERS.get(event, ()):
+            q = QUEST_CATALOG[i]
+            status = self.quest_status[i]
+            if q.kind == QUEST_STREAK:
+                # Квест серии открывается с первого дня серии, прогресс следит за ней и после завершения
+                if value >= 1 and status == QUEST_HIDDEN:
+                    self.quest_status[i] = QUEST_ACTIVE
+                self.quest_progress[i] = value
+                if status != QUEST_DONE and value >= q.target:
+                    self.complete_quest(q.key)
+            elif q.kind == QUEST_THRESHOLD:
+                if value <= q.threshold and status == QUEST_HIDDEN:
+                    self.quest_status[i] = QUEST_ACTIVE
+                    if q.reveal_log:
+                        self.log_event("Квест: {}", q.desc)
+            elif status != QUEST_DONE:
+                if q.reveal_on_progress and status == QUEST_HIDDEN:
+                    self.quest_status[i] = QUEST_ACTIVE
+                self.increment_quest(q.key, value)
+
     def increment_quest(self, key: str, amount: int = 1) -> None:
-        if key not in self.quests:
-            return
-        q = self.quests[key]
-        if q.get("status") == "Завершено":
+        i = QUEST_INDEX.get(key)
+        if i is None or self.quest_status[i] == QUEST_DONE:
             return
-        q["progress"] = int(q.get("progress", 0)) + int(amount)
-        target = int(q.get("target", 0))
-        if target and q["progress"] >= target:
+        self.quest_progress[i] += amount
+        target = QUEST_CATALOG[i].target
+        if target and self.quest_progress[i] >= target:
             self.complete_quest(key)
 
     def complete_quest(self, key: str) -> None:
-        q = self.quests.get(key)
-        if not q or q.get("status") == "Завершено":
+        i = QUEST_INDEX.get(key)
+        if i is None or self.quest_status[i] == QUEST_DONE:
             return
-        q["status"] = "Завершено"
-        reward = q.get("reward", {})
-        rub = int(reward.get("rub", 0))
-        xp = int(reward.get("xp", 0))
-        if rub:
-            self.rubles += rub
-        if xp:
-            self.gain_xp(xp)
-        self.log_event(f"Квест завершён: {q.get('title', key)}. Награда: {rub} ₽, {xp} XP.")
+        self.quest_status[i] = QUEST_DONE
+        q = QUEST_CATALOG[i]
+        if q.reward_rub:
+            self.rubles += q.reward_rub
+        if q.reward_xp:
+            self.gain_xp(q.reward_xp)
+        self.log_event("Квест завершён: {}. Награда: {} ₽, {} XP.", q.title, q.reward_rub, q.reward_xp)
+
+    def load_legacy_quests(self, quests: Dict[str, Dict[str, Any]]) -> None:
+        """Перенести квесты из старого формата (словарь словарей) в массивы."""
+        codes = {label: code for code, label in enumerate(QUEST_STATUS_LABELS)}
+        for key, q in quests.items():
+            i = QUEST_INDEX.get(key)
+            if i is None:
+                continue
+            self.quest_status[i] = codes.get(q.get("status"), QUEST_HIDDEN)
+            self.quest_progress[i] = int(q.get("progress", 0))
 
     # --- Микрозайм ---
     def take_microloan(self, amount: int) -> None:
@@ -747,7 +1552,7 @@ class Person:
             return
         self.loan_principal += amount
         self.rubles += amount
-        self.log_event(f"Получен микрозайм {amount} ₽. Долг: {self.loan_principal} ₽.")
+        self.log_event("Получен микрозайм {} ₽. Долг: {} ₽.", amount, self.loan_principal)
 
     def repay_loan(self, amount: int) -> None:
         pay = max(0, int(amount))
@@ -760,7 +1565,7 @@ class Person:
         self.rubles -= pay
         prev = self.loan_principal
         self.loan_principal = max(0, self.loan_principal - pay)
-        self.log_event(f"Погашено по займу {prev - self.loan_principal} ₽. Остаток долга: {self.loan_principal} ₽.")
+        self.log_event("Погашено по займу {} ₽. Остаток долга: {} ₽.", prev - self.loan_principal, self.loan_principal)
 
     # --- Подработка ---
     def do_construction_shift(self) -> None:
@@ -768,37 +1573,36 @@ class Person:
         self.advance_time(360)
         pay = 1200
         self.rubles += pay
-        import random as _r
-        outcome = _r.random()
+        outcome = self.rng.random()
         if outcome < 0.2:
             # Травма
             self.health_score = max(0, self.health_score - 12)
             self.change_morale(-8)
-            self.log_event(f"Подработка на стройке: травма. Здоровье -12, мораль -8. Оплата {pay} ₽.")
+            self.log_event("Подработка на стройке: травма. Здоровье -12, мораль -8. Оплата {} ₽.", pay)
         elif outcome < 0.5:
             # Тяжело, но полезно
             self.strength += 1
             self.health_score = max(0, self.health_score - 4)
-            self.log_event(f"Подработка на стройке: тяжело, но полезно. Сила +1, здоровье -4. Оплата {pay} ₽.")
+            self.log_event("Подработка на стройке: тяжело, но полезно. Сила +1, здоровье -4. Оплата {} ₽.", pay)
         else:
             # Отлично потрудился
             self.strength += 1
             self.change_morale(6)
-            self.log_event(f"Подработка на стройке: всё прошло отлично. Сила +1, мораль +6. Оплата {pay} ₽.")
+            self.log_event("Подработка на стройке: всё прошло отлично. Сила +1, мораль +6. Оплата {} ₽.", pay)
         self.gain_xp(15)
 
     # --- Поиск работы ---
     def find_new_job(self) -> None:
         # Поиск занимает 4 часа; если повезёт — новая работа
         self.advance_time(240)
-        import random as _r
-        if _r.random() < 0.7:
+        rng = self.rng
+        if rng.random() < 0.7:
             self.employed = True
             self.job_warnings = 0
             self.fired_reason = ""
             # Возможно другая ставка
-            self.job_daily_wage = max(1600, min(2600, self.job_daily_wage + _r.randint(-200, 200)))
-            self.log_event(f"Нашёл новую работу! Дневная ставка: {self.job_daily_wage} ₽.")
+            self.job_daily_wage = max(1600, min(2600, self.job_daily_wage + rng.randint(-200, 200)))
+            self.log_event("Нашёл новую работу! Дневная ставка: {} ₽.", self.job_daily_wage)
         else:
             self.log_event("Поиск работы не увенчался успехом. Попробуй позже.")
 
@@ -832,8 +1636,224 @@ class Person:
             print(f"  - {h.capitalize()}: {color_text('Нет' if not flag else 'Да', col)}")
 
 
-def main():
+# Все поля героя по порядку объявления; сохраняемые — без рантайм-полей
+PERSON_FIELDS = tuple(f.name for f in fields(Person))
+SAVED_FIELDS = tuple(name for name in PERSON_FIELDS if name not in TRANSIENT_FIELDS)
+SNAPSHOT_FIELDS = tuple(name for name in PERSON_FIELDS if name != "state_version")
+_get_snapshot_fields = attrgetter(*SNAPSHOT_FIELDS)
+_get_saved_fields = attrgetter(*SAVED_FIELDS)
+
+
+# --- Мини-игра «Работа» ---
+# Тип события → (сообщение, ((подпись, метод WorkShift), ...))
+WORK_EVENTS: Dict[str, Tuple[str, Tuple[Tuple[str, str], ...]]] = {
+    "tempt_smoke": ("Перекур: коллеги зовут покурить.",
+                    (("Отказаться", "_refuse_smoke"), ("Пойти покурить", "_accept_smoke"))),
+    "tempt_coffee": ("Кофе-брейк: коллеги зовут выпить кофе.",
+                     (("Выпить кофе", "_take_coffee"), ("Отказаться", "_skip_coffee"))),
+    "focus_task": ("Задача от начальника: успеешь к сроку?",
+                   (("Сконцентрироваться", "_focus_on"), ("Прокрастинировать", "_procrastinate"))),
+    "feature_task": ("Новая фича: спроектировать и реализовать модуль.",
+                     (("Спроектировать", "_design"), ("Имплементировать", "_implement"))),
+    "incident_task": ("Инцидент в проде: сервис 500. Что делать?",
+                      (("Откат", "_rollback"), ("Хотфикс", "_hotfix"))),
+    "client_demo": ("Встреча с клиентом: провести демо.",
+                    (("Подготовиться", "_prepare"), ("Провести демо", "_present"))),
+}
+# Какие события реально выпадают на смене (соблазны пока выключены)
+WORK_EVENT_DRAW = ("focus_task", "feature_task", "incident_task", "client_demo")
+
+
+@dataclass(slots=True)
+class WorkShift:
+    """Рабочая смена: 20 событий, на каждое герой выбирает одну из реакций.
+
+    Вся логика и все броски — здесь, без GUI: интерфейс только показывает
+    message/choices и вызывает choose(hero, index). Фокус и стресс живут
+    одну смену и в сохранение героя не попадают.
+    """
+    active: bool = False
+    events_left: int = 0
+    focus: int = 50
+    stress: int = 0
+    event: str = ""
+
+    @property
+    def message(self) -> str:
+        return WORK_EVENTS[self.event][0] if self.active else ""
+
+    @property
+    def choices(self) -> Tuple[str, ...]:
+        if not self.active:
+            return ()
+        return tuple(label for label, _ in WORK_EVENTS[self.event][1])
+
+    def start(self, hero: Person) -> bool:
+        """Начать смену; False, если рабочий день уже закончился."""
+        # Разрешаем прийти пораньше: ждать до 10:00
+        if hero.time_minutes // 60 < 10:
+            wait = 10 * 60 - hero.time_minutes
+            if wait > 0:
+                hero.advance_time(wait)
+                hero.log_event("Пришел пораньше и подождал до 10:00.")
+        if hero.time_minutes // 60 >= 17:
+            hero.log_event("Смена уже закончилась. Приходи завтра.")
+            return False
+        self.active = True
+        self.events_left = 20
+        self.focus = 50
+        self.stress = 0
+        hero.current_location = 'work'
+        hero.log_event("Начал рабочую смену.")
+        self._next_event(hero)
+        return True
+
+    def choose(self, hero: Person, index: int) -> None:
+        """Применить выбор index к текущему событию и перейти к следующему."""
+        if not self.active:
+            return
+        getattr(self, WORK_EVENTS[self.event][1][index][1])(hero)
+        self.events_left -= 1
+        self._next_event(hero)
+
+    def _next_event(self, hero: Person) -> None:
+        if self.events_left <= 0:
+            self._finish(hero)
+            return
+        self.event = hero.rng.choice(WORK_EVENT_DRAW)
+
+    def _finish(self, hero: Person) -> None:
+        # Подвести итоги: баффы/дебаффы
+        if self.focus >= 65:
+            hero.health_score = min(200, hero.health_score + 5)
+            hero.log_event("Работа прошла продуктивно: здоровье +5.")
+            hero.work_productive_today = True
+        elif self.focus <= 35:
+            hero.alertness = max(0, hero.alertness - 6)
+            hero.log_event("Провал по фокусу на работе: бодрость -6.")
+        if self.stress >= 10:
+            hero.alertness = max(0, hero.alertness - 8)
+            hero.log_event("Стресс на работе: бодрость -8.")
+        elif self.stress <= 2:
+            hero.health_score = min(200, hero.health_score + 2)
+            hero.log_event("Спокойная смена: здоровье +2.")
+        self.active = False
+        hero.worked_today = True
+        hero.change_money(0)  # отрисуем баланс
+
+    # --- Реакции на события ---
+    def _refuse_smoke(self, hero: Person) -> None:
+        self.stress += 6
+        if hero.alertness >= 70:
+            self.focus = min(100, self.focus + 3)
+        hero.log_event("На работе отказался от перекура. Стресс +6, фокус немного вырос.")
+
+    def _accept_smoke(self, hero: Person) -> None:
+        hero.smoke()
+        self.stress = max(0, self.stress - 3)
+        self.focus = max(0, self.focus - 4)
+
+    def _take_coffee(self, hero: Person) -> None:
+        hero.consume_coffee()
+        self.focus = min(100, self.focus + 2)
+        self.stress = max(0, self.stress - 1)
+
+    def _skip_coffee(self, hero: Person) -> None:
+        self.stress += 3
+        delta = 1 if hero.alertness >= 60 else -2
+        self.focus = max(0, min(100, self.focus + delta))
+        hero.log_event("Отказался от кофе на работе.")
+
+    def _focus_on(self, hero: Person) -> None:
+        base = 0.45
+        base += 0.05 if hero.alertness >= 60 else 0.0
+        base += 0.03 * max(0, hero.intelligence - 1)
+        if hero.rng.random() < min(0.9, base):
+            self.focus = min(100, self.focus + 8)
+            hero.log_event("Сконцентрировался на задаче: фокус +8.")
+            # прогресс квеста по работе (отчёты)
+            hero.quest_event('work_report')
+        else:
+            self.focus = min(100, self.focus + 3)
+            hero.log_event("Старался, но отвлекался: фокус +3.")
+        self.stress += 1
+
+    def _procrastinate(self, hero: Person) -> None:
+        self.focus = max(0, self.focus - 5)
+        self.stress = max(0, self.stress - 2)
+        hero.log_event("Прокрастинировал на работе: фокус -5, стресс -2.")
+
+    def _design(self, hero: Person) -> None:
+        if hero.rng.random() < (0.55 + 0.03 * max(0, hero.intelligence - 1)):
+            self.focus = min(100, self.focus + 7)
+            hero.log_event("Спроектировал архитектуру модуля. Фокус +7.")
+            hero.quest_event('work_feature')
+        else:
+            self.focus = min(100, self.focus + 3)
+            hero.log_event("Идея сырая. Фокус +3.")
+        self.stress += 2
+
+    def _implement(self, hero: Person) -> None:
+        if hero.rng.random() < (0.5 + 0.04 * max(0, hero.intelligence - 1) + 0.03 * max(0, hero.agility - 1)):
+            self.focus = min(100, self.focus + 9)
+            hero.log_event("Имплементировал модуль без багов. Фокус +9.")
+            hero.quest_event('work_feature')
+        else:
+            self.stress += 3
+            hero.log_event("Срыв сроков, нужно рефакторить.")
+
+    def _rollback(self, hero: Person) -> None:
+        self.stress = max(0, self.stress - 1)
+        hero.log_event("Откатились — стабильно, но откат по задачам.")
+
+    def _hotfix(self, hero: Person) -> None:
+        if hero.rng.random() < (0.52 + 0.03 * max(0, hero.intelligence - 1)):
+            hero.log_event("Хотфикс прошёл успешно.")
+            hero.quest_event('work_incident')
+            self.focus = min(100, self.focus + 5)
+        else:
+            self.stress += 4
+            hero.log_event("Хотфикс не удался. Стресс +4.")
+
+    def _prepare(self, hero: Person) -> None:
+        self.focus = min(100, self.focus + 4)
+        hero.log_event("Подготовился к демо. Фокус +4.")
+
+    def _present(self, hero: Person) -> None:
+        if hero.rng.random() < (0.5 + 0.05 * max(0, hero.charisma - 1)):
+            hero.log_event("Демо прошло успешно, клиент доволен.")
+            hero.quest_event('work_presentation')
+            self.stress = max(0, self.stress - 1)
+        else:
+            hero.log_event("Демо средней руки. Нужно улучшить подачу.")
+            self.stress += 2
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    # depooper_replay сам импортирует этот модуль, поэтому не на верхнем уровне
+    from depooper_replay import ActionRecorder, Session
+
+    parser = argparse.ArgumentParser(description="Сова → Жаворонок (консоль)")
+    parser.add_argument("--seed", type=int, default=None, help="сид случайности героя")
+    parser.add_argument("--record", metavar="PATH", help="записать действия сессии (см. depooper_replay)")
+    args = parser.parse_args(argv)
+
     hero = Person(name="Артем")
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.SystemRandom().getrandbits(32)
+    if seed is not None:
+        hero.rng = RandomStream(seed)
+    session = Session(hero, ActionRecorder(args.record, seed, hero.name) if args.record else None)
+    act = session.act
+    try:
+        _console_loop(hero, act)
+    finally:
+        session.close()
+
+
+def _console_loop(hero: Person, act) -> None:
     day_counter = 1
     tutorial_active = True
     tutorial_step = 0
@@ -855,12 +1875,12 @@ def main():
         hero.status()
 
         actions = {
-            "1": ("Выпить кофе", hero.consume_coffee),
-            "2": ("Курить сигарету", hero.smoke),
-            "3": ("Съесть еду (переедать?)", hero.eat),
-            "4": ("Пробовать избавиться от привычки кофе", lambda: hero.attempt_to_kick_habit("coffee")),
-            "5": ("Пробовать избавиться от курения", lambda: hero.attempt_to_kick_habit("smoking")),
-            "6": ("Пробовать избавить от переедания", lambda: hero.attempt_to_kick_habit("overeating")),
+            "1": ("Выпить кофе", lambda: act("consume_coffee")),
+            "2": ("Курить сигарету", lambda: act("smoke")),
+            "3": ("Съесть еду (переедать?)", lambda: act("eat")),
+            "4": ("Пробовать избавиться от привычки кофе", lambda: act("attempt_to_kick_habit", "coffee")),
+            "5": ("Пробовать избавиться от курения", lambda: act("attempt_to_kick_habit", "smoking")),
+            "6": ("Пробовать избавить от переедания", lambda: act("attempt_to_kick_habit", "overeating")),
             "0": ("Завершить день (переход в сон)", None)
         }
 
@@ -884,9 +1904,9 @@ def main():
                 continue
 
         if choice == '0':
-            hero.end_of_day_update()
+            act("end_of_day_update")
             day_counter += 1
-            hero.reset_daily_counters()
+            act("reset_daily_counters")
             continue
 
         action_func = actions.get(choice, (None, None))[1]
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Набор бенчмарков с сохранённым базовым замером и сравнением.
+
+Что меряем (всё — в микросекундах на операцию):
+    person.*       отдельные методы Person на свежем герое
+    sim.day        один день рабочей политики (policy + конец дня)
+    sim.year       365 дней одного героя
+    sim.year_ff    те же 365 дней через run_hero_planned (Person.fast_forward)
+    gui.<вид>      медианный кадр depooper_gui для каждой вкладки и оверлея,
+                   отрисованный в памяти (SDL_VIDEODRIVER=dummy)
+
+Рабочая политика доводит вес до предела «смерти» примерно к 66-му дню;
+в sim.* «погибшего» героя сменяет новый, чтобы весь год мерился живой.
+
+Каждый замер повторяется несколько раз, берётся лучший — так меньше шума
+от соседних процессов. Кадры GUI меряет сам depooper_gui (--bench-frames)
+в отдельном процессе и во временной папке, чтобы не задеть сохранения.
+
+Результаты сравниваются с базой как есть. Эталонный цикл (медиана многих
+прогонов за сессию) только проверяет, что машина та же: если она заметно
+быстрее или медленнее, чем при записи базы, сравнение выводит
+предупреждение, но цифры не пересчитывает.
+
+Запуск:
+    python depooper_bench.py                    # просто замерить
+    python depooper_bench.py --save             # записать базовый замер
+    python depooper_bench.py --compare          # сравнить с базовым, код 1 при регрессии
+    python depooper_bench.py --only person --quick
+
+Базовый замер зависит от машины: после смены железа его надо перезаписать.
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import importlib.util
+import platform
+import tempfile
+import subprocess
+from typing import Callable, Dict, List, Optional, Tuple
+
+from depooper import Person, RandomStream, NULL_SINK
+from depooper_sim import worker_policy, is_game_over, run_hero_planned, PLANS
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "depooper_bench_baseline.json")
+DEFAULT_THRESHOLD = 0.15  # на сколько (доля) можно стать медленнее без тревоги
+GUI_FRAMES = 60
+CALIBRATION_OPS = 100000
+CALIBRATION_RUNS = 15
+CALIBRATION_TOLERANCE = 0.25  # насколько эталон может отличаться от базового, не вызывая предупреждения
+
+
+def make_hero(seed: int = 0) -> Person:
+    return Person(name="Бенч", log_sink=NULL_SINK, rng=RandomStream(seed))
+
+
+def live_day(hero: Person, day: int) -> Person:
+    """День как в depooper_sim.run_hero; возвращает героя на следующий день.
+
+    После «смерти» это новый герой: замер не обрывается и не тратит дни на «мёртвого».
+    """
+    worker_policy(hero, day)
+    hero.end_of_day_update()
+    hero.reset_daily_counters()
+    hero.event_log.clear()
+    return make_hero(day) if is_game_over(hero) else hero
+
+
+def live_days_planned(hero: Person, days: int) -> None:
+    """days дней рабочего плана с перемоткой; «погибшего» героя так же сменяет новый."""
+    plan = PLANS["worker"]
+    while True:
+        days -= run_hero_planned(hero, days, plan).days_survived + 1  # день «смерти» тоже прожит
+        if days <= 0:
+            return
+        hero = make_hero(days)
+
+
+# --- Бенчмарки: bench(n) -> секунды на n операций ---
+def bench_calibration(n: int) -> float:
+    """Эталонный цикл на чистом Python: мерило скорости самой машины.
+
+    Код игры в нём не участвует; по нему видно, что база записана на
+    сопоставимой машине (см. compare).
+    """
+    table = {i: i * 3 for i in range(64)}
+    t0 = time.perf_counter()
+    acc = 0
+    for i in range(n):
+        acc = (acc + table[i & 63] * i) % 1000003
+        acc = max(0, min(acc, 900000))
+    return time.perf_counter() - t0
+
+
+def bench_end_of_day(n: int) -> float:
+    hero = make_hero()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        hero.end_of_day_update()
+    return time.perf_counter() - t0
+
+
+def bench_eat_food(n: int) -> float:
+    hero = make_hero()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        hero.eat_food("balanced")
+    return time.perf_counter() - t0
+
+
+def bench_gain_xp_large(n: int) -> float:
+    # Каждый раз свежий герой: крупная награда — это сотни повышений уровня подряд
+    heroes = [make_hero(i) for i in range(n)]
+    t0 = time.perf_counter()
+    for hero in heroes:
+        hero.gain_xp(1_000_000)
+    return time.perf_counter() - t0
+
+
+def bench_change_money(n: int) -> float:
+    hero = make_hero()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        hero.change_money(-10)
+    return time.perf_counter() - t0
+
+
+def bench_sim_day(n: int) -> float:
+    hero = make_hero()
+    t0 = time.perf_counter()
+    for day in range(n):
+        hero = live_day(hero, day)
+    return time.perf_counter() - t0
+
+
+def bench_sim_year(n: int) -> float:
+    heroes = [make_hero(i) for i in range(n)]
+    t0 = time.perf_counter()
+    for hero in heroes:
+        for day in range(365):
+            hero = live_day(hero, day)
+    return time.perf_counter() - t0
+
+
+def bench_sim_year_ff(n: int) -> float:
+    heroes = [make_hero(i) for i in range(n)]
+    t0 = time.perf_counter()
+    for hero in heroes:
+        live_days_planned(hero, 365)
+    return time.perf_counter() - t0
+
+
+# имя → (функция, операций за прогон, в режиме --quick)
+BENCHMARKS: Dict[str, Tuple[Callable[[int], float], int, int]] = {
+    "person.end_of_day_update": (bench_end_of_day, 5000, 500),
+    "person.eat_food": (bench_eat_food, 20000, 2000),
+    "person.gain_xp_large": (bench_gain_xp_large, 300, 30),
+    "person.change_money": (bench_change_money, 50000, 5000),
+    "sim.day": (bench_sim_day, 3000, 300),
+    "sim.year": (bench_sim_year, 5, 1),
+    "sim.year_ff": (bench_sim_year_ff, 50, 5),
+}
+
+
+Results = Dict[str, float]  # имя → мкс на операцию
+
+
+def run_python_benchmarks(only: Optional[str], quick: bool, repeat: int) -> Tuple[Results, float]:
+    """Лучший замер каждого бенчмарка и медианный эталон за сессию.
+
+    Повторы идут кругами по всем бенчмаркам, а не подряд: короткий всплеск
+    нагрузки на машине портит один повтор каждого, а не все повторы одного.
+    В каждом круге снимаются и прогоны эталона.
+    """
+    chosen = {name: (fn, n_quick if quick else n) for name, (fn, n, n_quick) in BENCHMARKS.items()
+              if not only or only in name}
+    best: Dict[str, float] = {}
+    samples: List[float] = []
+    per_round = max(1, CALIBRATION_RUNS // repeat)
+    # Как в timeit: сборщик мусора не должен вклиниваться в замер
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.extend(bench_calibration(CALIBRATION_OPS) for _ in range(per_round))
+            for name, (fn, ops) in chosen.items():
+                elapsed = fn(ops)
+                if name not in best or elapsed < best[name]:
+                    best[name] = elapsed
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    samples.sort()
+    calibration = 1e6 * samples[len(samples) // 2] / CALIBRATION_OPS
+    return {name: 1e6 * best[name] / ops for name, (_, ops) in chosen.items()}, calibration
+
+
+def run_gui_benchmarks(frames: int) -> Results:
+    """Медианный кадр по видам GUI; пусто, если pygame не установлен."""
+    if importlib.util.find_spec("pygame") is None:
+        print("pygame не установлен — кадры GUI пропущены", file=sys.stderr)
+        return {}
+    gui = os.path.join(os.path.dirname(os.path.abspath(__file__)), "depooper_gui.py")
+    workdir = tempfile.mkdtemp(prefix="depooper_bench_")
+    try:
+        out = os.path.join(workdir, "frames.json")
+        env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", DEPOOPER_PROFILE="")
+        subprocess.run([sys.executable, gui, "--bench-frames", str(frames), "--bench-out", out],
+                       cwd=workdir, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(out, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {f"gui.{view}": 1000.0 * stats["frame_ms_p50"]
+            for view, stats in report.items() if stats.get("frames")}
+
+
+def load_baseline(path: str) -> Tuple[Results, float]:
+    """База и эталон, с которым она записана (0.0, если неизвестен)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return dict(data["results"]), float(data.get("calibration", 0.0))
+
+
+def save_baseline(path: str, results: Results, calibration: float) -> None:
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+        "calibration": calibration,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Results, baseline: Results, threshold: float,
+            calibration: float = 0.0, base_calibration: float = 0.0) -> List[str]:
+    """Печатает таблицу сравнения; возвращает имена регрессий.
+
+    Цифры сравниваются как есть. Эталоны нужны только для предупреждения,
+    что база записана на машине другой скорости.
+    """
+    if calibration and base_calibration:
+        ratio = calibration / base_calibration
+        print(f"эталон: {calibration:.3f} мкс, в базе {base_calibration:.3f} мкс ({ratio:.2f}x)")
+        if abs(ratio - 1.0) > CALIBRATION_TOLERANCE:
+            print("Внимание: машина заметно отличается от той, где записана база — "
+                  "сравнение ненадёжно, перезапишите базу (--save)")
+    regressions: List[str] = []
+    print(f"{'бенчмарк':<28}{'база мкс':>12}{'сейчас мкс':>12}{'Δ':>9}")
+    for name, value in results.items():
+        base = baseline.get(name, 0.0)
+        if not base:
+            print(f"{name:<28}{'—':>12}{value:>12.2f}{'new':>9}")
+            continue
+        delta = value / base - 1.0
+        mark = ""
+        if delta > threshold:
+            regressions.append(name)
+            mark = "  <-- регрессия"
+        print(f"{name:<28}{base:>12.2f}{value:>12.2f}{delta:>+8.1%}{mark}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки симулятора и кадра GUI")
+    parser.add_argument("--only", help="только бенчмарки, в имени которых есть эта подстрока")
+    parser.add_argument("--quick", action="store_true", help="меньше операций и повторов (для быстрой проверки)")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов на бенчмарк, берётся лучший")
+    parser.add_argument("--no-gui", action="store_true", help="не мерить кадры GUI")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл базового замера")
+    parser.add_argument("--save", action="store_true", help="записать результаты как базовый замер")
+    parser.add_argument("--compare", action="store_true", help="сравнить с базовым замером")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление, доля (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    repeat = 2 if args.quick else max(1, args.repeat)
+    results, calibration = run_python_benchmarks(args.only, args.quick, repeat)
+    only = args.only or ""
+    if not args.no_gui and (only.startswith("gui") or "gui.".startswith(only)):
+        gui = run_gui_benchmarks(GUI_FRAMES // 4 if args.quick else GUI_FRAMES)
+        results.update((name, value) for name, value in gui.items() if only in name)
+
+    if args.compare:
+        baseline, base_calibration = load_baseline(args.baseline)
+        regressions = compare(results, baseline, args.threshold, calibration, base_calibration)
+        if regressions:
+            print(f"Регрессии: {', '.join(regressions)}")
+    else:
+        regressions = []
+        for name, value in results.items():
+            print(f"{name:>28}: {value:.2f} мкс")
+    if args.save:
+        save_baseline(args.baseline, results, calibration)
+        print(f"Базовый замер записан в {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
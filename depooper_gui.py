@@ -6,18 +6,31 @@ GUI-версия симулятора с простой 2.5D (изометрич
 
 Зависимости: pygame
 Установка: pip install pygame
-Запуск: python depooper_gui.py
+Запуск: python depooper_gui.py [--low-power]
+F3 в игре — отладочный HUD: время кадра по участкам и число font.render.
+DEPOOPER_TRACE=trace.json — трасса кадров и действий (см. depooper_trace).
+DEPOOPER_LOG_SPILL=events.log — дописывать туда записи, вытесненные из журнала.
 """
 
+import os
 import sys
 import math
 import json
+import time
+import random
+import argparse
 import pygame
-from typing import Callable, List, Tuple, Dict
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List, Optional, Tuple, Dict
 
 try:
     # Используем игровую логику из консольной версии
-    from depooper import Person
+    from depooper import (Person, NULL_SINK, RandomStream, QUEST_CATALOG, QUEST_HIDDEN, QUEST_STATUS_LABELS,
+                          ACTIONS, COFFEE_ACTIONS, FOOD_ACTIONS)
+    import depooper_save
+    import depooper_replay
+    import depooper_profile
+    import depooper_trace
 except Exception:  # pragma: no cover
     print("Не удалось импортировать Person из depooper.py. Убедитесь, что файл находится рядом.")
     raise
@@ -27,6 +40,22 @@ except Exception:  # pragma: no cover
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 800
 FPS = 60
+# Экономный режим: на дисплей уходят только изменившиеся области, а в простое
+# цикл спит в pygame.event.wait (включается --low-power или DEPOOPER_LOW_POWER=1)
+LOW_POWER = os.environ.get("DEPOOPER_LOW_POWER", "") not in ("", "0")
+IDLE_WAIT_MS = 1000
+# Виды экрана для замера кадра (--bench-frames): вкладки и оверлеи
+BENCH_VIEWS = ("start_menu", "game", "log", "quests", "work", "encounter", "travel", "dialog")
+BENCH_WARMUP = 5  # первые кадры вида не считаем: там прогреваются кэши текста
+BENCH_HISTORY_DAYS = 30  # сколько дней прожить до замера, чтобы журнал и квесты были не пустыми
+SAVE_PATH = "savegame.sav"
+LEGACY_SAVE_PATH = "savegame.json"
+AUTOSAVE_SLOTS = 3
+# Автосохранения в конце дня идут дельтами в журнал, полный снимок — раз в неделю
+JOURNAL_DIR = "savegame.journal"
+JOURNAL_SNAPSHOT_DAYS = 7
+# Фоновая запись сохранения закончилась — будим цикл событий (важно для LOW_POWER)
+SAVE_DONE_EVENT = pygame.USEREVENT + 1
 
 # --- Цвета ---
 COLOR_BG = (22, 24, 28)
@@ -40,10 +69,252 @@ COLOR_YELLOW = (240, 200, 80)
 COLOR_OVERLAY_BG = (0, 0, 0, 180)
 COLOR_PANEL_DARK = (28, 30, 36)
 
+# --- Кэш надписей ---
+class TextCache:
+    """LRU-кэш отрендеренных надписей: (font, text, color) → Surface.
+
+    Подписи кнопок и вкладок одни и те же из кадра в кадр, поэтому рендерим
+    их один раз. Старые строки (балансы, время) вытесняются по maxsize.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self._sizes: "OrderedDict[tuple, Tuple[int, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        key = (font, text, color)
+        surfaces = self._surfaces
+        surf = surfaces.get(key)
+        if surf is not None:
+            surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, color)
+        surfaces[key] = surf
+        if len(surfaces) > self.maxsize:
+            surfaces.popitem(last=False)
+        return surf
+
+    def size(self, font: pygame.font.Font, text: str) -> Tuple[int, int]:
+        """Размер надписи без рендера (font.size) с тем же кэшем."""
+        key = (font, text)
+        sizes = self._sizes
+        size = sizes.get(key)
+        if size is not None:
+            sizes.move_to_end(key)
+            return size
+        size = font.size(text)
+        sizes[key] = size
+        if len(sizes) > self.maxsize:
+            sizes.popitem(last=False)
+        return size
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+        self._sizes.clear()
+
+
+text_cache = TextCache()
+
+
+def render_text(font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+    return text_cache.render(font, text, color)
+
+
+def text_size(font: pygame.font.Font, text: str) -> Tuple[int, int]:
+    return text_cache.size(font, text)
+
+
+def blit_text(surface: pygame.Surface, font: pygame.font.Font, text: str, color: Tuple[int, int, int], pos: Tuple[int, int]):
+    surface.blit(text_cache.render(font, text, color), pos)
+
+
+def blit_text_centered(surface: pygame.Surface, font: pygame.font.Font, text: str, color: Tuple[int, int, int], center: Tuple[int, int]):
+    surf = text_cache.render(font, text, color)
+    w, h = surf.get_size()
+    surface.blit(surf, (center[0] - w // 2, center[1] - h // 2))
+
+
+# --- Грязные области экрана ---
+class DirtyRegions:
+    """Какие области экрана изменились с прошлого кадра.
+
+    Для каждой области хранится «подпись» — кортеж данных, от которых зависит
+    её картинка. Область уходит в display.update, только если подпись
+    изменилась. Смена слоя (меню, оверлей, другая вкладка) сбрасывает все
+    подписи, и следующий кадр отправляется целиком.
+    """
+
+    def __init__(self):
+        self._signatures: Dict[str, tuple] = {}
+        self._layer = None
+        self.rects: List[pygame.Rect] = []
+
+    def set_layer(self, layer) -> None:
+        if layer != self._layer:
+            self._layer = layer
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        self._signatures.clear()
+
+    def mark(self, name: str, rect: pygame.Rect, signature: tuple) -> None:
+        if self._signatures.get(name) != signature:
+            self._signatures[name] = signature
+            self.rects.append(pygame.Rect(rect))
+
+    def take(self) -> List[pygame.Rect]:
+        rects, self.rects = self.rects, []
+        return rects
+
+
+# --- Отладочный HUD (F3) ---
+HUD_RECT = pygame.Rect(WINDOW_WIDTH - 360, 64, 340, 300)
+HUD_HISTORY = 240  # кадров в графике
+HUD_REFRESH_S = 0.25  # как часто перерисовывать панель
+HUD_GRAPH_H = 70
+HUD_GRAPH_MAX_MS = 50.0  # верх шкалы графика
+HUD_SECTIONS = 9  # сколько самых дорогих участков показывать
+
+
+def no_lap(name: str) -> None:
+    """Отметка участка кадра, когда HUD выключен: ничего не меряем."""
+
+
+class FrameTimer:
+    """Разбивка кадра на участки по отметкам.
+
+    lap(name) относит к участку name время с предыдущей отметки, так что
+    участки покрывают кадр целиком, без дыр и вложенности. Число font.render
+    за кадр — прирост промахов text_cache: весь текст кадра идёт через него.
+    С tracer каждый участок и кадр целиком уходят ещё и в трассу (depooper_trace).
+    """
+
+    def __init__(self, history: int = HUD_HISTORY, tracer: Optional[depooper_trace.Tracer] = None):
+        self.tracer = tracer
+        self.frame_ms: Deque[float] = deque(maxlen=history)
+        self.renders: Deque[int] = deque(maxlen=history)
+        self.totals: Dict[str, float] = {}  # секунды по участкам с последнего take_sections
+        self.frames = 0
+        self._start = 0.0
+        self._mark = 0.0
+        self._misses = 0
+
+    def begin(self) -> None:
+        self._start = self._mark = time.perf_counter()
+        self._misses = text_cache.misses
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        totals = self.totals
+        totals[name] = totals.get(name, 0.0) + (now - self._mark)
+        if self.tracer is not None:
+            self.tracer.span(name, "frame", self._mark, now)
+        self._mark = now
+
+    def end(self) -> None:
+        """Закрыть кадр: остаток (ожидание clock.tick) идёт в участок wait."""
+        self.lap("wait")
+        self.frame_ms.append(1000.0 * (self._mark - self._start))
+        self.renders.append(text_cache.misses - self._misses)
+        self.frames += 1
+        if self.tracer is not None:
+            self.tracer.span("frame", "frame", self._start, self._mark)
+
+    def take_sections(self) -> List[Tuple[str, float]]:
+        """Среднее мс за кадр по участкам с прошлого вызова, дорогие первыми."""
+        frames = max(1, self.frames)
+        sections = sorted(((name, 1000.0 * total / frames) for name, total in self.totals.items()),
+                          key=lambda kv: kv[1], reverse=True)
+        self.totals = {}
+        self.frames = 0
+        return sections
+
+
+class DebugHud:
+    """Панель F3: график времени кадра, FPS, участки кадра и font.render за кадр.
+
+    Панель рисуется в свой Surface не чаще раза в HUD_REFRESH_S, в остальных
+    кадрах это один blit. Свой текст она рендерит мимо text_cache, поэтому
+    не попадает ни в счётчик font.render, ни в LRU надписей игры.
+    """
+
+    def __init__(self, tracer: Optional[depooper_trace.Tracer] = None):
+        self.visible = False
+        self.tracer = tracer
+        self.timer = FrameTimer(tracer=tracer)
+        self.version = 0  # растёт при каждой перерисовке панели (подпись для DirtyRegions)
+        self._surface: Optional[pygame.Surface] = None
+        self._painted_at = 0.0
+        self._font: Optional[pygame.font.Font] = None
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+        self.timer = FrameTimer(tracer=self.tracer)
+        self._surface = None
+
+    def draw(self, surface: pygame.Surface) -> None:
+        now = time.perf_counter()
+        if self._surface is None or now - self._painted_at >= HUD_REFRESH_S:
+            self._surface = self._paint()
+            self._painted_at = now
+            self.version += 1
+        surface.blit(self._surface, HUD_RECT.topleft)
+
+    def _paint(self) -> pygame.Surface:
+        if self._font is None:
+            self._font = pygame.font.SysFont("Consolas,DejaVu Sans Mono", 14)
+        font = self._font
+        timer = self.timer
+        panel = pygame.Surface(HUD_RECT.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 190))
+        w = HUD_RECT.w
+
+        frames = list(timer.frame_ms)
+        recent = frames[-60:]
+        avg = sum(recent) / len(recent) if recent else 0.0
+        worst = max(recent) if recent else 0.0
+        renders = list(timer.renders)[-60:]
+        lines = [
+            f"FPS {1000.0 / avg if avg else 0.0:5.1f}  кадр {avg:5.2f} мс  макс {worst:5.2f}",
+            f"font.render за кадр: {renders[-1] if renders else 0}"
+            f" (ср. {sum(renders) / len(renders) if renders else 0.0:.1f})",
+        ]
+
+        # График: каждый кадр — точка, линии 60 и 30 FPS для ориентира
+        graph = pygame.Rect(8, 8, w - 16, HUD_GRAPH_H)
+        pygame.draw.rect(panel, (40, 44, 52, 220), graph)
+        for ms, color in ((1000.0 / 60, (90, 200, 120)), (1000.0 / 30, (240, 200, 80))):
+            y = graph.bottom - int(graph.h * ms / HUD_GRAPH_MAX_MS)
+            pygame.draw.line(panel, color, (graph.x, y), (graph.right - 1, y))
+        if len(frames) > 1:
+            step = graph.w / (HUD_HISTORY - 1)
+            x0 = graph.right - 1 - step * (len(frames) - 1)
+            points = [(int(x0 + i * step), graph.bottom - 1 - int((graph.h - 1) * min(ms, HUD_GRAPH_MAX_MS) / HUD_GRAPH_MAX_MS))
+                      for i, ms in enumerate(frames)]
+            pygame.draw.lines(panel, COLOR_ACCENT, False, points)
+
+        y = graph.bottom + 6
+        for line in lines:
+            panel.blit(font.render(line, True, COLOR_TEXT), (8, y))
+            y += 18
+        y += 4
+        for name, ms in timer.take_sections()[:HUD_SECTIONS]:
+            panel.blit(font.render(f"{name:<22}{ms:8.3f} мс", True, (200, 200, 200)), (8, y))
+            y += 16
+        return panel
+
+
 # --- Изометрическая сетка ---
 GRID_W, GRID_H = 6, 6
 TILE_W, TILE_H = 96, 48  # ширина/высота ромба
 GRID_ORIGIN = (WINDOW_WIDTH // 2, 180)  # центр сцены
+# Клетки, стоя на которых герой оказывается в локации
+TILE_LOCATIONS = {tile: loc for loc, tile in ACTIONS.tiles.items()}
 
 
 def grid_to_iso(x: int, y: int) -> Tuple[int, int]:
@@ -64,7 +335,20 @@ def draw_tile(surface: pygame.Surface, gx: int, gy: int, color: Tuple[int, int,
     pygame.draw.polygon(surface, (0, 0, 0), points, 1)
 
 
-def draw_room(surface: pygame.Surface):
+# Шрифт подписей локаций: создаём один раз, а не в каждом кадре
+_label_font = None
+
+
+def get_label_font() -> pygame.font.Font:
+    global _label_font
+    if _label_font is None:
+        _label_font = pygame.font.SysFont("Segoe UI", 16)
+    return _label_font
+
+
+def paint_room(surface: pygame.Surface):
+    """Рисует статичную комнату полностью (пол, мебель, локации)."""
+    label_font = get_label_font()
     # Пол
     for y in range(GRID_H):
         for x in range(GRID_W):
@@ -89,16 +373,55 @@ def draw_room(surface: pygame.Surface):
     # Отметим их плитками/цветами
     # Дом (0..1,4..5)
     draw_tile(surface, 0, 4, (120, 120, 160))
-    surface.blit(pygame.font.SysFont("Segoe UI", 16).render("Дом", True, (0,0,0)), (grid_to_iso(0, 4)[0]-20, grid_to_iso(0,4)[1]-28))
+    surface.blit(render_text(label_font, "Дом", (0,0,0)), (grid_to_iso(0, 4)[0]-20, grid_to_iso(0,4)[1]-28))
     # Работа (5,0)
     draw_tile(surface, 5, 0, (160, 120, 120))
-    surface.blit(pygame.font.SysFont("Segoe UI", 16).render("Работа", True, (0,0,0)), (grid_to_iso(5, 0)[0]-28, grid_to_iso(5,0)[1]-28))
+    surface.blit(render_text(label_font, "Работа", (0,0,0)), (grid_to_iso(5, 0)[0]-28, grid_to_iso(5,0)[1]-28))
     # Качалка (5,5)
     draw_tile(surface, 5, 5, (120, 160, 120))
-    surface.blit(pygame.font.SysFont("Segoe UI", 16).render("Качалка", True, (0,0,0)), (grid_to_iso(5, 5)[0]-32, grid_to_iso(5,5)[1]-28))
+    surface.blit(render_text(label_font, "Качалка", (0,0,0)), (grid_to_iso(5, 5)[0]-32, grid_to_iso(5,5)[1]-28))
     # Площадка (0,5)
     draw_tile(surface, 0, 5, (120, 160, 160))
-    surface.blit(pygame.font.SysFont("Segoe UI", 16).render("Площадка", True, (0,0,0)), (grid_to_iso(0, 5)[0]-40, grid_to_iso(0,5)[1]-28))
+    surface.blit(render_text(label_font, "Площадка", (0,0,0)), (grid_to_iso(0, 5)[0]-40, grid_to_iso(0,5)[1]-28))
+
+
+# Запечённый слой комнаты: {'size': размер экрана, 'surface': слой, 'pos': куда блитить}
+_room_layer: Dict[str, object] = {'size': None, 'surface': None, 'pos': (0, 0)}
+
+
+def invalidate_room_layer():
+    """Сбросить запечённую комнату (например, после смены режима экрана)."""
+    _room_layer['size'] = None
+    _room_layer['surface'] = None
+
+
+def bake_room_layer(size: Tuple[int, int]) -> pygame.Surface:
+    """Один раз рисуем комнату и обрезаем слой по содержимому.
+
+    Слой непрозрачный (на фоне COLOR_BG): такой blit заметно дешевле
+    альфа-смешивания, а под комнатой всё равно только фон.
+    """
+    full = pygame.Surface(size, pygame.SRCALPHA)
+    paint_room(full)
+    bounds = full.get_bounding_rect()
+    layer = pygame.Surface(bounds.size)
+    layer.fill(COLOR_BG)
+    layer.blit(full, (0, 0), bounds)
+    if pygame.display.get_surface() is not None:
+        layer = layer.convert()
+    _room_layer['size'] = size
+    _room_layer['surface'] = layer
+    _room_layer['pos'] = bounds.topleft
+    return layer
+
+
+def draw_room(surface: pygame.Surface):
+    # Статичная сцена запекается при старте и при смене размера — в кадре один blit
+    size = surface.get_size()
+    layer = _room_layer['surface']
+    if layer is None or _room_layer['size'] != size:
+        layer = bake_room_layer(size)
+    surface.blit(layer, _room_layer['pos'])
 
 
 class Button:
@@ -114,8 +437,7 @@ class Button:
         if not self.enabled:
             color = (90, 90, 90)
         pygame.draw.rect(surface, color, self.rect, border_radius=8)
-        label_surf = font.render(self.label, True, (0, 0, 0))
-        surface.blit(label_surf, label_surf.get_rect(center=self.rect.center))
+        blit_text_centered(surface, font, self.label, (0, 0, 0), self.rect.center)
 
     def handle_event(self, event: pygame.event.Event):
         if not self.enabled:
@@ -125,12 +447,17 @@ class Button:
                 self.on_click()
 
 
+STATUS_RECT = pygame.Rect(20, WINDOW_HEIGHT - 200, WINDOW_WIDTH - 40, 180)
+# Вкладки и кнопка «Завершить день»
+TOP_BAR_RECT = pygame.Rect(20, 16, 600, 36)
+
+
 def draw_status(surface: pygame.Surface, font: pygame.font.Font, hero: Person, day_counter: int, difficulty_mode: str):
-    panel = pygame.Rect(20, WINDOW_HEIGHT - 200, WINDOW_WIDTH - 40, 180)
+    panel = STATUS_RECT.copy()
     pygame.draw.rect(surface, COLOR_PANEL, panel, border_radius=12)
 
     # Заголовок
-    title = font.render(f"День #{day_counter}  |  Время: {hero.format_time()}  |  Режим: {('Хардкор' if difficulty_mode=='hardcore' else 'Обычный')}", True, COLOR_TEXT)
+    title = render_text(font, f"День #{day_counter}  |  Время: {hero.format_time()}  |  Режим: {('Хардкор' if difficulty_mode=='hardcore' else 'Обычный')}", COLOR_TEXT)
     surface.blit(title, (panel.x + 16, panel.y + 12))
 
     # Параметры
@@ -142,7 +469,7 @@ def draw_status(surface: pygame.Surface, font: pygame.font.Font, hero: Person, d
     # Бодрость
     alert_col = COLOR_YELLOW if 35 <= hero.alertness < 70 else (COLOR_OK if hero.alertness >= 70 else COLOR_WARN)
     draw_bar(panel.x + 16, panel.y + 50, 300, 20, hero.alertness, 100, alert_col)
-    surface.blit(font.render(f"Бодрость: {hero.alertness}/100", True, COLOR_TEXT), (panel.x + 16, panel.y + 76))
+    blit_text(surface, font, f"Бодрость: {hero.alertness}/100", COLOR_TEXT, (panel.x + 16, panel.y + 76))
 
     # Здоровье
     if hero.health_score >= 140:
@@ -152,34 +479,34 @@ def draw_status(surface: pygame.Surface, font: pygame.font.Font, hero: Person, d
     else:
         health_col = COLOR_WARN
     draw_bar(panel.x + 16 + 330, panel.y + 50, 300, 20, hero.health_score, 200, health_col)
-    surface.blit(font.render(f"Здоровье: {hero.health_score}/200", True, COLOR_TEXT), (panel.x + 346, panel.y + 76))
+    blit_text(surface, font, f"Здоровье: {hero.health_score}/200", COLOR_TEXT, (panel.x + 346, panel.y + 76))
 
     # Вес, сон, деньги и калории
-    surface.blit(font.render(f"Вес: {hero.weight_kg:.1f} кг", True, COLOR_TEXT), (panel.x + 16 + 660, panel.y + 50))
-    surface.blit(font.render(f"Сон (нужен): {hero.sleep_need:.1f} ч.", True, COLOR_TEXT), (panel.x + 16 + 660, panel.y + 76))
-    surface.blit(font.render(f"Деньги: {hero.rubles} ₽", True, COLOR_TEXT), (panel.x + 16 + 660, panel.y + 102))
+    blit_text(surface, font, f"Вес: {hero.weight_kg:.1f} кг", COLOR_TEXT, (panel.x + 16 + 660, panel.y + 50))
+    blit_text(surface, font, f"Сон (нужен): {hero.sleep_need:.1f} ч.", COLOR_TEXT, (panel.x + 16 + 660, panel.y + 76))
+    blit_text(surface, font, f"Деньги: {hero.rubles} ₽", COLOR_TEXT, (panel.x + 16 + 660, panel.y + 102))
     # Новые показатели питания
     if hasattr(hero, 'calories_today'):
-        surface.blit(font.render(f"Калории: {hero.calories_today} ккал", True, COLOR_TEXT), (panel.x + 16 + 660, panel.y + 128))
+        blit_text(surface, font, f"Калории: {hero.calories_today} ккал", COLOR_TEXT, (panel.x + 16 + 660, panel.y + 128))
 
     # Привычки
     habits_text = []
     habits_text.append(f"Кофе: {'Да' if hero.has_coffee_habit else 'Нет'}")
     habits_text.append(f"Переедание: {'Да' if hero.has_overeat_habit else 'Нет'}")
     habits_text.append(f"Курение: {'Да' if hero.has_smoking_habit else 'Нет'}")
-    habits_surf = font.render(" | ".join(habits_text), True, COLOR_TEXT)
+    habits_surf = render_text(font, " | ".join(habits_text), COLOR_TEXT)
     surface.blit(habits_surf, (panel.x + 16, panel.y + 110))
 
     # Цель 90 дней
     goal_text = f"Цель 90 дней: серия {hero.goal_streak_days}/{hero.goal_days_target}"
-    surface.blit(font.render(goal_text, True, COLOR_TEXT), (panel.x + 16 + 330, panel.y + 110))
+    blit_text(surface, font, goal_text, COLOR_TEXT, (panel.x + 16 + 330, panel.y + 110))
 
     # Локация
     loc_map = {"home": "Дом", "work": "Работа", "gym": "Качалка", "park": "Площадка"}
-    surface.blit(font.render(f"Локация: {loc_map.get(hero.current_location, hero.current_location)}", True, COLOR_TEXT), (panel.x + 16, panel.y + 140))
+    blit_text(surface, font, f"Локация: {loc_map.get(hero.current_location, hero.current_location)}", COLOR_TEXT, (panel.x + 16, panel.y + 140))
     # RPG-панель
     rpg = f"Ур.{hero.level}  XP {hero.xp}/{hero.level*100}  Сила {hero.strength}  Ловк {hero.agility}  Инт {hero.intelligence}  Хар {hero.charisma}  Мораль {hero.morale}"
-    surface.blit(font.render(rpg, True, COLOR_TEXT), (panel.x + 16 + 330, panel.y + 140))
+    blit_text(surface, font, rpg, COLOR_TEXT, (panel.x + 16 + 330, panel.y + 140))
 
 
 def draw_hero(surface: pygame.Surface, gx: int, gy: int):
@@ -196,36 +523,71 @@ def draw_tutorial(surface: pygame.Surface, font: pygame.font.Font, text: str):
     lines = text.split("\n")
     y = 80
     for line in lines:
-        surf = font.render(line, True, (250, 240, 180))
+        surf = render_text(font, line, (250, 240, 180))
         rect = surf.get_rect(center=(WINDOW_WIDTH // 2, y))
         surface.blit(surf, rect)
         y += 28
 
 
-def draw_mini_log(surface: pygame.Surface, font: pygame.font.Font, hero: Person, max_lines: int = 7):
+def mini_log_rect(max_lines: int = 7) -> pygame.Rect:
     # Панель в правом верхнем углу для последних событий
     pad = 12
     panel_w = 480
     panel_h = 24 + max_lines * 22 + pad
-    panel = pygame.Rect(WINDOW_WIDTH - panel_w - 20, 16, panel_w, panel_h)
+    return pygame.Rect(WINDOW_WIDTH - panel_w - 20, 16, panel_w, panel_h)
+
+
+def draw_mini_log(surface: pygame.Surface, font: pygame.font.Font, hero: Person, max_lines: int = 7):
+    panel = mini_log_rect(max_lines)
     pygame.draw.rect(surface, COLOR_PANEL, panel, border_radius=10)
-    title = font.render("Последние события", True, COLOR_TEXT)
+    title = render_text(font, "Последние события", COLOR_TEXT)
     surface.blit(title, (panel.x + 12, panel.y + 8))
     # Список
     y = panel.y + 34
     for msg in hero.event_log[-max_lines:]:
-        text_surf = font.render(msg, True, (210, 210, 210))
+        text_surf = render_text(font, msg, (210, 210, 210))
         surface.blit(text_surf, (panel.x + 12, y))
         y += 22
 
 
+LOG_LINE_H = 24
+
+
+def clamp_log_scroll(scroll: int, count: int, view_h: int, line_h: int = LOG_LINE_H) -> int:
+    # Высота содержимого с отступами 8 px сверху и снизу
+    content_h = count * line_h + 16
+    return max(0, min(scroll, content_h - view_h))
+
+
+def draw_log_view(surface: pygame.Surface, font: pygame.font.Font, event_log, rect: pygame.Rect,
+                  scroll: int, line_h: int = LOG_LINE_H) -> int:
+    """Виртуальный список журнала: рендерим только строки, попавшие в rect.
+
+    Видимый диапазон индексов считается из прокрутки, так что цена кадра не
+    зависит от длины истории. Возвращает прокрутку, зажатую в границы.
+    """
+    count = len(event_log)
+    scroll = clamp_log_scroll(scroll, count, rect.h, line_h)
+    top = scroll - 8
+    first = max(0, top // line_h)
+    last = min(count, -(-(top + rect.h) // line_h))
+    prev_clip = surface.get_clip()
+    surface.set_clip(rect)
+    y = rect.y - top + first * line_h
+    for i in range(first, last):
+        blit_text(surface, font, event_log[i], (230, 230, 230), (rect.x + 10, y))
+        y += line_h
+    surface.set_clip(prev_clip)
+    return scroll
+
+
 def wrap_text(font: pygame.font.Font, text: str, max_width: int) -> List[str]:
     words = text.split()
     lines: List[str] = []
     current: List[str] = []
     for w in words:
         test = (" ".join(current + [w])).strip()
-        if font.size(test)[0] <= max_width or not current:
+        if text_size(font, test)[0] <= max_width or not current:
             current.append(w)
         else:
             lines.append(" ".join(current))
@@ -236,6 +598,7 @@ def wrap_text(font: pygame.font.Font, text: str, max_width: int) -> List[str]:
 
 
 def build_action_groups(hero: Person,
+                        act: Callable[..., object],
                         end_day_cb: Callable[[], None],
                         toggle_logs_cb: Callable[[], None],
                         toggle_diff_cb: Callable[[], None],
@@ -263,16 +626,15 @@ def build_action_groups(hero: Person,
         def _wrapped():
             cb()
             # Малый шанс фоновой встречи после любого действия
-            import random as _r
             chance = 0.25 if difficulty_mode == 'hardcore' else 0.15
-            if _r.random() < chance:
+            if act("roll_chance", chance):
                 random_enc_cb()
             # Случайный сдвиг времени для действий вне сна уже учтен в моделях, здесь ничего не делаем
-        return _wrapped
+        return depooper_profile.wrap_callback("gui:with_bg_events", _wrapped, hero)
 
     # Базовые действия привычек
     groups["Привычки"].append(("Кофе (выбрать)", open_coffee_dialog_cb, True))
-    groups["Привычки"].append(("Курить", with_bg_events(lambda: hero.smoke()), True))
+    groups["Привычки"].append(("Курить", with_bg_events(lambda: act("smoke")), True))
     groups["Привычки"].append(("Еда (выбрать)", open_food_dialog_cb, True))
 
     # Попытки бросить с учётом кулдауна и условий
@@ -296,7 +658,7 @@ def build_action_groups(hero: Person,
                 label = f"{base_label} [{short}]"
 
         def make_attempt(hk: str) -> Callable[[], None]:
-            return lambda: hero.attempt_to_kick_habit(hk)
+            return lambda: act("attempt_to_kick_habit", hk)
 
         groups["Привычки"].append((label, with_bg_events(make_attempt(habit_key)), ok))
 
@@ -312,11 +674,11 @@ def build_action_groups(hero: Person,
     # Контекстные действия по локации
     loc = hero.current_location
     if loc == 'gym':
-        groups["Действия"].append(("Тренировка в качалке", with_bg_events(lambda: hero.train_gym()), True))
+        groups["Действия"].append(("Тренировка в качалке", with_bg_events(lambda: act("train_gym")), True))
     elif loc == 'park':
-        groups["Действия"].append(("Тренировка на площадке", with_bg_events(lambda: hero.train_park()), True))
+        groups["Действия"].append(("Тренировка на площадке", with_bg_events(lambda: act("train_park")), True))
     elif loc == 'home':
-        groups["Действия"].append(("Почитать (библиотека)", with_bg_events(lambda: hero.read_in_library()), True))
+        groups["Действия"].append(("Почитать (библиотека)", with_bg_events(lambda: act("read_in_library")), True))
         if not hero.has_coffee_machine:
             groups["Действия"].append(("Купить кофемашину (7990 ₽)", buy_coffee_machine_cb, True))
     # Перемещения вынесены в отдельный оверлей «Навигация»
@@ -343,7 +705,7 @@ def layout_buttons(actions: List[Tuple[str, Callable[[], None]]], font: pygame.f
     max_cols = 5
     usable_width = WINDOW_WIDTH - 40
     # Оценим минимальную ширину кнопки по тексту
-    label_widths = [font.size(label)[0] + 28 for (label, _) in actions]
+    label_widths = [text_size(font, label)[0] + 28 for (label, _) in actions]
     min_btn_w = min(max(label_widths), 220)  # не слишком широкие
     cols = min(max(3, usable_width // (min_btn_w + gap)), max_cols, len(actions))
     rows = (len(actions) + cols - 1) // cols
@@ -365,14 +727,97 @@ def layout_buttons(actions: List[Tuple[str, Callable[[], None]]], font: pygame.f
     return rects, total_h
 
 
-def main():
+def frame_stats(frame_times: List[float]) -> Dict[str, float]:
+    """Сводка по длительностям кадров (секунды → миллисекунды)."""
+    ordered = sorted(frame_times)
+    n = len(ordered)
+    if not n:
+        return {"frames": 0}
+    return {
+        "frames": n,
+        "frame_ms_avg": 1000.0 * sum(ordered) / n,
+        "frame_ms_p50": 1000.0 * ordered[(n - 1) // 2],
+        "frame_ms_p95": 1000.0 * ordered[int(0.95 * (n - 1))],
+        "frame_ms_max": 1000.0 * ordered[-1],
+    }
+
+
+def print_replay_report(frame_times: List[float], hero: Person, recording: depooper_replay.Recording) -> None:
+    """Итоги повтора через GUI: время кадра и сверка итогового состояния."""
+    if frame_times:
+        for key, value in frame_stats(frame_times).items():
+            print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+    digest = depooper_replay.state_digest(hero)
+    print(f"{'digest':>20}: {digest}")
+    if recording.digest is not None:
+        print(f"{'check':>20}: {'OK' if digest == recording.digest else 'MISMATCH ' + recording.digest}")
+
+
+def live_bench_history(session: depooper_replay.Session, days: int) -> None:
+    """Прожить days дней обычной жизнью: наполнить журнал, квесты и статы перед замером."""
+    act = session.act
+    for _ in range(days):
+        act("drink_coffee", "instant")
+        act("eat_food", "fast")
+        act("smoke")
+        act("travel", "work", "bus")
+        if act("start_work"):
+            while session.shift.active:
+                act("work_choice", session.hero.rng.randrange(2))
+        act("travel", "home", "walk")
+        act("eat_food", "balanced")
+        act("sleep", 8.0)
+        act("end_of_day_update")
+        act("reset_daily_counters")
+
+
+def main(argv: Optional[List[str]] = None, low_power: Optional[bool] = None):
+    parser = argparse.ArgumentParser(description="Сова → Жаворонок (GUI)")
+    parser.add_argument("--low-power", action="store_true", help="перерисовывать только изменившиеся области")
+    parser.add_argument("--seed", type=int, default=None, help="сид случайности героя")
+    parser.add_argument("--record", metavar="PATH", help="записать действия сессии (см. depooper_replay)")
+    parser.add_argument("--replay", metavar="PATH", help="проиграть запись по действию за кадр и замерить кадры")
+    parser.add_argument("--bench-frames", type=int, default=0, metavar="N",
+                        help="замерить по N кадров на каждый вид из BENCH_VIEWS и выйти")
+    parser.add_argument("--bench-out", metavar="PATH", help="куда записать итоги --bench-frames (JSON)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if low_power is None:
+        low_power = True if args.low_power else LOW_POWER
+    depooper_profile.enable_from_env()
+    tracer = depooper_trace.enable_from_env()
     pygame.init()
     pygame.display.set_caption("Сова → Жаворонок (GUI 2.5D)")
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    bake_room_layer(screen.get_size())
     clock = pygame.time.Clock()
     font = pygame.font.SysFont("Segoe UI", 20)
-
-    hero = Person(name="Артем")
+    dirty = DirtyRegions()
+    hud = DebugHud(tracer)
+    lap = no_lap  # отметки участков кадра для HUD и трассы (см. FrameTimer)
+    input_serial = 0  # растёт на каждом кадре, где пришли события
+
+    # Все изменения героя идут через session.act: так их можно записать
+    # и потом проиграть (depooper_replay). Для записи нужен явный сид.
+    recording = depooper_replay.read_session(args.replay) if args.replay else None
+    seed = args.seed
+    if recording is not None:
+        seed = recording.seed
+    elif seed is None and args.record:
+        seed = random.SystemRandom().getrandbits(32)
+    elif seed is None and args.bench_frames:
+        seed = 0
+    # В GUI журнал рисуется на экране — печать каждого события в stdout не нужна
+    if recording is not None:
+        hero = recording.new_hero()
+    else:
+        hero = Person(name="Артем", log_sink=NULL_SINK)
+        if seed is not None:
+            hero.rng = RandomStream(seed)
+    hero.event_log.spill_path = os.environ.get("DEPOOPER_LOG_SPILL") or None
+    recorder = depooper_replay.ActionRecorder(args.record, seed, hero.name) if args.record else None
+    session = depooper_replay.Session(hero, recorder)
+    act = session.act
+    shift = session.shift
     difficulty_mode = "normal"  # or 'hardcore'
     day_counter = 1
 
@@ -403,12 +848,6 @@ def main():
     last_clicked_index = None
     active_actions_group = "Привычки"
 
-    def end_day():
-        nonlocal day_counter
-        hero.end_of_day_update()
-        hero.reset_daily_counters()
-        day_counter += 1
-
     def toggle_logs():
         nonlocal active_tab, new_events_flag
         active_tab = "log" if active_tab == "game" else "game"
@@ -418,15 +857,15 @@ def main():
     def toggle_difficulty():
         nonlocal difficulty_mode
         difficulty_mode = "hardcore" if difficulty_mode == "normal" else "normal"
-        hero.apply_difficulty(difficulty_mode)
-        hero.log_event(f"Переключен режим: {'Хардкор' if difficulty_mode=='hardcore' else 'Обычный'}")
+        act("apply_difficulty", difficulty_mode)
+        act("log_event", "Переключен режим: {}", 'Хардкор' if difficulty_mode=='hardcore' else 'Обычный')
 
     def do_random_encounter():
         nonlocal new_events_flag
-        if work_overlay.get('active'):
+        if shift.active:
             return
         if hero.is_encounter_available():
-            enc = hero.random_encounter(difficulty_mode, apply=False)
+            enc = act("random_encounter", difficulty_mode, False)
             # Включим оверлей встречи
             encounter_overlay['active'] = True
             encounter_overlay['data'] = enc
@@ -434,33 +873,26 @@ def main():
 
     def sleep_1h():
         nonlocal new_events_flag
-        hero.sleep(1.0)
+        act("sleep", 1.0)
         # Если в последней встрече гопники вырубили героя — позволим отоспаться 1 час без последствий
         new_events_flag = True
 
     # Завершение дня = сон 8 часов
     def combined_end_day_sleep():
         nonlocal new_events_flag, day_counter
-        hero.sleep(8.0)
-        hero.end_of_day_update()
-        hero.reset_daily_counters()
+        act("sleep", 8.0)
+        act("end_of_day_update")
+        act("reset_daily_counters")
         day_counter += 1
         new_events_flag = True
+        saver.request(hero, session_meta())
 
     def sleep_8h():
         # Используем объединённое действие
         combined_end_day_sleep()
 
-    # Мини-игра: Работа
-    work_overlay = {
-        'active': False,
-        'events_left': 0,
-        'focus': 50,
-        'stress': 0,
-        'message': '',
-        'choices': [],  # List[Tuple[label, callback]]
-        'choice_rects': [],
-    }
+    # Мини-игра: Работа (логика — в WorkShift, здесь только кнопки выбора)
+    work_choice_rects: List[Tuple[pygame.Rect, int]] = []
 
     # Оверлей случайной встречи
     encounter_overlay = {
@@ -495,12 +927,14 @@ def main():
         dialog_overlay['option_rects'] = []
         def make_drink(kind: str):
             def _cb():
-                hero.drink_coffee(kind)
+                act("drink_coffee", kind)
                 dialog_overlay['active'] = False
             return _cb
-        dialog_overlay['options'].append(("Растворимый (100 ₽)", make_drink('instant')))
-        dialog_overlay['options'].append(("Молотый (150 ₽)" + (" (нужна кофемашина)" if not hero.has_coffee_machine else ""), make_drink('ground')))
-        dialog_overlay['options'].append(("Супер премиум (300 ₽)" + (" (нужна кофемашина)" if not hero.has_coffee_machine else ""), make_drink('premium')))
+        for opt in COFFEE_ACTIONS.values():
+            label = f"{opt.title} ({opt.cost} ₽)"
+            if opt.needs_machine and not hero.has_coffee_machine:
+                label += " (нужна кофемашина)"
+            dialog_overlay['options'].append((label, make_drink(opt.key)))
 
     def open_food_dialog(from_break: bool = False, break_fill: int = 60):
         dialog_overlay['active'] = True
@@ -510,21 +944,18 @@ def main():
         dialog_overlay['option_rects'] = []
         def make_eat(kind: str, base_minutes: int):
             def _cb():
-                hero.eat_food(kind)
+                act("eat_food", kind)
                 if from_break:
                     leftover = max(0, break_fill - base_minutes)
-                    hero.advance_time(leftover)
-                    work_overlay['in_break'] = False
-                    work_overlay['break_left'] = 0
-                    _next_work_event()
+                    act("advance_time", leftover)
                 dialog_overlay['active'] = False
             return _cb
-        dialog_overlay['options'].append(("Фастфуд (150 ₽)", make_eat('fast', 20)))
-        dialog_overlay['options'].append(("Сбалансированная (300 ₽)", make_eat('balanced', 40)))
-        dialog_overlay['options'].append(("Супер полезная (500 ₽, дома)", make_eat('super', 50)))
+        for opt in FOOD_ACTIONS.values():
+            label = f"{opt.title} ({opt.cost} ₽, дома)" if opt.requires_home else f"{opt.title} ({opt.cost} ₽)"
+            dialog_overlay['options'].append((label, make_eat(opt.key, opt.time_min)))
 
     def buy_coffee_machine():
-        hero.buy_coffee_machine()
+        act("buy_coffee_machine")
 
     # Диалоги микрозайма
     def open_loan_dialog():
@@ -535,7 +966,7 @@ def main():
         dialog_overlay['option_rects'] = []
         def make_take(amount: int):
             def _cb():
-                hero.take_microloan(amount)
+                act("take_microloan", amount)
                 dialog_overlay['active'] = False
             return _cb
         dialog_overlay['options'].append(("Взять 2000 ₽", make_take(2000)))
@@ -550,429 +981,246 @@ def main():
         dialog_overlay['option_rects'] = []
         def make_pay(amount: int):
             def _cb():
-                hero.repay_loan(amount)
+                act("repay_loan", amount)
                 dialog_overlay['active'] = False
             return _cb
         dialog_overlay['options'].append(("Погасить 1000 ₽", make_pay(1000)))
         dialog_overlay['options'].append(("Погасить 3000 ₽", make_pay(3000)))
         dialog_overlay['options'].append(("Отмена", lambda: dialog_overlay.update({'active': False})))
 
-    def _set_work_event(message: str, choices: List[Tuple[str, Callable[[], None]]]):
-        work_overlay['message'] = message
-        work_overlay['choices'] = choices
-        work_overlay['choice_rects'] = []
-
     def _maybe_bg_after_choice():
-        import random as _r
         # во время активной работы не вызываем встречи
-        if work_overlay.get('active'):
+        if shift.active:
             return
-        if _r.random() < (0.2 if difficulty_mode == 'hardcore' else 0.12):
+        if act("roll_chance", 0.2 if difficulty_mode == 'hardcore' else 0.12):
             do_random_encounter()
 
-    def _next_work_event():
-        if work_overlay['events_left'] <= 0:
-            # Завершение работы: подвести итоги
-            focus = work_overlay['focus']
-            stress = work_overlay['stress']
-            # Баффы/дебаффы
-            if focus >= 65:
-                hero.health_score = min(200, hero.health_score + 5)
-                hero.log_event("Работа прошла продуктивно: здоровье +5.")
-                hero.work_productive_today = True
-            elif focus <= 35:
-                hero.alertness = max(0, hero.alertness - 6)
-                hero.log_event("Провал по фокусу на работе: бодрость -6.")
-            if stress >= 10:
-                hero.alertness = max(0, hero.alertness - 8)
-                hero.log_event("Стресс на работе: бодрость -8.")
-            elif stress <= 2:
-                hero.health_score = min(200, hero.health_score + 2)
-                hero.log_event("Спокойная смена: здоровье +2.")
-            work_overlay['active'] = False
-            hero.worked_today = True
-            hero.change_money(0)  # отрисуем баланс
-            return
-
-        import random as _r
-        etype = _r.choice(['focus_task', 'feature_task', 'incident_task', 'client_demo'])
-        if etype == 'tempt_smoke':
-            msg = "Перекур: коллеги зовут покурить."
-            def refuse():
-                work_overlay['stress'] += 6
-                if hero.alertness >= 70:
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 3)
-                hero.log_event("На работе отказался от перекура. Стресс +6, фокус немного вырос.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            def accept():
-                hero.smoke()
-                work_overlay['stress'] = max(0, work_overlay['stress'] - 3)
-                work_overlay['focus'] = max(0, work_overlay['focus'] - 4)
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            _set_work_event(msg, [("Отказаться", refuse), ("Пойти покурить", accept)])
-        elif etype == 'tempt_coffee':
-            msg = "Кофе-брейк: коллеги зовут выпить кофе."
-            def take():
-                hero.consume_coffee()
-                work_overlay['focus'] = min(100, work_overlay['focus'] + 2)
-                work_overlay['stress'] = max(0, work_overlay['stress'] - 1)
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            def skip():
-                work_overlay['stress'] += 3
-                delta = 1 if hero.alertness >= 60 else -2
-                work_overlay['focus'] = max(0, min(100, work_overlay['focus'] + delta))
-                hero.log_event("Отказался от кофе на работе.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            _set_work_event(msg, [("Выпить кофе", take), ("Отказаться", skip)])
-        elif etype == 'focus_task':
-            msg = "Задача от начальника: успеешь к сроку?"
-            def focus_on():
-                import random as _r2
-                base = 0.45
-                base += 0.05 if hero.alertness >= 60 else 0.0
-                base += 0.03 * max(0, hero.intelligence - 1)
-                if _r2.random() < min(0.9, base):
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 8)
-                    hero.log_event("Сконцентрировался на задаче: фокус +8.")
-                    # прогресс квеста по работе (отчёты)
-                    try:
-                        hero.increment_quest('work_reports', 1)
-                    except Exception:
-                        pass
-                else:
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 3)
-                    hero.log_event("Старался, но отвлекался: фокус +3.")
-                work_overlay['stress'] += 1
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            def procrastinate():
-                work_overlay['focus'] = max(0, work_overlay['focus'] - 5)
-                work_overlay['stress'] = max(0, work_overlay['stress'] - 2)
-                hero.log_event("Прокрастинировал на работе: фокус -5, стресс -2.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            _set_work_event(msg, [("Сконцентрироваться", focus_on), ("Прокрастинировать", procrastinate)])
-        elif etype == 'feature_task':
-            msg = "Новая фича: спроектировать и реализовать модуль."
-            def design():
-                import random as _r2
-                success = _r2.random() < (0.55 + 0.03 * max(0, hero.intelligence - 1))
-                if success:
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 7)
-                    hero.log_event("Спроектировал архитектуру модуля. Фокус +7.")
-                    try:
-                        # Показать квест при первом успехе
-                        if hero.quests.get('work_features', {}).get('status') == 'Скрыто':
-                            hero.quests['work_features']['status'] = 'В процессе'
-                        hero.increment_quest('work_features', 1)
-                    except Exception:
-                        pass
-                else:
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 3)
-                    hero.log_event("Идея сырая. Фокус +3.")
-                work_overlay['stress'] += 2
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            def implement():
-                import random as _r2
-                success = _r2.random() < (0.5 + 0.04 * max(0, hero.intelligence - 1) + 0.03 * max(0, hero.agility - 1))
-                if success:
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 9)
-                    hero.log_event("Имплементировал модуль без багов. Фокус +9.")
-                    try:
-                        if hero.quests.get('work_features', {}).get('status') == 'Скрыто':
-                            hero.quests['work_features']['status'] = 'В процессе'
-                        hero.increment_quest('work_features', 1)
-                    except Exception:
-                        pass
-                else:
-                    work_overlay['stress'] += 3
-                    hero.log_event("Срыв сроков, нужно рефакторить.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            _set_work_event(msg, [("Спроектировать", design), ("Имплементировать", implement)])
-        elif etype == 'incident_task':
-            msg = "Инцидент в проде: сервис 500. Что делать?"
-            def rollback():
-                work_overlay['stress'] = max(0, work_overlay['stress'] - 1)
-                hero.log_event("Откатились — стабильно, но откат по задачам.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            def hotfix():
-                import random as _r2
-                success = _r2.random() < (0.52 + 0.03 * max(0, hero.intelligence - 1))
-                if success:
-                    hero.log_event("Хотфикс прошёл успешно.")
-                    try:
-                        if hero.quests.get('work_incidents', {}).get('status') == 'Скрыто':
-                            hero.quests['work_incidents']['status'] = 'В процессе'
-                        hero.increment_quest('work_incidents', 1)
-                    except Exception:
-                        pass
-                    work_overlay['focus'] = min(100, work_overlay['focus'] + 5)
-                else:
-                    work_overlay['stress'] += 4
-                    hero.log_event("Хотфикс не удался. Стресс +4.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            _set_work_event(msg, [("Откат", rollback), ("Хотфикс", hotfix)])
-        else:  # client_demo
-            msg = "Встреча с клиентом: провести демо."
-            def prepare():
-                work_overlay['focus'] = min(100, work_overlay['focus'] + 4)
-                hero.log_event("Подготовился к демо. Фокус +4.")
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            def present():
-                import random as _r2
-                success = _r2.random() < (0.5 + 0.05 * max(0, hero.charisma - 1))
-                if success:
-                    hero.log_event("Демо прошло успешно, клиент доволен.")
-                    try:
-                        if hero.quests.get('work_presentations', {}).get('status') == 'Скрыто':
-                            hero.quests['work_presentations']['status'] = 'В процессе'
-                        hero.increment_quest('work_presentations', 1)
-                    except Exception:
-                        pass
-                    work_overlay['stress'] = max(0, work_overlay['stress'] - 1)
-                else:
-                    hero.log_event("Демо средней руки. Нужно улучшить подачу.")
-                    work_overlay['stress'] += 2
-                _maybe_bg_after_choice()
-                work_overlay['events_left'] -= 1
-                _next_work_event()
-            _set_work_event(msg, [("Подготовиться", prepare), ("Провести демо", present)])
-
     def start_work():
-        # Разрешаем прийти пораньше: ждать до 10:00
-        current_h = hero.time_minutes // 60
-        if current_h < 10:
-            wait = 10*60 - hero.time_minutes
-            if wait > 0:
-                hero.advance_time(wait)
-                hero.log_event("Пришел пораньше и подождал до 10:00.")
-        if hero.time_minutes // 60 >= 17:
-            hero.log_event("Смена уже закончилась. Приходи завтра.")
-            return
-        work_overlay['active'] = True
-        work_overlay['events_left'] = 20
-        work_overlay['focus'] = 50
-        work_overlay['stress'] = 0
-        hero.current_location = 'work'
-        hero.log_event("Начал рабочую смену.")
-        _next_work_event()
-
-    def go_home():
-        hero.current_location = 'home'
-        hero.advance_time(20)
-        hero.log_event("Вернулся домой.")
-
-    def go_gym():
-        hero.current_location = 'gym'
-        hero.advance_time(25)
-        hero.log_event("Пришел в качалку.")
-
-    def go_park():
-        hero.current_location = 'park'
-        hero.advance_time(20)
-        hero.log_event("Пришел на спортивную площадку.")
+        act("start_work")
+
+    # Варианты перемещения собираем один раз из каталога маршрутов;
+    # при открытии только отбрасываем маршруты в текущую локацию
+    def make_travel(target_key: str, mode: str):
+        def _cb():
+            nonlocal hero_gx, hero_gy
+            act("travel", target_key, mode)
+            travel_overlay['active'] = False
+            _maybe_bg_after_choice()
+            hero_gx, hero_gy = ACTIONS.tiles.get(target_key, (hero_gx, hero_gy))
+        return _cb
+
+    def close_travel():
+        travel_overlay['active'] = False
+
+    travel_options = [
+        (route.target, (f"В {route.label} {route.mode.title}", make_travel(route.target, route.mode.key)))
+        for route in ACTIONS.routes
+    ]
 
     def open_travel():
-        # Собираем варианты перемещения в зависимости от текущей локации
         travel_overlay['active'] = True
-        travel_overlay['options'] = []
         travel_overlay['option_rects'] = []
         loc = hero.current_location
-        targets = [('home', 'Дом', 25, 10, 40), ('work', 'Работа', 25, 10, 40), ('gym', 'Качалка', 25, 10, 40), ('park', 'Площадка', 25, 10, 40)]
-        loc_to_tile = {'home': (0,4), 'work': (5,0), 'gym': (5,5), 'park': (0,5)}
-        def make_walk(target_key: str, label: str, minutes: int):
-            def _cb():
-                # Корректируем путь по РПГ статам
-                adj = hero.compute_travel_minutes('walk', minutes)
-                hero.advance_time(adj)
-                hero.weight_kg = max(40.0, hero.weight_kg - 0.02)
-                hero.current_location = target_key
-                hero.log_event(f"Пешком в {label} (-0.02 кг, {adj} мин).")
-                travel_overlay['active'] = False
-                _maybe_bg_after_choice()
-                nonlocal hero_gx, hero_gy
-                hero_gx, hero_gy = loc_to_tile.get(target_key, (hero_gx, hero_gy))
-            return _cb
-        def make_bus(target_key: str, label: str, minutes: int, cost: int):
-            def _cb():
-                hero.change_money(-cost)
-                hero.advance_time(minutes)
-                hero.current_location = target_key
-                hero.log_event(f"Автобусом в {label} (-{cost} ₽).")
-                travel_overlay['active'] = False
-                _maybe_bg_after_choice()
-                nonlocal hero_gx, hero_gy
-                hero_gx, hero_gy = loc_to_tile.get(target_key, (hero_gx, hero_gy))
-            return _cb
-        def make_taxi(target_key: str, label: str, minutes: int, cost: int):
-            def _cb():
-                hero.change_money(-cost)
-                hero.advance_time(minutes)
-                hero.current_location = target_key
-                hero.log_event(f"Такси в {label} (-{cost} ₽).")
-                travel_overlay['active'] = False
-                _maybe_bg_after_choice()
-                nonlocal hero_gx, hero_gy
-                hero_gx, hero_gy = loc_to_tile.get(target_key, (hero_gx, hero_gy))
-            return _cb
-        def make_cancel():
-            def _cb():
-                travel_overlay['active'] = False
-            return _cb
-        for key, label, walk_min, bus_min, bus_cost in targets:
-            if key == loc:
-                continue
-            travel_overlay['options'].append((f"В {label} пешком", make_walk(key, label, walk_min)))
-            travel_overlay['options'].append((f"В {label} автобусом", make_bus(key, label, bus_min, bus_cost)))
-            taxi_min = max(5, bus_min - 3)
-            taxi_cost = max(120, bus_cost * 4)
-            travel_overlay['options'].append((f"В {label} на такси", make_taxi(key, label, taxi_min, taxi_cost)))
-        # Кнопка отмены
-        travel_overlay['options'].append(("Отмена", make_cancel()))
+        options = [opt for target, opt in travel_options if target != loc]
+        options.append(("Отмена", close_travel))
+        travel_overlay['options'] = options
 
     # Сохранение/загрузка
-    def save_game():
-        data = {
-            'hero': hero.__dict__,
+    # Запись идёт в фоне: в кадре остаётся только снимок состояния
+    saver = depooper_save.AutosaveService(
+        SAVE_PATH, slots=AUTOSAVE_SLOTS,
+        notify=lambda: pygame.event.post(pygame.event.Event(SAVE_DONE_EVENT)),
+        journal=depooper_save.SaveJournal(JOURNAL_DIR, snapshot_every_days=JOURNAL_SNAPSHOT_DAYS),
+    )
+
+    def session_meta() -> Dict[str, object]:
+        return {
             'day_counter': day_counter,
             'hero_gx': hero_gx,
             'hero_gy': hero_gy,
             'difficulty_mode': difficulty_mode,
             'tutorial_active': tutorial_active,
         }
-        try:
-            with open('savegame.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            hero.log_event("Игра сохранена в savegame.json")
-        except Exception as e:
-            hero.log_event(f"Ошибка сохранения: {e}")
+
+    def save_game():
+        saver.request(hero, session_meta(), path=SAVE_PATH)
 
     def load_game():
         nonlocal day_counter, hero_gx, hero_gy, difficulty_mode, tutorial_active
         try:
-            with open('savegame.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            # Восстановим героя по известным полям
-            hero_dict = data.get('hero', {})
-            for k, v in hero_dict.items():
-                if hasattr(hero, k):
-                    setattr(hero, k, v)
+            # Самое свежее из ручного сохранения, журнала и автослотов; старый savegame.json —
+            # только если ни одно из них не нашлось или не прочиталось, каким бы свежим он ни был
+            sources = [SAVE_PATH, saver.journal] + saver.slot_paths()
+            path, data = depooper_save.load_newest(sources, hero, fallbacks=[LEGACY_SAVE_PATH])
+            saver.journal.reset()
             day_counter = int(data.get('day_counter', day_counter))
             hero_gx = int(data.get('hero_gx', hero_gx))
             hero_gy = int(data.get('hero_gy', hero_gy))
             difficulty_mode = data.get('difficulty_mode', difficulty_mode)
             tutorial_active = bool(data.get('tutorial_active', tutorial_active))
-            hero.apply_difficulty(difficulty_mode)
-            hero.log_event("Игра загружена из savegame.json")
+            # При повторе файла может не быть — в запись идёт само состояние
+            session.record("load_state_dict", hero.state_dict())
+            act("apply_difficulty", difficulty_mode)
+            act("log_event", "Игра загружена из {}", path)
         except FileNotFoundError:
-            hero.log_event("Сохранение не найдено.")
+            act("log_event", "Сохранение не найдено.")
         except Exception as e:
-            hero.log_event(f"Ошибка загрузки: {e}")
-
-    # Кнопки
-    groups = build_action_groups(
-        hero,
-        combined_end_day_sleep,
-        toggle_logs,
-        toggle_difficulty,
-        do_random_encounter,
-        difficulty_mode,
-        sleep_1h,
-        start_work,
-        open_travel,
-        save_game,
-        load_game,
-        open_coffee_dialog,
-        lambda: open_food_dialog(False, 60),
-        buy_coffee_machine,
-        open_loan_dialog,
-        open_repay_dialog,
-    )
-    actions = groups.get(active_actions_group, [])
-    rects, _grid_h = layout_buttons([(label, cb) for (label, cb, _en) in actions], font, bottom_margin=48)
+            act("log_event", "Ошибка загрузки: {}", str(e))
+
+    # Кнопки: группы, раскладка и Button пересобираются только при изменении
+    # состояния героя или UI (см. ensure_ui), а не каждый кадр
+    selector_h = 36
+    selector_rect = pygame.Rect(20, WINDOW_HEIGHT - 220 - selector_h - 12, WINDOW_WIDTH - 40, selector_h)
+    groups: Dict[str, List[Tuple[str, Callable[[], None], bool]]] = {}
     buttons: List[Button] = []
-    for i, ((label, cb, en), rect) in enumerate(zip(actions, rects)):
-        def make_cb(idx: int, action_cb: Callable[[], None]):
-            def _inner():
-                nonlocal last_clicked_index
-                action_cb()
-                last_clicked_index = idx
-            return _inner
-        b = Button(rect, label, make_cb(i, cb))
-        b.enabled = en
-        buttons.append(b)
+    ui_key: Optional[Tuple] = None
+
+    def make_cb(idx: int, action_cb: Callable[[], None]):
+        def _inner():
+            nonlocal last_clicked_index
+            action_cb()
+            last_clicked_index = idx
+        return _inner
+
+    def ensure_ui() -> None:
+        nonlocal groups, buttons, ui_key
+        key = (hero.state_version, hero.days_elapsed, hero.current_location,
+               active_actions_group, difficulty_mode, tutorial_active)
+        if key == ui_key:
+            return
+        ui_key = key
+        lap("ui")
+        groups = build_action_groups(
+            hero,
+            act,
+            combined_end_day_sleep,
+            toggle_logs,
+            toggle_difficulty,
+            do_random_encounter,
+            difficulty_mode,
+            sleep_1h,
+            start_work,
+            open_travel,
+            save_game,
+            load_game,
+            open_coffee_dialog,
+            lambda: open_food_dialog(False, 60),
+            buy_coffee_machine,
+            open_loan_dialog,
+            open_repay_dialog,
+        )
+        lap("build_action_groups")
+        actions = groups.get(active_actions_group, [])
+        rects, _grid_h = layout_buttons([(label, cb) for (label, cb, _en) in actions], font, bottom_margin=selector_h + 12)
+        lap("layout_buttons")
+        buttons = []
+        for i, ((label, cb, en), rect) in enumerate(zip(actions, rects)):
+            cb = depooper_profile.wrap_callback(f"gui:{label.split(' (')[0]}", cb, hero)
+            b = Button(rect, label, make_cb(i, cb))
+            b.enabled = en
+            buttons.append(b)
+
+    ensure_ui()
+
+    # Повтор записи: по действию за кадр, без ограничения FPS, с замером кадров
+    replay_actions = iter(recording.actions) if recording is not None else None
+    frame_times: List[float] = []
+    if replay_actions is not None:
+        start_menu_active = False
+        tutorial_active = False
+
+    # Замер кадра по видам: BENCH_WARMUP + N кадров на каждый вид из BENCH_VIEWS
+    per_view = BENCH_WARMUP + max(0, args.bench_frames)
+    bench_plan = [view for view in BENCH_VIEWS for _ in range(per_view)] if args.bench_frames else []
+    bench_times: Dict[str, List[float]] = {view: [] for view in BENCH_VIEWS} if bench_plan else {}
+    bench_index = 0
+
+    def set_bench_view(view: str) -> None:
+        nonlocal start_menu_active, active_tab, hero_gx, hero_gy
+        start_menu_active = view == "start_menu"
+        active_tab = view if view in ("log", "quests") else "game"
+        shift.active = False
+        encounter_overlay['active'] = False
+        travel_overlay['active'] = False
+        dialog_overlay['active'] = False
+        if view == "work":
+            hero.time_minutes = 9 * 60  # чтобы смена точно началась
+            act("start_work")
+            hero_gx, hero_gy = ACTIONS.tiles['work']
+        elif view == "encounter":
+            encounter_overlay['data'] = act("random_encounter", difficulty_mode, False)
+            encounter_overlay['active'] = True
+        elif view == "travel":
+            open_travel()
+        elif view == "dialog":
+            open_coffee_dialog()
+
+    if bench_plan:
+        tutorial_active = False
+        live_bench_history(session, BENCH_HISTORY_DAYS)
 
     running = True
     while running:
+        frame_start = time.perf_counter()
+        hud_on = hud.visible
+        timing = hud_on or tracer is not None
+        if timing:
+            hud.timer.begin()
+            lap = hud.timer.lap
+        else:
+            lap = no_lap
         mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if events:
+            input_serial += 1
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.VIDEORESIZE:
+                invalidate_room_layer()
+                dirty.invalidate()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty.invalidate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+                elif event.key == pygame.K_F3:
+                    # Включится/выключится со следующего кадра; экран отправим целиком
+                    hud.toggle()
+                    dirty.invalidate()
                 # Движение героя по комнате
                 elif event.key == pygame.K_LEFT:
                     hero_gx = max(0, hero_gx - 1)
-                    if random_chance := (0.35 if difficulty_mode == 'hardcore' else 0.2):
-                        import random as _r
-                        if _r.random() < random_chance:
-                            do_random_encounter()
+                    if act("roll_chance", 0.35 if difficulty_mode == 'hardcore' else 0.2):
+                        do_random_encounter()
                 elif event.key == pygame.K_RIGHT:
                     hero_gx = min(GRID_W - 1, hero_gx + 1)
-                    if random_chance := (0.35 if difficulty_mode == 'hardcore' else 0.2):
-                        import random as _r
-                        if _r.random() < random_chance:
-                            do_random_encounter()
+                    if act("roll_chance", 0.35 if difficulty_mode == 'hardcore' else 0.2):
+                        do_random_encounter()
                 elif event.key == pygame.K_UP:
                     hero_gy = max(0, hero_gy - 1)
-                    if random_chance := (0.35 if difficulty_mode == 'hardcore' else 0.2):
-                        import random as _r
-                        if _r.random() < random_chance:
-                            do_random_encounter()
+                    if act("roll_chance", 0.35 if difficulty_mode == 'hardcore' else 0.2):
+                        do_random_encounter()
                 elif event.key == pygame.K_DOWN:
                     hero_gy = min(GRID_H - 1, hero_gy + 1)
-                    if random_chance := (0.35 if difficulty_mode == 'hardcore' else 0.2):
-                        import random as _r
-                        if _r.random() < random_chance:
-                            do_random_encounter()
+                    if act("roll_chance", 0.35 if difficulty_mode == 'hardcore' else 0.2):
+                        do_random_encounter()
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if start_menu_active:
                     # Обработаем клики по стартовому меню ниже в рендере, где есть прямоугольники
                     pass
                 else:
-                    if work_overlay['active']:
+                    if shift.active:
                         # Клики по кнопкам мини-игры Работа
-                        if work_overlay['choice_rects']:
-                            for (rect, (_label, cb)) in work_overlay['choice_rects']:
-                                if rect.collidepoint(event.pos):
-                                    cb()
-                                    break
+                        for rect, index in work_choice_rects:
+                            if rect.collidepoint(event.pos):
+                                act("work_choice", index)
+                                break
                     elif encounter_overlay['active']:
                         # Клик на оверлей встречи — проверим кнопку ОК
                         ok_rect = encounter_overlay.get('ok_rect')
                         if ok_rect and ok_rect.collidepoint(event.pos):
-                            hero.random_encounter(difficulty_mode, apply=True, forced_type=encounter_overlay['data']['type'])
+                            act("random_encounter", difficulty_mode, True, encounter_overlay['data']['type'])
                             encounter_overlay['active'] = False
                     elif travel_overlay['active']:
                         # Навигация: выбор опции
@@ -990,7 +1238,32 @@ def main():
                             b.handle_event(event)
             elif event.type == pygame.MOUSEWHEEL:
                 if active_tab == "log":
-                    log_scroll = max(0, log_scroll - event.y * 24)
+                    log_scroll = max(0, log_scroll - event.y * LOG_LINE_H)
+
+        if bench_plan:
+            if bench_index >= len(bench_plan):
+                running = False
+            elif bench_index % per_view == 0:
+                set_bench_view(bench_plan[bench_index])
+
+        if replay_actions is not None:
+            step = next(replay_actions, None)
+            if step is None:
+                running = False
+            else:
+                act(step[0], *step[1])
+                difficulty_mode = hero.difficulty_mode
+                hero_gx, hero_gy = ACTIONS.tiles.get(hero.current_location, (hero_gx, hero_gy))
+
+        # Итоги фоновых сохранений
+        for path, error in saver.poll():
+            if error is not None:
+                act("log_event", "Ошибка сохранения: {}", str(error))
+            elif path == SAVE_PATH:
+                act("log_event", "Игра сохранена в {}", path)
+        lap("events")
+
+        ensure_ui()
 
         # Туториал логика (привязка к названиям действий, а не индексам)
         if tutorial_active and tutorial_step < len(tutorial_steps):
@@ -1026,6 +1299,30 @@ def main():
             for b in buttons:
                 b.enabled = True
 
+        # Подписи областей считаем до рендера: они описывают то, что сейчас будет нарисовано
+        if low_power:
+            modal = (start_menu_active or active_tab != 'game' or tutorial_active
+                     or shift.active or encounter_overlay['active']
+                     or travel_overlay['active'] or dialog_overlay['active'])
+            if modal:
+                # Меню, оверлеи и вкладки перерисовываются целиком, но только в ответ на ввод
+                dirty.set_layer(('modal', active_tab))
+                dirty.mark('screen', screen.get_rect(), (input_serial, hero.state_version))
+            else:
+                dirty.set_layer('game')
+                dirty.mark('top', TOP_BAR_RECT, (active_tab, new_events_flag))
+                hero_x, hero_y = grid_to_iso(hero_gx, hero_gy)
+                scene = pygame.Rect(_room_layer['pos'], _room_layer['surface'].get_size())
+                dirty.mark('scene', scene.union(pygame.Rect(hero_x - 20, hero_y - 28, 40, 40)), (hero_gx, hero_gy))
+                dirty.mark('status', STATUS_RECT, (hero.state_version, hero.time_minutes, day_counter, difficulty_mode))
+                dirty.mark('mini_log', mini_log_rect(), (hero.state_version,))
+                hovered = next((i for i, b in enumerate(buttons) if b.rect.collidepoint(mouse_pos)), None)
+                actions_rect = selector_rect.unionall([b.rect for b in buttons]) if buttons else selector_rect
+                dirty.mark('actions', actions_rect,
+                           (ui_key, active_actions_group, hovered, tuple(b.enabled for b in buttons)))
+
+        lap("ui")
+
         # Рендер
         screen.fill(COLOR_BG)
 
@@ -1039,13 +1336,13 @@ def main():
         pygame.draw.rect(screen, COLOR_ACCENT if active_tab == 'game' else (70, 75, 82), game_tab_rect, border_radius=8)
         pygame.draw.rect(screen, COLOR_ACCENT if active_tab == 'log' else (70, 75, 82), log_tab_rect, border_radius=8)
         pygame.draw.rect(screen, COLOR_ACCENT if active_tab == 'quests' else (70, 75, 82), quests_tab_rect, border_radius=8)
-        screen.blit(font.render("Игра", True, (0, 0, 0)), font.render("Игра", True, (0,0,0)).get_rect(center=game_tab_rect.center))
+        blit_text_centered(screen, font, "Игра", (0, 0, 0), game_tab_rect.center)
         log_label = "Журнал" + (" •" if new_events_flag and active_tab != 'log' else "")
-        screen.blit(font.render(log_label, True, (0, 0, 0)), font.render(log_label, True, (0,0,0)).get_rect(center=log_tab_rect.center))
-        screen.blit(font.render("Квесты", True, (0, 0, 0)), font.render("Квесты", True, (0,0,0)).get_rect(center=quests_tab_rect.center))
+        blit_text_centered(screen, font, log_label, (0, 0, 0), log_tab_rect.center)
+        blit_text_centered(screen, font, "Квесты", (0, 0, 0), quests_tab_rect.center)
 
         # Клики по вкладкам (не во время оверлеев)
-        if pygame.mouse.get_pressed()[0] and not start_menu_active and not work_overlay.get('active', False):
+        if pygame.mouse.get_pressed()[0] and not start_menu_active and not shift.active:
             if game_tab_rect.collidepoint(mouse_pos):
                 active_tab = 'game'
             elif log_tab_rect.collidepoint(mouse_pos):
@@ -1057,13 +1354,14 @@ def main():
         # Кнопка "Завершить день" отдельным большим акцентом в левом-верхнем углу
         end_day_button_rect = pygame.Rect(420, 16, 200, 36)
         pygame.draw.rect(screen, (255, 120, 60), end_day_button_rect, border_radius=10)
-        screen.blit(font.render("Завершить день", True, (0,0,0)), font.render("Завершить день", True, (0,0,0)).get_rect(center=end_day_button_rect.center))
+        blit_text_centered(screen, font, "Завершить день", (0, 0, 0), end_day_button_rect.center)
         if pygame.mouse.get_pressed()[0]:
             if end_day_button_rect.collidepoint(mouse_pos) and not start_menu_active and not end_day_latch:
                 combined_end_day_sleep()
                 end_day_latch = True
         else:
             end_day_latch = False
+        lap("tabs")
 
         if start_menu_active:
             # Рисуем стартовое меню
@@ -1073,7 +1371,7 @@ def main():
             panel = pygame.Rect(0, 0, 520, 320)
             panel.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
             pygame.draw.rect(screen, COLOR_PANEL, panel, border_radius=14)
-            title = font.render("Выбор сложности и обучение", True, COLOR_TEXT)
+            title = render_text(font, "Выбор сложности и обучение", COLOR_TEXT)
             screen.blit(title, title.get_rect(center=(panel.centerx, panel.y + 40)))
 
             # Кнопки сложности
@@ -1081,15 +1379,15 @@ def main():
             hard_btn = pygame.Rect(panel.x + 280, panel.y + 100, 200, 44)
             pygame.draw.rect(screen, COLOR_ACCENT if difficulty_mode=='normal' else (70,75,82), norm_btn, border_radius=10)
             pygame.draw.rect(screen, COLOR_ACCENT if difficulty_mode=='hardcore' else (70,75,82), hard_btn, border_radius=10)
-            screen.blit(font.render("Обычный", True, (0,0,0)), font.render("Обычный", True, (0,0,0)).get_rect(center=norm_btn.center))
-            screen.blit(font.render("Хардкор", True, (0,0,0)), font.render("Хардкор", True, (0,0,0)).get_rect(center=hard_btn.center))
+            blit_text_centered(screen, font, "Обычный", (0, 0, 0), norm_btn.center)
+            blit_text_centered(screen, font, "Хардкор", (0, 0, 0), hard_btn.center)
 
             # Чекбокс пропуска обучения
             cb_rect = pygame.Rect(panel.x + 40, panel.y + 170, 24, 24)
             pygame.draw.rect(screen, (200,200,200), cb_rect, 2, border_radius=4)
             if skip_tutorial:
                 pygame.draw.rect(screen, (200,200,200), cb_rect.inflate(-6,-6), 0, border_radius=3)
-            screen.blit(font.render("Пропустить обучение", True, COLOR_TEXT), (cb_rect.right + 10, cb_rect.y))
+            blit_text(screen, font, "Пропустить обучение", COLOR_TEXT, (cb_rect.right + 10, cb_rect.y))
 
             # Выбор героя
             names = ["Артем", "Филя", "Апполлон"]
@@ -1099,14 +1397,14 @@ def main():
             for nm in names:
                 r = pygame.Rect(hx, hy, 140, 36)
                 pygame.draw.rect(screen, COLOR_ACCENT if selected_hero_name == nm else (70,75,82), r, border_radius=8)
-                screen.blit(font.render(nm, True, (0,0,0)), font.render(nm, True, (0,0,0)).get_rect(center=r.center))
+                blit_text_centered(screen, font, nm, (0, 0, 0), r.center)
                 hero_rects.append((nm, r))
                 hx += 160
 
             # Кнопка старт
             start_btn = pygame.Rect(panel.x + 160, panel.y + 250, 200, 48)
             pygame.draw.rect(screen, COLOR_OK, start_btn, border_radius=12)
-            screen.blit(font.render("Начать", True, (0,0,0)), font.render("Начать", True, (0,0,0)).get_rect(center=start_btn.center))
+            blit_text_centered(screen, font, "Начать", (0, 0, 0), start_btn.center)
 
             # Обработка кликов
             if pygame.mouse.get_pressed()[0]:
@@ -1120,63 +1418,41 @@ def main():
                 elif cb_rect.collidepoint(mouse_pos):
                     skip_tutorial = not skip_tutorial
                 elif start_btn.collidepoint(mouse_pos):
-                    hero.name = selected_hero_name
-                    hero.apply_difficulty(difficulty_mode)
+                    act("start", selected_hero_name, difficulty_mode)
                     if skip_tutorial:
                         tutorial_active = False
                     start_menu_active = False
+            lap("start_menu")
         elif active_tab == 'game':
             # Обновим текущую локацию по позиции героя (простое соответствие тайлам)
-            if (hero_gx, hero_gy) == (0, 4):
-                hero.current_location = 'home'
-            elif (hero_gx, hero_gy) == (5, 0):
-                hero.current_location = 'work'
-            elif (hero_gx, hero_gy) == (5, 5):
-                hero.current_location = 'gym'
-            elif (hero_gx, hero_gy) == (0, 5):
-                hero.current_location = 'park'
+            tile_loc = TILE_LOCATIONS.get((hero_gx, hero_gy))
+            if tile_loc and tile_loc != hero.current_location:
+                act("enter_location", tile_loc)
+            lap("enter_location")
 
             draw_room(screen)
+            lap("draw_room")
             # Отрисуем след перемещений в виде пунктирных кружков на последних шагах
             # (упрощённая реализация: рисуем лёгкий блик вокруг текущей клетки)
             pygame.draw.circle(screen, (120, 180, 220), (grid_to_iso(hero_gx, hero_gy)[0], grid_to_iso(hero_gx, hero_gy)[1] - 8), 18, 1)
             draw_hero(screen, hero_gx, hero_gy)
+            lap("draw_hero")
             draw_status(screen, font, hero, day_counter, difficulty_mode)
+            lap("draw_status")
             draw_mini_log(screen, font, hero)
-            # Группы действий и селектор групп
-            groups = build_action_groups(
-                hero,
-                combined_end_day_sleep,
-                toggle_logs,
-                toggle_difficulty,
-                do_random_encounter,
-                difficulty_mode,
-                sleep_1h,
-                start_work,
-                open_travel,
-                save_game,
-                load_game,
-                open_coffee_dialog,
-                lambda: open_food_dialog(False, 60),
-                buy_coffee_machine,
-                open_loan_dialog,
-                open_repay_dialog,
-            )
-
+            lap("draw_mini_log")
             # Селектор групп над кнопками
             group_names = list(groups.keys())
-            selector_h = 36
-            selector_rect = pygame.Rect(20, WINDOW_HEIGHT - 220 - selector_h - 12, WINDOW_WIDTH - 40, selector_h)
             pygame.draw.rect(screen, COLOR_PANEL, selector_rect, border_radius=10)
             # Рисуем табы групп
             gx = selector_rect.x + 8
             tab_gap = 8
             group_tab_rects: List[Tuple[str, pygame.Rect]] = []
             for gname in group_names:
-                w = max(120, font.size(gname)[0] + 24)
+                w = max(120, text_size(font, gname)[0] + 24)
                 rect = pygame.Rect(gx, selector_rect.y + 4, w, selector_h - 8)
                 pygame.draw.rect(screen, COLOR_ACCENT if gname == active_actions_group else (70, 75, 82), rect, border_radius=8)
-                screen.blit(font.render(gname, True, (0, 0, 0)), font.render(gname, True, (0,0,0)).get_rect(center=rect.center))
+                blit_text_centered(screen, font, gname, (0, 0, 0), rect.center)
                 group_tab_rects.append((gname, rect))
                 gx += w + tab_gap
 
@@ -1185,34 +1461,14 @@ def main():
                 for gname, rect in group_tab_rects:
                     if rect.collidepoint(mouse_pos):
                         active_actions_group = gname
-
-            # Перерисуем кнопки (с перераскладкой по активной группе)
-            actions = groups.get(active_actions_group, [])
-            rects, _grid_h = layout_buttons([(label, cb) for (label, cb, _en) in actions], font, bottom_margin=selector_h + 12)
-            if len(buttons) != len(actions):
-                buttons = []
-                for i, ((label, cb, en), rect) in enumerate(zip(actions, rects)):
-                    def make_cb(idx: int, action_cb: Callable[[], None]):
-                        def _inner():
-                            nonlocal last_clicked_index
-                            action_cb()
-                            last_clicked_index = idx
-                        return _inner
-                    b = Button(rect, label, make_cb(i, cb))
-                    b.enabled = en
-                    buttons.append(b)
-            else:
-                # обновляем позиции, подписи и доступность
-                for b, rect in zip(buttons, rects):
-                    b.rect = rect
-                for b, (label, _cb, en) in zip(buttons, actions):
-                    b.label = label
-                    b.enabled = en if not tutorial_active else b.enabled
+            # Смена группы или локации пересоберёт кнопки до отрисовки
+            ensure_ui()
             for b in buttons:
                 b.draw(screen, font, mouse_pos)
+            lap("buttons")
 
             # Рисуем мини-игру Работа, если активна
-            if work_overlay['active']:
+            if shift.active:
                 ov = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
                 ov.fill(COLOR_OVERLAY_BG)
                 screen.blit(ov, (0, 0))
@@ -1220,19 +1476,20 @@ def main():
                 panel.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
                 pygame.draw.rect(screen, COLOR_PANEL, panel, border_radius=14)
                 # Заголовок и статы
-                title = font.render("Работа", True, COLOR_TEXT)
+                title = render_text(font, "Работа", COLOR_TEXT)
                 screen.blit(title, title.get_rect(center=(panel.centerx, panel.y + 28)))
                 # Отображаем окно времени работы и предупреждений
-                stats = font.render(
-                    f"Фокус: {work_overlay['focus']}  |  Стресс: {work_overlay['stress']}  | Осталось событий: {work_overlay['events_left']}  | Ставка: {hero.job_daily_wage} ₽  | Предупреждения: {hero.job_warnings}",
-                    True, COLOR_TEXT
+                stats = render_text(
+                    font,
+                    f"Фокус: {shift.focus}  |  Стресс: {shift.stress}  | Осталось событий: {shift.events_left}  | Ставка: {hero.job_daily_wage} ₽  | Предупреждения: {hero.job_warnings}",
+                    COLOR_TEXT
                 )
                 screen.blit(stats, stats.get_rect(center=(panel.centerx, panel.y + 62)))
                 # Сообщение
-                lines = work_overlay['message'].split('\n') if work_overlay['message'] else [""]
+                lines = shift.message.split('\n') if shift.message else [""]
                 y = panel.y + 100
                 for line in lines:
-                    surf = font.render(line, True, COLOR_TEXT)
+                    surf = render_text(font, line, COLOR_TEXT)
                     screen.blit(surf, (panel.x + 24, y))
                     y += 28
                 # Кнопки выбора
@@ -1241,18 +1498,11 @@ def main():
                 btn_y = panel.bottom - 24 - btn_h
                 left_btn = pygame.Rect(panel.x + 24, btn_y, btn_w, btn_h)
                 right_btn = pygame.Rect(panel.x + 24*2 + btn_w, btn_y, btn_w, btn_h)
-                choice_rects: List[Tuple[pygame.Rect, Tuple[str, Callable[[], None]]]] = []
-                if len(work_overlay['choices']) >= 1:
-                    lbl0, cb0 = work_overlay['choices'][0]
-                    pygame.draw.rect(screen, COLOR_ACCENT, left_btn, border_radius=10)
-                    screen.blit(font.render(lbl0, True, (0,0,0)), font.render(lbl0, True, (0,0,0)).get_rect(center=left_btn.center))
-                    choice_rects.append((left_btn, (lbl0, cb0)))
-                if len(work_overlay['choices']) >= 2:
-                    lbl1, cb1 = work_overlay['choices'][1]
-                    pygame.draw.rect(screen, COLOR_ACCENT, right_btn, border_radius=10)
-                    screen.blit(font.render(lbl1, True, (0,0,0)), font.render(lbl1, True, (0,0,0)).get_rect(center=right_btn.center))
-                    choice_rects.append((right_btn, (lbl1, cb1)))
-                work_overlay['choice_rects'] = choice_rects
+                work_choice_rects.clear()
+                for index, (label, rect) in enumerate(zip(shift.choices, (left_btn, right_btn))):
+                    pygame.draw.rect(screen, COLOR_ACCENT, rect, border_radius=10)
+                    blit_text_centered(screen, font, label, (0, 0, 0), rect.center)
+                    work_choice_rects.append((rect, index))
 
             # Рисуем встречу, если активна
             if encounter_overlay['active'] and encounter_overlay['data']:
@@ -1263,7 +1513,7 @@ def main():
                 panel.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
                 pygame.draw.rect(screen, COLOR_PANEL, panel, border_radius=14)
                 # Заголовок
-                title = font.render("Случайная встреча", True, COLOR_TEXT)
+                title = render_text(font, "Случайная встреча", COLOR_TEXT)
                 screen.blit(title, title.get_rect(center=(panel.centerx, panel.y + 30)))
                 # Иконка/тип
                 etype = encounter_overlay['data']['type']
@@ -1272,18 +1522,18 @@ def main():
                     'gopnik': 'Гопники',
                     'janitor': 'Дворник',
                 }.get(etype, etype)
-                screen.blit(font.render(f"Тип: {etype_label}", True, COLOR_TEXT), (panel.x + 24, panel.y + 70))
+                blit_text(screen, font, f"Тип: {etype_label}", COLOR_TEXT, (panel.x + 24, panel.y + 70))
                 # Сообщение
                 msg_lines = encounter_overlay['data']['message'].split('\n')
                 y = panel.y + 104
                 for line in msg_lines:
-                    screen.blit(font.render(line, True, COLOR_TEXT), (panel.x + 24, y))
+                    blit_text(screen, font, line, COLOR_TEXT, (panel.x + 24, y))
                     y += 26
                 # Кнопка OK
                 ok_rect = pygame.Rect(0, 0, 140, 44)
                 ok_rect.center = (panel.centerx, panel.bottom - 40)
                 pygame.draw.rect(screen, COLOR_OK, ok_rect, border_radius=10)
-                screen.blit(font.render("ОК", True, (0,0,0)), font.render("ОК", True, (0,0,0)).get_rect(center=ok_rect.center))
+                blit_text_centered(screen, font, "ОК", (0, 0, 0), ok_rect.center)
                 # Сохраним активную кнопку для обработки клика
                 encounter_overlay['ok_rect'] = ok_rect
 
@@ -1295,7 +1545,7 @@ def main():
                 panel = pygame.Rect(0, 0, 640, 360)
                 panel.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
                 pygame.draw.rect(screen, COLOR_PANEL, panel, border_radius=14)
-                title = font.render(travel_overlay['title'], True, COLOR_TEXT)
+                title = render_text(font, travel_overlay['title'], COLOR_TEXT)
                 screen.blit(title, title.get_rect(center=(panel.centerx, panel.y + 28)))
                 # Список опций
                 y = panel.y + 80
@@ -1303,7 +1553,7 @@ def main():
                 for label, _cb in travel_overlay['options']:
                     rect = pygame.Rect(panel.x + 24, y, panel.w - 48, 40)
                     pygame.draw.rect(screen, COLOR_ACCENT, rect, border_radius=8)
-                    screen.blit(font.render(label, True, (0,0,0)), font.render(label, True, (0,0,0)).get_rect(center=rect.center))
+                    blit_text_centered(screen, font, label, (0, 0, 0), rect.center)
                     travel_overlay['option_rects'].append((rect, (label, _cb)))
                     y += 48
 
@@ -1316,7 +1566,7 @@ def main():
                 panel = pygame.Rect(0, 0, pw, ph)
                 panel.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
                 pygame.draw.rect(screen, COLOR_PANEL, panel, border_radius=14)
-                title = font.render(dialog_overlay['title'], True, COLOR_TEXT)
+                title = render_text(font, dialog_overlay['title'], COLOR_TEXT)
                 screen.blit(title, title.get_rect(center=(panel.centerx, panel.y + 28)))
                 # Текст
                 msg = dialog_overlay.get('message', '')
@@ -1325,7 +1575,7 @@ def main():
                 maxw = panel.w - 48
                 for para in msg.split('\n'):
                     for line in wrap_text(font, para, maxw):
-                        screen.blit(font.render(line, True, COLOR_TEXT), (panel.x + 24, y))
+                        blit_text(screen, font, line, COLOR_TEXT, (panel.x + 24, y))
                         y += 24
                 # Опции
                 dialog_overlay['option_rects'] = []
@@ -1333,7 +1583,7 @@ def main():
                 for label, _cb in dialog_overlay['options']:
                     rect = pygame.Rect(panel.x + 24, y, panel.w - 48, 40)
                     pygame.draw.rect(screen, COLOR_ACCENT, rect, border_radius=8)
-                    screen.blit(font.render(label, True, (0,0,0)), font.render(label, True, (0,0,0)).get_rect(center=rect.center))
+                    blit_text_centered(screen, font, label, (0, 0, 0), rect.center)
                     dialog_overlay['option_rects'].append((rect, (label, _cb)))
                     y += 48
 
@@ -1342,62 +1592,94 @@ def main():
                 # Прямоугольник-кнопка пропуска обучения
                 skip_rect = pygame.Rect(WINDOW_WIDTH//2 - 140, 300, 280, 36)
                 pygame.draw.rect(screen, (240, 200, 80), skip_rect, border_radius=8)
-                screen.blit(font.render("Пропустить обучение", True, (0,0,0)), font.render("Пропустить обучение", True, (0,0,0)).get_rect(center=skip_rect.center))
+                blit_text_centered(screen, font, "Пропустить обучение", (0, 0, 0), skip_rect.center)
                 if pygame.mouse.get_pressed()[0] and skip_rect.collidepoint(mouse_pos):
                     tutorial_active = False
                     for b in buttons:
                         b.enabled = True
+            lap("overlays")
         elif active_tab == 'log':
             # Режим ЖУРНАЛ
             log_panel = pygame.Rect(20, 64, WINDOW_WIDTH - 40, WINDOW_HEIGHT - 84)
             pygame.draw.rect(screen, COLOR_PANEL, log_panel, border_radius=12)
-            screen.blit(font.render("Журнал событий", True, COLOR_TEXT), (log_panel.x + 16, log_panel.y + 12))
+            blit_text(screen, font, "Журнал событий", COLOR_TEXT, (log_panel.x + 16, log_panel.y + 12))
             # Область прокрутки
             inner = pygame.Rect(log_panel.x + 16, log_panel.y + 44, log_panel.w - 32, log_panel.h - 60)
             pygame.draw.rect(screen, (28, 30, 36), inner, border_radius=8)
-            # Рисуем события с прокруткой
-            y = inner.y + 8 - log_scroll
-            line_h = 24
-            for msg in hero.event_log[-500:]:
-                surf = font.render(msg, True, (230, 230, 230))
-                if y + line_h > inner.y and y < inner.bottom:
-                    screen.blit(surf, (inner.x + 10, y))
-                y += line_h
+            # Рисуем только видимые строки всей истории
+            log_scroll = draw_log_view(screen, font, hero.event_log, inner, log_scroll)
+            lap("draw_log_view")
         else:
             # Вкладка КВЕСТЫ
             qp = pygame.Rect(20, 64, WINDOW_WIDTH - 40, WINDOW_HEIGHT - 84)
             pygame.draw.rect(screen, COLOR_PANEL, qp, border_radius=12)
-            screen.blit(font.render("Квесты", True, COLOR_TEXT), (qp.x + 16, qp.y + 12))
+            blit_text(screen, font, "Квесты", COLOR_TEXT, (qp.x + 16, qp.y + 12))
             inner = pygame.Rect(qp.x + 16, qp.y + 44, qp.w - 32, qp.h - 60)
             pygame.draw.rect(screen, (28, 30, 36), inner, border_radius=8)
             y = inner.y + 12
             line_h = 26
-            # Заголовки квестов из hero.quests
-            try:
-                for key, q in hero.quests.items():
-                    if q.get('status') == 'Скрыто':
-                        continue
-                    title = q.get('title', key)
-                    desc = q.get('desc', '')
-                    status = q.get('status', '')
-                    progress = q.get('progress', 0)
-                    target = q.get('target', 0)
-                    screen.blit(font.render(f"{title} — {status}", True, COLOR_TEXT), (inner.x + 10, y))
-                    y += line_h
-                    screen.blit(font.render(f"{desc}", True, (200,200,200)), (inner.x + 18, y))
+            # Квесты из общего каталога, статусы и прогресс — из массивов героя
+            for i, q in enumerate(QUEST_CATALOG):
+                status = hero.quest_status[i]
+                if status == QUEST_HIDDEN:
+                    continue
+                blit_text(screen, font, f"{q.title} — {QUEST_STATUS_LABELS[status]}", COLOR_TEXT, (inner.x + 10, y))
+                y += line_h
+                blit_text(screen, font, q.desc, (200,200,200), (inner.x + 18, y))
+                y += line_h
+                if q.target:
+                    blit_text(screen, font, f"Прогресс: {hero.quest_progress[i]}/{q.target}", (210,210,210), (inner.x + 18, y))
                     y += line_h
-                    if target:
-                        screen.blit(font.render(f"Прогресс: {progress}/{target}", True, (210,210,210)), (inner.x + 18, y))
-                        y += line_h
-                    y += 8
-            except Exception:
-                pass
+                y += 8
 
-        # Оверлеи, требующие таймеров, отсутствуют
+            lap("quests")
 
-        pygame.display.flip()
-        clock.tick(FPS)
+        # Оверлеи, требующие таймеров, отсутствуют
 
+        if hud_on:
+            hud.draw(screen)
+            if low_power:
+                dirty.mark('hud', HUD_RECT, (hud.version,))
+            lap("hud")
+
+        if low_power:
+            rects = dirty.take()
+            if rects:
+                pygame.display.update(rects)
+            lap("present")
+            if not rects and not events and replay_actions is None:
+                # Ничего не изменилось и ввода не было — спим до следующего события
+                event = pygame.event.wait(IDLE_WAIT_MS)
+                if event.type != pygame.NOEVENT:
+                    pygame.event.post(event)
+        else:
+            pygame.display.flip()
+            lap("present")
+        if replay_actions is not None:
+            frame_times.append(time.perf_counter() - frame_start)
+        elif bench_plan:
+            if bench_index < len(bench_plan) and bench_index % per_view >= BENCH_WARMUP:
+                bench_times[bench_plan[bench_index]].append(time.perf_counter() - frame_start)
+            bench_index += 1
+        else:
+            clock.tick(FPS)
+        if timing:
+            hud.timer.end()
+
+    saver.close()
+    session.close()
+    if recorder is not None:
+        print(f"Сессия записана в {recorder.path}")
+    if recording is not None:
+        print_replay_report(frame_times, hero, recording)
+    if bench_plan:
+        report = {view: frame_stats(times) for view, times in bench_times.items()}
+        if args.bench_out:
+            with open(args.bench_out, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        else:
+            for view, stats in report.items():
+                print(f"{view:>12}: {stats.get('frame_ms_avg', 0.0):.3f} мс (p95 {stats.get('frame_ms_p95', 0.0):.3f})")
     pygame.quit()
     sys.exit(0)
 
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Общая подмена методов класса для профилировщика и трассировки.
+
+depooper_profile и depooper_trace оборачивают одни и те же методы Person.
+Если каждый хранит свои «исходные» методы, то выключение не в порядке,
+обратном включению, возвращает на место чужую обёртку, и класс остаётся
+обёрнутым навсегда. Поэтому исходный метод хранится здесь один на всех,
+а каждый владелец регистрирует только фабрику своей обёртки. При любом
+снятии цепочка собирается заново от исходного метода из оставшихся
+слоёв; когда слоёв не осталось, на место возвращается сам исходный метод.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Фабрика обёртки: (имя метода, вложенная функция) → обёртка
+WrapperFactory = Callable[[str, Callable], Callable]
+
+# (класс, имя) → исходный метод из __dict__ класса (None — метод унаследован)
+_originals: Dict[Tuple[type, str], Optional[Callable]] = {}
+# (класс, имя) → слои (владелец, фабрика) в порядке включения
+_layers: Dict[Tuple[type, str], List[Tuple[str, WrapperFactory]]] = {}
+
+
+def _rebuild(cls: type, name: str) -> None:
+    key = (cls, name)
+    layers = _layers.get(key)
+    original = _originals[key]
+    if not layers:
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+        del _originals[key]
+        _layers.pop(key, None)
+        return
+    if original is None:
+        # Унаследованный метод: берём его у предков, не затирая своим атрибутом
+        fn = getattr(super(cls, cls), name)
+    else:
+        fn = original
+    for _, factory in layers:
+        fn = factory(name, fn)
+    setattr(cls, name, fn)
+
+
+def wrap_methods(cls: type, owner: str, methods: Iterable[str], factory: WrapperFactory) -> None:
+    """Обернуть methods класса cls обёртками владельца owner поверх уже стоящих."""
+    for name in methods:
+        key = (cls, name)
+        if key not in _originals:
+            getattr(cls, name)  # AttributeError сразу, а не при сборке цепочки
+            _originals[key] = cls.__dict__.get(name)
+        layers = _layers.setdefault(key, [])
+        layers[:] = [layer for layer in layers if layer[0] != owner]
+        layers.append((owner, factory))
+        _rebuild(cls, name)
+
+
+def unwrap_methods(cls: type, owner: str) -> None:
+    """Снять все обёртки владельца owner с cls; чужие остаются на месте."""
+    for key in [key for key, layers in _layers.items()
+                if key[0] is cls and any(o == owner for o, _ in layers)]:
+        _layers[key] = [layer for layer in _layers[key] if layer[0] != owner]
+        _rebuild(cls, key[1])
+
+
+def wrapped_by(cls: type, name: str) -> List[str]:
+    """Владельцы обёрток метода name, от внутренней к внешней."""
+    return [owner for owner, _ in _layers.get((cls, name), [])]
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Профилирование действий героя и колбэков GUI (по запросу).
+
+enable() подменяет выбранные методы Person на уровне класса обёртками,
+которые считают вызовы, время (суммарное и перцентили) и число записей
+журнала, добавленных за вызов. disable() снимает только свои обёртки
+(depooper_patch), даже если трассировка включена поверх и ещё работает.
+Пока профилировщик выключен, его обёрток нет вовсе — цена нулевая.
+
+Время и записи журнала считаются включительно: change_money внутри
+drink_coffee попадёт и в свою строку, и в строку drink_coffee.
+
+Колбэки GUI (with_bg_events и кнопки действий) оборачиваются через
+wrap_callback(name, cb) — без профилировщика он возвращает cb как есть.
+
+Включение из окружения: DEPOOPER_PROFILE=1 печатает отчёт в stderr при
+выходе, DEPOOPER_PROFILE=путь.json пишет туда статистику в JSON.
+
+    DEPOOPER_PROFILE=1 python depooper_sim.py --heroes 200 --days 365
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import functools
+from array import array
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from depooper import Person
+from depooper_patch import wrap_methods, unwrap_methods
+
+
+# Что профилируем по умолчанию
+PROFILED_METHODS: Tuple[str, ...] = (
+    "drink_coffee", "eat_food", "smoke", "sleep", "end_of_day_update",
+    "end_of_day_habits", "end_of_day_job", "end_of_day_sleep", "night_binge", "weekly_payout",
+    "random_encounter", "gain_xp", "change_money", "advance_time",
+    "train", "travel", "quest_event", "log_event",
+)
+# Сколько замеров на действие держим для перцентилей (reservoir sampling)
+SAMPLE_LIMIT = 4096
+
+
+class ActionStats:
+    """Счётчики одного действия."""
+
+    __slots__ = ("calls", "total", "max", "log_events", "samples", "_rng")
+
+    def __init__(self, rng: random.Random):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.log_events = 0
+        self.samples = array("d")
+        self._rng = rng
+
+    def add(self, seconds: float, log_events: int) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.log_events += log_events
+        if len(self.samples) < SAMPLE_LIMIT:
+            self.samples.append(seconds)
+        else:
+            # Равномерная выборка из всех вызовов, память не растёт
+            j = self._rng.randrange(self.calls)
+            if j < SAMPLE_LIMIT:
+                self.samples[j] = seconds
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        n = len(ordered)
+
+        def pct(q: float) -> float:
+            return 1e6 * ordered[min(n - 1, int(q * n))] if n else 0.0
+
+        return {
+            "calls": self.calls,
+            "total_ms": 1000.0 * self.total,
+            "mean_us": 1e6 * self.total / self.calls if self.calls else 0.0,
+            "p50_us": pct(0.50),
+            "p95_us": pct(0.95),
+            "p99_us": pct(0.99),
+            "max_us": 1e6 * self.max,
+            "log_events": self.log_events,
+        }
+
+
+class Profiler:
+    """Набор ActionStats по именам; сам ничего не подменяет (см. enable)."""
+
+    def __init__(self):
+        # Свой генератор для выборки — случайность героев не трогаем
+        self._rng = random.Random(0)
+        self.actions: Dict[str, ActionStats] = {}
+        self.started = time.perf_counter()
+
+    def stats_for(self, name: str) -> ActionStats:
+        stats = self.actions.get(name)
+        if stats is None:
+            stats = self.actions[name] = ActionStats(self._rng)
+        return stats
+
+    def reset(self) -> None:
+        self.actions.clear()
+        self.started = time.perf_counter()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Статистика по действиям, по убыванию суммарного времени."""
+        items = sorted(((name, s) for name, s in self.actions.items() if s.calls),
+                       key=lambda kv: kv[1].total, reverse=True)
+        return {name: s.summary() for name, s in items}
+
+    def report(self) -> str:
+        lines = [f"{'действие':<32}{'вызовы':>10}{'всего мс':>12}{'сред мкс':>10}"
+                 f"{'p50':>9}{'p95':>9}{'p99':>9}{'макс':>10}{'журнал':>9}"]
+        for name, s in self.stats().items():
+            lines.append(f"{name[:31]:<32}{s['calls']:>10}{s['total_ms']:>12.2f}{s['mean_us']:>10.2f}"
+                         f"{s['p50_us']:>9.2f}{s['p95_us']:>9.2f}{s['p99_us']:>9.2f}"
+                         f"{s['max_us']:>10.1f}{s['log_events']:>9}")
+        lines.append(f"прошло {time.perf_counter() - self.started:.3f} с")
+        return "\n".join(lines)
+
+    def dump(self, path: Optional[str] = None) -> None:
+        """Отчёт в stderr или JSON в файл path."""
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.stats(), f, ensure_ascii=False, indent=2)
+        else:
+            print(self.report(), file=sys.stderr)
+
+
+# Активный профилировщик
+_active: Optional[Profiler] = None
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def _wrap_method(fn: Callable, stats: ActionStats) -> Callable:
+    perf = time.perf_counter
+    add = stats.add
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        log = self.event_log
+        before = log.total
+        t0 = perf()
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            add(perf() - t0, log.total - before)
+
+    return wrapper
+
+
+def enable(profiler: Optional[Profiler] = None, methods: Iterable[str] = PROFILED_METHODS) -> Profiler:
+    """Включить профилирование: обернуть methods класса Person."""
+    global _active
+    if _active is not None:
+        disable()
+    _active = profiler or Profiler()
+    stats_for = _active.stats_for
+    wrap_methods(Person, "profile", methods, lambda name, fn: _wrap_method(fn, stats_for(name)))
+    return _active
+
+
+def disable() -> Optional[Profiler]:
+    """Снять свои обёртки; возвращает собранную статистику."""
+    global _active
+    unwrap_methods(Person, "profile")
+    profiler, _active = _active, None
+    return profiler
+
+
+def wrap_callback(name: str, cb: Callable[[], Any], hero: Optional[Person] = None) -> Callable[[], Any]:
+    """Обернуть колбэк GUI; без активного профилировщика — cb без изменений.
+
+    hero нужен только чтобы посчитать записи журнала за вызов.
+    """
+    if _active is None:
+        return cb
+    perf = time.perf_counter
+    add = _active.stats_for(name).add
+
+    @functools.wraps(cb)
+    def wrapper():
+        before = hero.event_log.total if hero is not None else 0
+        t0 = perf()
+        try:
+            return cb()
+        finally:
+            add(perf() - t0, hero.event_log.total - before if hero is not None else 0)
+
+    return wrapper
+
+
+def enable_from_env(environ: Optional[Dict[str, str]] = None) -> Optional[Profiler]:
+    """Включить профилирование по DEPOOPER_PROFILE и сдать отчёт при выходе."""
+    value = (environ if environ is not None else os.environ).get("DEPOOPER_PROFILE", "")
+    if value in ("", "0"):
+        return None
+    profiler = enable()
+    path = None if value == "1" else value
+    atexit.register(profiler.dump, path)
+    return profiler
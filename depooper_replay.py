@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Запись и воспроизведение игровых сессий.
+
+Всё, что GUI или консоль меняют в герое, проходит через Session.act(имя,
+*аргументы): действия Person, выборы в рабочей смене, броски фоновых встреч.
+ActionRecorder пишет этот поток в JSON Lines:
+
+    {"format": "depooper-actions", "version": 1, "seed": ..., "name": ...}
+    ["drink_coffee", ["instant"]]
+    ["work_choice", [1]]
+    ...
+    {"end": {"actions": N, "digest": "..."}}
+
+Случайность героя идёт из RandomStream(seed), поэтому тот же поток действий
+на новом герое с тем же сидом даёт то же состояние. replay() прогоняет запись
+без графики с максимальной скоростью и сверяет отпечаток состояния с
+записанным — баг-репорт игрока повторяется в точности. Тот же поток можно
+проиграть через GUI (depooper_gui.py --replay) как бенчмарк кадра.
+
+Запуск:
+    python depooper_replay.py session.jsonl
+    python depooper_replay.py session.jsonl --repeat 50
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from depooper import Person, NULL_SINK, RandomStream, WorkShift
+import depooper_profile
+import depooper_trace
+
+
+FORMAT = "depooper-actions"
+FORMAT_VERSION = 1
+
+# Методы Person, которые можно вызывать через Session.act
+PERSON_ACTIONS = frozenset({
+    "drink_coffee", "consume_coffee", "buy_coffee_machine", "smoke", "eat", "eat_food",
+    "sleep", "train", "train_gym", "train_park", "read_in_library", "attempt_to_kick_habit",
+    "end_of_day_update", "reset_daily_counters", "apply_difficulty", "advance_time",
+    "random_encounter", "roll_chance", "roll_dice", "travel", "enter_location",
+    "take_microloan", "repay_loan", "log_event", "load_state_dict",
+})
+# Действия самой сессии (см. Session.start/start_work/work_choice)
+SESSION_ACTIONS = frozenset({"start", "start_work", "work_choice"})
+
+
+def state_digest(hero: Person) -> str:
+    """Отпечаток сохраняемого состояния героя (включая журнал)."""
+    blob = json.dumps(hero.state_dict(), sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class ActionRecorder:
+    """Пишет поток действий сессии в файл JSON Lines.
+
+    Строка сбрасывается на диск после каждого действия, чтобы запись
+    пережила падение игры — ради этого она и ведётся.
+    """
+
+    def __init__(self, path: str, seed: int, name: str, **meta: Any):
+        self.path = path
+        self.actions = 0
+        self._f = open(path, "w", encoding="utf-8")
+        header = {"format": FORMAT, "version": FORMAT_VERSION, "seed": seed, "name": name}
+        header.update(meta)
+        self._write(header)
+
+    def _write(self, obj: Any) -> None:
+        self._f.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+        self._f.write("\n")
+        self._f.flush()
+
+    def record(self, action: str, args: Tuple[Any, ...]) -> None:
+        self._write([action, list(args)])
+        self.actions += 1
+
+    def close(self, hero: Optional[Person] = None) -> None:
+        if self._f.closed:
+            return
+        end: Dict[str, Any] = {"actions": self.actions}
+        if hero is not None:
+            end["digest"] = state_digest(hero)
+        self._write({"end": end})
+        self._f.close()
+
+
+class Session:
+    """Герой, его текущая рабочая смена и (необязательно) запись действий."""
+
+    def __init__(self, hero: Person, recorder: Optional[ActionRecorder] = None):
+        self.hero = hero
+        self.shift = WorkShift()
+        self.recorder = recorder
+
+    def act(self, action: str, *args: Any) -> Any:
+        """Выполнить действие и, если идёт запись, занести его в поток."""
+        if action in SESSION_ACTIONS:
+            fn = getattr(self, action)
+        elif action in PERSON_ACTIONS:
+            fn = getattr(self.hero, action)
+        else:
+            raise ValueError(f"Неизвестное действие: {action}")
+        if self.recorder is not None:
+            self.recorder.record(action, args)
+        return fn(*args)
+
+    def record(self, action: str, *args: Any) -> None:
+        """Занести в поток действие, уже выполненное в обход act().
+
+        Так записывается, например, загрузка сохранения: файл при повторе
+        может не найтись, поэтому пишем сразу загруженное состояние.
+        """
+        if self.recorder is not None:
+            self.recorder.record(action, args)
+
+    def close(self) -> None:
+        self.hero.event_log.close()
+        if self.recorder is not None:
+            self.recorder.close(self.hero)
+            self.recorder = None
+
+    # --- Действия сессии ---
+    def start(self, name: str, difficulty: str) -> None:
+        self.hero.name = name
+        self.hero.apply_difficulty(difficulty)
+
+    def start_work(self) -> bool:
+        return self.shift.start(self.hero)
+
+    def work_choice(self, index: int) -> None:
+        self.shift.choose(self.hero, index)
+
+
+@dataclass
+class Recording:
+    seed: int
+    name: str
+    meta: Dict[str, Any]
+    actions: List[Tuple[str, List[Any]]]
+    digest: Optional[str] = None
+
+    def new_hero(self) -> Person:
+        """Свежий герой в том же стартовом состоянии, что и при записи."""
+        return Person(name=self.name, log_sink=NULL_SINK, rng=RandomStream(self.seed))
+
+
+def read_session(path: str) -> Recording:
+    """Прочитать запись. Оборванный хвост (игра упала) не мешает — берём что есть."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != FORMAT:
+            raise ValueError(f"{path}: это не запись сессии")
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{path}: версия записи {header['version']} новее поддерживаемой {FORMAT_VERSION}")
+        actions: List[Tuple[str, List[Any]]] = []
+        digest = None
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                break
+            if isinstance(item, dict):
+                digest = item.get("end", {}).get("digest")
+                break
+            actions.append((item[0], item[1]))
+    meta = {k: v for k, v in header.items() if k not in ("format", "version", "seed", "name")}
+    return Recording(int(header["seed"]), header.get("name", "Артем"), meta, actions, digest)
+
+
+@dataclass
+class ReplayResult:
+    hero: Person
+    actions: int
+    seconds: float
+    digest: str
+    expected: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Совпал ли отпечаток с записанным (если он был записан)."""
+        return self.expected is None or self.digest == self.expected
+
+
+def replay(recording: Recording) -> ReplayResult:
+    """Прогнать запись через Person без графики."""
+    session = Session(recording.new_hero())
+    act = session.act
+    t0 = time.perf_counter()
+    for action, args in recording.actions:
+        act(action, *args)
+    seconds = time.perf_counter() - t0
+    return ReplayResult(session.hero, len(recording.actions), seconds,
+                        state_digest(session.hero), recording.digest)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Воспроизведение записанной сессии без GUI")
+    parser.add_argument("path")
+    parser.add_argument("--repeat", type=int, default=1, help="прогнать запись N раз (для замеров)")
+    args = parser.parse_args(argv)
+
+    depooper_profile.enable_from_env()
+    depooper_trace.enable_from_env()
+    recording = read_session(args.path)
+    total = 0.0
+    result = None
+    for _ in range(max(1, args.repeat)):
+        result = replay(recording)
+        total += result.seconds
+    assert result is not None
+    runs = max(1, args.repeat)
+    print(f"{'actions':>20}: {result.actions}")
+    print(f"{'days':>20}: {result.hero.days_elapsed}")
+    print(f"{'seconds_per_run':>20}: {total / runs:.6f}")
+    if total > 0:
+        print(f"{'actions_per_sec':>20}: {result.actions * runs / total:.1f}")
+    print(f"{'digest':>20}: {result.digest}")
+    if result.expected is None:
+        print(f"{'check':>20}: нет отпечатка (запись оборвана)")
+        return 0
+    print(f"{'check':>20}: {'OK' if result.ok else 'MISMATCH ' + result.expected}")
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,720 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Компактный версионированный формат сохранения.
+
+Файл:
+    заголовок   MAGIC, версия формата, число секций
+    секция META поля сессии GUI (день, позиция на сетке, сложность...)
+    секция HERO типизированные поля героя: имя, код типа, значение
+    секция LOG  журнал событий, сжатый zlib пачками по LOG_BATCH записей
+
+Поля пишутся вместе с кодом типа, а при загрузке сверяются со схемой,
+собранной из полей dataclass Person: неизвестные поля пропускаются,
+изменившийся тип приводится к объявленному. Журнал пишется и читается
+потоково — в памяти одновременно живёт только одна пачка записей.
+
+Старые сохранения savegame.json по-прежнему читаются (см. load).
+
+Запись атомарная: файл пишется рядом во временный и подменяется через
+os.replace. AutosaveService делает снимок героя на главном потоке,
+а сериализует и пишет его в фоновом потоке.
+
+Для долгих кампаний есть SaveJournal: сегмент начинается с полного снимка,
+дальше в него дописываются только изменившиеся поля и новые записи журнала.
+"""
+
+import io
+import os
+import sys
+import copy
+import json
+import struct
+import threading
+import zlib
+from array import array
+from dataclasses import dataclass, fields
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from depooper import Person, TRANSIENT_FIELDS
+
+
+MAGIC = b"DPSV"
+VERSION = 1
+LOG_BATCH = 512
+
+_HEADER = struct.Struct("<4sHH")   # magic, версия, число секций
+_SECTION = struct.Struct("<4sI")   # тег, длина (для LOG — 0, дальше идут пачки)
+_U32 = struct.Struct("<I")
+_LOG_RECORD = struct.Struct("<iiIB")  # день, минута, id шаблона, число аргументов
+_FRAME = struct.Struct("<II")  # длина и crc32 дельта-кадра журнала сохранений
+
+# Коды типов значений
+T_BOOL = b"?"
+T_INT = b"q"
+T_FLOAT = b"d"
+T_STR = b"s"
+T_BYTES = b"y"  # bytearray (статусы квестов)
+T_ARRAY = b"a"  # array.array: код типа элементов + байты little-endian
+T_JSON = b"j"  # словари и прочие вложенные структуры
+
+_SCALARS = {
+    T_BOOL: struct.Struct("<?"),
+    T_INT: struct.Struct("<q"),
+    T_FLOAT: struct.Struct("<d"),
+}
+_PY_TYPES = {T_BOOL: bool, T_INT: int, T_FLOAT: float, T_STR: str}
+_MUTABLE = (T_BYTES, T_ARRAY, T_JSON)  # такие значения в снимок копируются
+
+
+class SaveFormatError(ValueError):
+    """Файл не является сохранением или повреждён."""
+
+
+def type_code(value: Any) -> bytes:
+    """Код типа для значения (bool проверяем раньше int)."""
+    if isinstance(value, bool):
+        return T_BOOL
+    if isinstance(value, int) and -2**63 <= value < 2**63:
+        return T_INT
+    if isinstance(value, float):
+        return T_FLOAT
+    if isinstance(value, str):
+        return T_STR
+    if isinstance(value, (bytes, bytearray)):
+        return T_BYTES
+    if isinstance(value, array):
+        return T_ARRAY
+    return T_JSON
+
+
+def _schema_code(tp: Any) -> bytes:
+    for code, py in _PY_TYPES.items():
+        if tp is py:
+            return code
+    if tp is bytearray:
+        return T_BYTES
+    if tp is array:
+        return T_ARRAY
+    return T_JSON
+
+
+# Схема героя: имя поля → код типа; рантайм-поля и журнал сюда не входят
+HERO_SCHEMA: Dict[str, bytes] = {
+    f.name: _schema_code(f.type)
+    for f in fields(Person)
+    if f.name not in TRANSIENT_FIELDS and f.name != "event_log"
+}
+
+
+# --- Кодирование значений ---
+def _pack_str(s: str) -> bytes:
+    raw = s.encode("utf-8")
+    return _U32.pack(len(raw)) + raw
+
+
+def pack_value(code: bytes, value: Any) -> bytes:
+    if code in _SCALARS:
+        return _SCALARS[code].pack(value)
+    if code == T_STR:
+        return _pack_str(value)
+    if code == T_BYTES:
+        return _U32.pack(len(value)) + bytes(value)
+    if code == T_ARRAY:
+        if sys.byteorder != "little":
+            value = array(value.typecode, value)
+            value.byteswap()
+        raw = value.tobytes()
+        return value.typecode.encode("ascii") + _U32.pack(len(raw)) + raw
+    return _pack_str(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+
+def unpack_value(code: bytes, buf: bytes, pos: int) -> Tuple[Any, int]:
+    if code in _SCALARS:
+        st = _SCALARS[code]
+        return st.unpack_from(buf, pos)[0], pos + st.size
+    if code == T_ARRAY:
+        typecode = buf[pos:pos + 1].decode("ascii")
+        (n,) = _U32.unpack_from(buf, pos + 1)
+        pos += 1 + _U32.size
+        value = array(typecode)
+        value.frombytes(buf[pos:pos + n])
+        if sys.byteorder != "little":
+            value.byteswap()
+        return value, pos + n
+    if code not in (T_STR, T_JSON, T_BYTES):
+        raise SaveFormatError(f"Неизвестный код типа: {code!r}")
+    (n,) = _U32.unpack_from(buf, pos)
+    pos += _U32.size
+    if code == T_BYTES:
+        return bytearray(buf[pos:pos + n]), pos + n
+    text = buf[pos:pos + n].decode("utf-8")
+    return (text if code == T_STR else json.loads(text)), pos + n
+
+
+def pack_fields(values: Dict[str, Any]) -> bytes:
+    """Словарь → [число полей][имя, код типа, значение]..."""
+    out = [_U32.pack(len(values))]
+    for name, value in values.items():
+        code = type_code(value)
+        out.append(_pack_str(name))
+        out.append(code)
+        out.append(pack_value(code, value))
+    return b"".join(out)
+
+
+def unpack_fields(buf: bytes) -> Dict[str, Any]:
+    (count,) = _U32.unpack_from(buf, 0)
+    pos = _U32.size
+    values: Dict[str, Any] = {}
+    for _ in range(count):
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        name = buf[pos:pos + n].decode("utf-8")
+        pos += n
+        code = buf[pos:pos + 1]
+        pos += 1
+        values[name], pos = unpack_value(code, buf, pos)
+    return values
+
+
+def coerce_to_schema(values: Dict[str, Any], schema: Dict[str, bytes]) -> Dict[str, Any]:
+    """Оставить только поля схемы и привести их к объявленным типам."""
+    out: Dict[str, Any] = {}
+    for name, value in values.items():
+        code = schema.get(name)
+        if code is None:
+            continue
+        try:
+            if code == T_BYTES and not isinstance(value, bytearray):
+                value = bytearray(value)
+            elif code == T_ARRAY and not isinstance(value, array):
+                value = array("l", value)
+            else:
+                py = _PY_TYPES.get(code)
+                if py is not None and type(value) is not py:
+                    value = py(value)
+        except (TypeError, ValueError, OverflowError):
+            continue
+        out[name] = value
+    return out
+
+
+def apply_hero_fields(hero: Person, values: Dict[str, Any]) -> None:
+    """Записать в героя поля из файла: по схеме, со старыми квестами-словарями."""
+    if isinstance(values.get("quests"), dict):
+        hero.load_legacy_quests(values["quests"])
+    for name, value in coerce_to_schema(values, HERO_SCHEMA).items():
+        setattr(hero, name, value)
+
+
+# --- Журнал ---
+def _pack_arg(value: Any) -> bytes:
+    code = type_code(value)
+    if code == T_JSON:
+        code, value = T_STR, str(value)
+    return code + pack_value(code, value)
+
+
+def _encode_log_batch(records: Iterable[tuple], codes: Dict[str, int]) -> bytes:
+    out = []
+    for day, minute, code, args in records:
+        code_id = codes.get(code)
+        if code_id is None:
+            code_id = codes[code] = len(codes)
+            out.append(_LOG_RECORD.pack(day, minute, code_id, len(args)))
+            out.append(_pack_str(code))
+        else:
+            out.append(_LOG_RECORD.pack(day, minute, code_id, len(args)))
+        for a in args:
+            out.append(_pack_arg(a))
+    return b"".join(out)
+
+
+def _decode_log_batch(buf: bytes, codes: List[str]) -> Iterator[tuple]:
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        day, minute, code_id, argc = _LOG_RECORD.unpack_from(buf, pos)
+        pos += _LOG_RECORD.size
+        if code_id == len(codes):
+            code, pos = unpack_value(T_STR, buf, pos)
+            codes.append(code)
+        args = []
+        for _ in range(argc):
+            tag = buf[pos:pos + 1]
+            value, pos = unpack_value(tag, buf, pos + 1)
+            args.append(value)
+        yield (day, minute, codes[code_id], tuple(args))
+
+
+def write_log(f: BinaryIO, records: Iterable[tuple], batch: int = LOG_BATCH) -> None:
+    """Пачки записей через общий компрессор: [длина][сжатые байты]..., в конце 0.
+
+    После каждой пачки Z_SYNC_FLUSH, так что при чтении пачку можно
+    распаковать целиком, не дожидаясь конца секции.
+    """
+    comp = zlib.compressobj(6)
+    codes: Dict[str, int] = {}
+    chunk: List[tuple] = []
+
+    def emit() -> None:
+        data = comp.compress(_encode_log_batch(chunk, codes)) + comp.flush(zlib.Z_SYNC_FLUSH)
+        f.write(_U32.pack(len(data)))
+        f.write(data)
+        chunk.clear()
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= batch:
+            emit()
+    if chunk:
+        emit()
+    f.write(_U32.pack(0))
+
+
+def read_log(f: BinaryIO) -> Iterator[tuple]:
+    """Обратное к write_log: отдаёт записи по мере распаковки пачек."""
+    decomp = zlib.decompressobj()
+    codes: List[str] = []
+    while True:
+        (n,) = _U32.unpack(_read_exact(f, _U32.size))
+        if n == 0:
+            return
+        yield from _decode_log_batch(decomp.decompress(_read_exact(f, n)), codes)
+
+
+# --- Файл целиком ---
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise SaveFormatError("Сохранение обрезано")
+    return data
+
+
+def _write_section(f: BinaryIO, tag: bytes, payload: bytes) -> None:
+    f.write(_SECTION.pack(tag, len(payload)))
+    f.write(payload)
+
+
+@dataclass
+class SaveSnapshot:
+    """Неизменяемая копия всего, что попадает в файл сохранения."""
+    meta: Dict[str, Any]
+    state: Dict[str, Any]
+    records: List[tuple]
+
+
+def snapshot(hero: Person, meta: Optional[Dict[str, Any]] = None) -> SaveSnapshot:
+    """Дешёвый снимок героя: скаляры как есть, вложенные структуры — копией.
+
+    Записи журнала — кортежи, их достаточно скопировать списком; вытесненные
+    из журнала к этому моменту дописываются в его spill_path.
+    """
+    state: Dict[str, Any] = {}
+    for name, code in HERO_SCHEMA.items():
+        value = getattr(hero, name)
+        state[name] = copy.deepcopy(value) if code in _MUTABLE else value
+    hero.event_log.flush()
+    return SaveSnapshot(dict(meta or {}), state, hero.event_log.records())
+
+
+def write_snapshot(f: BinaryIO, snap: SaveSnapshot) -> None:
+    f.write(_HEADER.pack(MAGIC, VERSION, 3))
+    _write_section(f, b"META", pack_fields(snap.meta))
+    _write_section(f, b"HERO", pack_fields(snap.state))
+    f.write(_SECTION.pack(b"LOG_", 0))
+    write_log(f, snap.records)
+
+
+def write_save(f: BinaryIO, hero: Person, meta: Optional[Dict[str, Any]] = None) -> None:
+    """Записать героя и поля сессии в открытый бинарный поток."""
+    write_snapshot(f, snapshot(hero, meta))
+
+
+def read_save(f: BinaryIO, hero: Person) -> Dict[str, Any]:
+    """Загрузить героя из потока; возвращает поля сессии (META)."""
+    magic, version, sections = _HEADER.unpack(_read_exact(f, _HEADER.size))
+    if magic != MAGIC:
+        raise SaveFormatError("Не похоже на файл сохранения")
+    if version > VERSION:
+        raise SaveFormatError(f"Сохранение версии {version} новее игры (поддерживается {VERSION})")
+    meta: Dict[str, Any] = {}
+    for _ in range(sections):
+        tag, length = _SECTION.unpack(_read_exact(f, _SECTION.size))
+        if tag == b"LOG_":
+            hero.event_log.clear()
+            for record in read_log(f):
+                hero.event_log.push(record)
+        elif tag == b"HERO":
+            apply_hero_fields(hero, unpack_fields(_read_exact(f, length)))
+        elif tag == b"META":
+            meta = unpack_fields(_read_exact(f, length))
+        else:
+            f.seek(length, io.SEEK_CUR)  # секция из будущей версии
+    hero.touch()
+    return meta
+
+
+def write_atomic(path: str, snap: SaveSnapshot) -> None:
+    """Пишем во временный файл рядом и подменяем: старое сохранение целое до последнего момента."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write_snapshot(f, snap)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save(path: str, hero: Person, meta: Optional[Dict[str, Any]] = None) -> None:
+    write_atomic(path, snapshot(hero, meta))
+
+
+def load(path: str, hero: Person) -> Dict[str, Any]:
+    """Загрузить сохранение любого формата: бинарного или старого JSON."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            f.seek(0)
+            return read_save(f, hero)
+    return load_legacy_json(path, hero)
+
+
+def load_newest(sources: Sequence[Union[str, "SaveJournal"]], hero: Person,
+                fallbacks: Sequence[str] = ()) -> Tuple[str, Dict[str, Any]]:
+    """Загрузить самое свежее из существующих сохранений (файлов или SaveJournal).
+
+    Повреждённые файлы пропускаются — тогда берётся следующий по времени.
+    fallbacks (например, старый savegame.json) пробуются только после всех
+    sources, как бы свежи они ни были. Возвращает (путь, поля сессии).
+    """
+    def mtime(src) -> float:
+        return src.mtime() if isinstance(src, SaveJournal) else os.path.getmtime(src)
+
+    def exists(src) -> bool:
+        return bool(src.segment_paths()) if isinstance(src, SaveJournal) else os.path.exists(src)
+
+    existing = sorted((s for s in sources if exists(s)), key=mtime, reverse=True)
+    existing += [s for s in fallbacks if exists(s)]
+    errors = []
+    for src in existing:
+        try:
+            if isinstance(src, SaveJournal):
+                return src.directory, src.load(hero)
+            return src, load(src, hero)
+        except (SaveFormatError, ValueError, struct.error, zlib.error) as e:
+            errors.append(f"{src}: {e}")
+    if errors:
+        raise SaveFormatError("; ".join(errors))
+    raise FileNotFoundError(str(sources[0]) if sources else "")
+
+
+def load_legacy_json(path: str, hero: Person) -> Dict[str, Any]:
+    """Старый savegame.json: {'hero': {...}, 'day_counter': ..., ...}."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    hero_state = data.pop("hero", {})
+    if "event_log" in hero_state:
+        hero.event_log.load_list(hero_state.pop("event_log"))
+    apply_hero_fields(hero, hero_state)
+    hero.touch()
+    return data
+
+
+# --- Журнал сохранений: снимок + дельты ---
+@dataclass
+class JournalEntry:
+    """Что дописать в журнал: полный снимок (новый сегмент) или дельта-кадр."""
+    snapshot: Optional[SaveSnapshot] = None
+    frame: bytes = b""
+
+
+def _encode_frame(meta: Dict[str, Any], delta: Dict[str, Any], records: List[tuple]) -> bytes:
+    payload = b"".join((
+        pack_fields(meta),
+        pack_fields(delta),
+        _U32.pack(len(records)),
+        _encode_log_batch(records, {}),
+    ))
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_frames(f: BinaryIO) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], List[tuple]]]:
+    """Дельта-кадры до конца файла; недописанный хвост (обрыв записи) отбрасывается."""
+    while True:
+        head = f.read(_FRAME.size)
+        if len(head) < _FRAME.size:
+            return
+        length, crc = _FRAME.unpack(head)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        meta = unpack_fields(payload)
+        pos = _fields_end(payload, 0)
+        delta = unpack_fields(payload[pos:])
+        pos = _fields_end(payload, pos)
+        (count,) = _U32.unpack_from(payload, pos)
+        records = list(_decode_log_batch(payload[pos + _U32.size:], []))
+        if len(records) != count:
+            return
+        yield meta, delta, records
+
+
+def _fields_end(buf: bytes, pos: int) -> int:
+    """Позиция сразу за блоком pack_fields, начинающимся с pos."""
+    (count,) = _U32.unpack_from(buf, pos)
+    pos += _U32.size
+    for _ in range(count):
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += _U32.size + n
+        code = buf[pos:pos + 1]
+        _value, pos = unpack_value(code, buf, pos + 1)
+    return pos
+
+
+class SaveJournal:
+    """Сохранения долгой кампании: снимок раз в snapshot_every_days дней + дельты.
+
+    Каждый сегмент segNNNNNN.sav — обычный файл сохранения (его читает и
+    load()), за которым идут дельта-кадры: поля сессии, изменившиеся с
+    прошлой записи поля героя и новые записи журнала событий. Цена записи
+    зависит от того, что изменилось за день, а не от длины игры.
+    Загрузка — последний целый снимок плюс его хвост. Хранится keep_segments
+    последних сегментов.
+
+    record() считает дельту (дёшево, на главном потоке), write() дописывает
+    её на диск; commit() делает и то, и другое.
+    """
+
+    def __init__(self, directory: str, snapshot_every_days: int = 7, keep_segments: int = 2):
+        self.directory = directory
+        self.snapshot_every_days = max(1, int(snapshot_every_days))
+        self.keep_segments = max(1, int(keep_segments))
+        self._base: Optional[Dict[str, Any]] = None  # состояние на момент последней записи
+        self._log_total = 0
+        self._segment_day = 0
+        paths = self.segment_paths()
+        self._segment = self._segment_index(paths[-1]) if paths else 0
+
+    @staticmethod
+    def _segment_index(path: str) -> int:
+        return int(os.path.basename(path)[3:-4])
+
+    def segment_paths(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("seg") and n.endswith(".sav"))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def mtime(self) -> float:
+        paths = self.segment_paths()
+        return os.path.getmtime(paths[-1]) if paths else 0.0
+
+    def reset(self) -> None:
+        """Следующая запись начнёт новый сегмент с полного снимка."""
+        self._base = None
+
+    def record(self, hero: Person, meta: Optional[Dict[str, Any]] = None) -> JournalEntry:
+        """Что нужно дописать, чтобы журнал догнал героя."""
+        log = hero.event_log
+        if self._base is None or hero.days_elapsed - self._segment_day >= self.snapshot_every_days:
+            snap = snapshot(hero, meta)
+            # Значения снимка не меняем, только подменяем ключи — копии словаря хватает
+            self._base = dict(snap.state)
+            self._log_total = log.total
+            self._segment_day = hero.days_elapsed
+            return JournalEntry(snapshot=snap)
+        base = self._base
+        delta: Dict[str, Any] = {}
+        for name, code in HERO_SCHEMA.items():
+            value = getattr(hero, name)
+            if value != base[name] or type(value) is not type(base[name]):
+                if code in _MUTABLE:
+                    value = copy.deepcopy(value)
+                delta[name] = base[name] = value
+        new = min(log.total - self._log_total, len(log))
+        records = [log.record(i) for i in range(len(log) - new, len(log))]
+        self._log_total = log.total
+        return JournalEntry(frame=_encode_frame(dict(meta or {}), delta, records))
+
+    def write(self, entry: JournalEntry) -> str:
+        """Дописать запись на диск; возвращает путь сегмента."""
+        if entry.snapshot is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment += 1
+            path = os.path.join(self.directory, f"seg{self._segment:06d}.sav")
+            write_atomic(path, entry.snapshot)
+            for old in self.segment_paths()[:-self.keep_segments]:
+                os.remove(old)
+            return path
+        path = os.path.join(self.directory, f"seg{self._segment:06d}.sav")
+        with open(path, "ab") as f:
+            f.write(entry.frame)
+            f.flush()
+            os.fsync(f.fileno())
+        return path
+
+    def commit(self, hero: Person, meta: Optional[Dict[str, Any]] = None) -> str:
+        return self.write(self.record(hero, meta))
+
+    def load(self, hero: Person) -> Dict[str, Any]:
+        """Последний читаемый снимок + все целые дельты за ним."""
+        errors = []
+        for path in reversed(self.segment_paths()):
+            try:
+                with open(path, "rb") as f:
+                    meta = read_save(f, hero)
+                    for frame_meta, delta, records in _read_frames(f):
+                        meta.update(frame_meta)
+                        apply_hero_fields(hero, delta)
+                        for record in records:
+                            hero.event_log.push(record)
+            except (SaveFormatError, struct.error, zlib.error) as e:
+                errors.append(f"{path}: {e}")
+                continue
+            hero.touch()
+            # Состояние героя могли поменять после загрузки — начнём новый сегмент
+            self.reset()
+            return meta
+        if errors:
+            raise SaveFormatError("; ".join(errors))
+        raise FileNotFoundError(self.directory)
+
+
+# --- Фоновое автосохранение ---
+class AutosaveService:
+    """Сохранение без блокировки кадра.
+
+    request() делает snapshot на главном потоке и сразу возвращается;
+    фоновый поток сериализует снимок и атомарно пишет файл. Если запросы
+    приходят быстрее, чем пишется диск, ждущий снимок для того же файла
+    заменяется свежим (coalesced). Без явного пути снимок уходит в следующий
+    из slots автослотов по кругу, так что пара предыдущих сохранений всегда
+    остаётся на диске.
+
+    Если задан journal (SaveJournal), автосохранения вместо слотов идут
+    в него дельтами; такие записи не склеиваются — каждая опирается на
+    предыдущую — и пишутся строго по порядку. Если запись дельты не удалась,
+    цепочка порвана: фоновый поток только помечает это, а сам журнал
+    (SaveJournal не потокобезопасен) сбрасывается на главном потоке при
+    следующем request(), и очередная запись начинает новый сегмент.
+
+    Итоги записи забираются на главном потоке через poll(); notify, если
+    задан, вызывается из фонового потока после каждой записи (например,
+    чтобы разбудить цикл событий).
+    """
+
+    def __init__(self, path: str, slots: int = 3, notify: Optional[Callable[[], None]] = None,
+                 journal: Optional[SaveJournal] = None):
+        self.path = path
+        self.slots = max(1, int(slots))
+        self.notify = notify
+        self.journal = journal
+        self.coalesced = 0
+        self._cond = threading.Condition()
+        self._pending: Dict[str, SaveSnapshot] = {}  # путь ("" — автослот) → последний снимок
+        self._journal_queue: List[JournalEntry] = []
+        self._results: List[Tuple[str, Optional[Exception]]] = []
+        self._busy = False
+        self._closed = False
+        self._journal_broken = False  # запись дельты не удалась, журнал ждёт reset()
+        self._thread: Optional[threading.Thread] = None
+        # Продолжаем круг после самого свежего существующего слота
+        existing = [(os.path.getmtime(p), i) for i, p in enumerate(self.slot_paths()) if os.path.exists(p)]
+        self._next_slot = (max(existing)[1] + 1) % self.slots if existing else 0
+
+    def slot_paths(self) -> List[str]:
+        base, ext = os.path.splitext(self.path)
+        return [f"{base}.auto{i}{ext}" for i in range(self.slots)]
+
+    def request(self, hero: Person, meta: Optional[Dict[str, Any]] = None, path: Optional[str] = None) -> None:
+        """Поставить сохранение в очередь; path=None — в очередной автослот или журнал."""
+        if path is None and self.journal is not None:
+            with self._cond:
+                broken = self._journal_broken
+            if broken:
+                self.journal.reset()
+            entry, snap = self.journal.record(hero, meta), None
+        else:
+            entry, snap = None, snapshot(hero, meta)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AutosaveService закрыт")
+            if entry is not None:
+                if entry.snapshot is not None:
+                    self._journal_broken = False
+                elif self._journal_broken:
+                    # Дельту посчитали от порванной цепочки, пока её рвал фоновый
+                    # поток; следующий request() сбросит журнал и начнёт со снимка
+                    return
+                self._journal_queue.append(entry)
+            else:
+                key = path or ""
+                if key in self._pending:
+                    self.coalesced += 1
+                self._pending[key] = snap
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def poll(self) -> List[Tuple[str, Optional[Exception]]]:
+        """Завершённые записи: [(путь, None или исключение)]."""
+        with self._cond:
+            results, self._results = self._results, []
+        return results
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться записи всего, что стоит в очереди."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._journal_queue and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Дописать очередь и остановить поток."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            entry: Optional[JournalEntry] = None
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._journal_queue or self._closed)
+                if self._journal_queue:
+                    entry = self._journal_queue.pop(0)
+                elif self._pending:
+                    key = next(iter(self._pending))
+                    snap = self._pending.pop(key)
+                    if not key:
+                        key = self.slot_paths()[self._next_slot]
+                        self._next_slot = (self._next_slot + 1) % self.slots
+                else:
+                    return
+                self._busy = True
+            error: Optional[Exception] = None
+            try:
+                if entry is not None:
+                    key = self.journal.write(entry)
+                else:
+                    write_atomic(key, snap)
+            except Exception as e:  # итог отдаём через poll, поток не должен умирать
+                error = e
+                if entry is not None:
+                    # Цепочка дельт порвана: ждущие дельты опираются на потерянную,
+                    # выбрасываем их до ближайшего снимка. Если снимка в очереди нет,
+                    # журнал сбросит главный поток (request) — здесь его не трогаем
+                    with self._cond:
+                        while self._journal_queue and self._journal_queue[0].snapshot is None:
+                            self._journal_queue.pop(0)
+                        if not self._journal_queue:
+                            self._journal_broken = True
+                    key = self.journal.directory
+            with self._cond:
+                self._busy = False
+                self._results.append((key, error))
+                self._cond.notify_all()
+            if self.notify is not None:
+                self.notify()
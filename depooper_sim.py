@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Headless-прогон симулятора: N героев × M дней без pygame и без вывода в stdout.
+
+Политика действий — любая функция policy(hero, day), которая за день
+вызывает методы Person (кофе, еда, сон и т.д.). Конец дня, сброс счётчиков
+и проверку «смерти» делает сам раннер.
+
+Запуск: python depooper_sim.py --heroes 10000 --days 90 --policy worker
+
+--fast-forward (политики idle и worker) перематывает дни через
+Person.fast_forward: многолетние прогоны не идут по одному дню.
+"""
+
+import sys
+import time
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from depooper import Person, RandomStream, NULL_SINK, QUEST_DONE, DayPlan, FOOD_ACTIONS
+import depooper_profile
+import depooper_trace
+
+
+Policy = Callable[[Person, int], None]
+
+
+# --- Рабочий день без мини-игры GUI ---
+def work_shift(hero: Person, productive: bool = True) -> None:
+    """Упрощённая смена: 10:00–17:00 на работе, итоги как после мини-игры."""
+    hero.work_day(productive)
+
+
+# --- Встроенные политики ---
+def idle_policy(hero: Person, day: int) -> None:
+    """Ничего не делать, только спать."""
+    hero.sleep(8.0)
+
+
+def worker_policy(hero: Person, day: int) -> None:
+    """Работа, сбалансированная еда дважды в день, сон 8 часов."""
+    hero.eat_food("balanced")
+    if hero.employed:
+        work_shift(hero)
+    hero.eat_food("balanced")
+    hero.sleep(8.0)
+
+
+def habit_policy(hero: Person, day: int) -> None:
+    """Живёт как раньше: кофе, сигареты, фастфуд, работа."""
+    hero.drink_coffee("instant")
+    hero.smoke()
+    hero.eat_food("fast")
+    if hero.employed:
+        work_shift(hero)
+    hero.smoke()
+    hero.eat_food("fast")
+    hero.sleep(8.0)
+
+
+def quit_policy(hero: Person, day: int) -> None:
+    """Живёт с привычками, но пытается их бросить, как только можно.
+
+    Бросить кофе пробует с утра, до чашки (в день с кофе попытка запрещена);
+    курение и переедание — после кофе, который поднимает бодрость к порогу
+    попытки. Брошенную привычку больше не трогает.
+    """
+    if hero.can_attempt_to_kick_habit("coffee")[0]:
+        hero.attempt_to_kick_habit("coffee")
+    if hero.has_coffee_habit:
+        hero.drink_coffee("instant")
+    for habit in ("smoking", "overeating"):
+        if hero.can_attempt_to_kick_habit(habit)[0]:
+            hero.attempt_to_kick_habit(habit)
+    food = "fast" if hero.has_overeat_habit else "balanced"
+    if hero.has_smoking_habit:
+        hero.smoke()
+    hero.eat_food(food)
+    if hero.employed:
+        work_shift(hero)
+    if hero.has_smoking_habit:
+        hero.smoke()
+    hero.eat_food(food)
+    hero.sleep(8.0)
+
+
+# Микрозайм должника и его минимальный платёж
+DEBTOR_LOAN = 20000
+DEBTOR_MIN_PAYMENT = 2000
+
+
+def debtor_policy(hero: Person, day: int) -> None:
+    """Как worker, но живёт в долг.
+
+    Берёт микрозайм DEBTOR_LOAN, как только погасил прежний, и наутро после
+    выплаты отдаёт четверть долга (не меньше DEBTOR_MIN_PAYMENT). Проценты
+    растят и долг, и платежи, так что ставка видна в итоговых рублях.
+    """
+    if hero.loan_principal == 0:
+        hero.take_microloan(DEBTOR_LOAN)
+    elif hero.days_elapsed % 7 == 0:
+        hero.repay_loan(min(hero.loan_principal, max(DEBTOR_MIN_PAYMENT, hero.loan_principal // 4)))
+    worker_policy(hero, day)
+
+
+def glutton_policy(hero: Person, day: int) -> None:
+    """Ест четыре раза в день, курит одну за другой и не ложится спать.
+
+    Лишний вес сгоняет в качалке. Без сна бодрость за пару недель падает
+    ниже 30, и ночью переедание (overeating_cost больше 0.5 ч) уводит сон
+    в минус — это бьёт по здоровью. День кончается сигаретой, так что
+    здоровье, сбитое курением, не прикрыто последней едой.
+    """
+    hero.eat_food("super")
+    hero.smoke()
+    hero.eat_food("super")
+    hero.smoke()
+    if hero.employed:
+        work_shift(hero)
+    hero.train("gym")
+    hero.smoke()
+    hero.eat_food("super")
+    hero.smoke()
+    hero.eat_food("super")
+    hero.smoke()
+
+
+POLICIES: Dict[str, Policy] = {
+    "idle": idle_policy,
+    "worker": worker_policy,
+    "habits": habit_policy,
+    "quit": quit_policy,
+    "debtor": debtor_policy,
+    "glutton": glutton_policy,
+}
+# Параметры баланса (и сложность), от которых зависят итоги политики (RunStats).
+# После сна 8 ч бодрость всегда 100, а здоровье, сбитое курением до нуля,
+# тут же поднимает еда или сон — поэтому у idle/worker/habits список пуст:
+# кофе и сигареты там ни на что не влияют, займов они не берут, а
+# overeating_cost без низкой бодрости меняет только sleep_need.
+POLICY_PARAMS: Dict[str, Tuple[str, ...]] = {
+    "idle": (),
+    "worker": (),
+    "habits": (),
+    "quit": ("difficulty", "coffee_benefit", "smoke_penalty", "quit_attempt_cooldown_days"),
+    "debtor": ("loan_weekly_interest_pct",),
+    "glutton": ("difficulty", "smoke_penalty", "overeating_cost"),
+}
+# Те же политики как неизменный распорядок — для --fast-forward (Person.fast_forward)
+PLANS: Dict[str, DayPlan] = {
+    "idle": DayPlan(meals=(), work=False),
+    "worker": DayPlan(meals=("balanced", "balanced"), work=True),
+}
+# Сколько дней перематывать за раз между проверками «смерти»
+FAST_FORWARD_CHUNK = 28
+GAME_OVER_WEIGHT = 120
+
+
+# --- Результаты ---
+@dataclass
+class RunStats:
+    """Итоги одного героя."""
+    name: str
+    days_survived: int
+    survived: bool
+    max_streak: int
+    final_streak: int
+    final_rubles: int
+    final_weight: float
+    main_quest_done: bool
+
+
+@dataclass
+class BatchResult:
+    """Итоги пачки прогонов и пропускная способность."""
+    runs: List[RunStats] = field(default_factory=list)
+    hero_days: int = 0
+    elapsed_sec: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Герое-дней в секунду."""
+        return self.hero_days / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        n = len(self.runs) or 1
+        return {
+            "heroes": len(self.runs),
+            "survival_rate": sum(r.survived for r in self.runs) / n,
+            "main_quest_rate": sum(r.main_quest_done for r in self.runs) / n,
+            "avg_days_survived": sum(r.days_survived for r in self.runs) / n,
+            "avg_max_streak": sum(r.max_streak for r in self.runs) / n,
+            "avg_rubles": sum(r.final_rubles for r in self.runs) / n,
+            "avg_weight": sum(r.final_weight for r in self.runs) / n,
+            "hero_days_per_sec": self.throughput,
+        }
+
+
+def is_game_over(hero: Person) -> bool:
+    """То же условие, что и в консольной версии."""
+    return hero.health_score <= 0 or hero.weight_kg > GAME_OVER_WEIGHT
+
+
+def run_hero(hero: Person, days: int, policy: Policy, keep_log: bool = False) -> RunStats:
+    """Прогнать одного героя до конца срока или до «смерти»."""
+    hero.log_sink = NULL_SINK
+    hero.reset_daily_counters()
+    max_streak = 0
+    survived_days = 0
+    for day in range(days):
+        policy(hero, day)
+        hero.end_of_day_update()
+        hero.reset_daily_counters()
+        if not keep_log:
+            hero.event_log.clear()
+        max_streak = max(max_streak, hero.goal_streak_days)
+        if is_game_over(hero):
+            break
+        survived_days += 1
+    return run_stats(hero, days, survived_days, max_streak)
+
+
+def run_hero_planned(hero: Person, days: int, plan: DayPlan, keep_log: bool = False) -> RunStats:
+    """То же, что run_hero, но дни перематываются кусками через Person.fast_forward.
+
+    Кусок из FAST_FORWARD_CHUNK дней перематывается, только если даже при
+    худшем раскладе (максимум калорий и ночной жор каждый день) вес не
+    перевалит за GAME_OVER_WEIGHT. Ближе к пределу дни идут по одному, так что
+    день «смерти» и её вероятность не искажаются. Здоровье в планах из PLANS
+    не падает, его проверяем после каждого куска.
+    """
+    hero.log_sink = NULL_SINK
+    hero.reset_daily_counters()
+    gain = max_daily_weight_gain(hero, plan)
+    max_streak = 0
+    survived_days = 0
+    while survived_days < days:
+        n = min(FAST_FORWARD_CHUNK, days - survived_days)
+        if n > 1 and hero.weight_kg + n * gain <= GAME_OVER_WEIGHT:
+            hero.fast_forward(n, plan)
+        else:
+            n = 1
+            hero.play_day(plan)
+        if not keep_log:
+            hero.event_log.clear()
+        # В фиксированном плане серия внутри куска только растёт (или всё время 0)
+        max_streak = max(max_streak, hero.goal_streak_days)
+        if is_game_over(hero):
+            survived_days += n - 1
+            break
+        survived_days += n
+    return run_stats(hero, days, survived_days, max_streak)
+
+
+def max_daily_weight_gain(hero: Person, plan: DayPlan) -> float:
+    """Сколько кг герой может набрать за день плана в худшем случае."""
+    meals = [FOOD_ACTIONS.get(kind) or FOOD_ACTIONS["fast"] for kind in plan.meals]
+    calories = sum(m.calories_max for m in meals)
+    if hero.has_overeat_habit and not any(m.binge_protection for m in meals):
+        calories += 1200  # самый большой ночной жор
+    return calories / 7700.0
+
+
+def run_stats(hero: Person, days: int, survived_days: int, max_streak: int) -> RunStats:
+    return RunStats(
+        name=hero.name,
+        days_survived=survived_days,
+        survived=survived_days == days,
+        max_streak=max_streak,
+        final_streak=hero.goal_streak_days,
+        final_rubles=hero.rubles,
+        final_weight=hero.weight_kg,
+        main_quest_done=hero.quest_state("main") == QUEST_DONE,
+    )
+
+
+def run_batch(heroes: int,
+              days: int,
+              policy: Policy = worker_policy,
+              difficulty: str = "normal",
+              seed: Optional[int] = None,
+              make_hero: Optional[Callable[[int], Person]] = None,
+              keep_log: bool = False,
+              overrides: Optional[Dict[str, Any]] = None,
+              plan: Optional[DayPlan] = None) -> BatchResult:
+    """Прогнать heroes героев по days дней и замерить hero-days/sec.
+
+    overrides — параметры баланса поверх пресета сложности
+    (например {"coffee_benefit": 8, "loan_weekly_interest_pct": 25}).
+    Каждый герой получает свой поток случайности из общего сида, так что
+    прогон воспроизводим и не зависит от глобального random.
+    С plan вместо policy дни перематываются (run_hero_planned).
+    """
+    master = RandomStream(seed)
+    result = BatchResult()
+    t0 = time.perf_counter()
+    for i in range(heroes):
+        hero = make_hero(i) if make_hero else Person(name=f"Герой {i}", log_sink=NULL_SINK)
+        hero.rng = master.spawn()
+        hero.apply_difficulty(difficulty)
+        for key, value in (overrides or {}).items():
+            setattr(hero, key, value)
+        if plan is not None:
+            stats = run_hero_planned(hero, days, plan, keep_log=keep_log)
+        else:
+            stats = run_hero(hero, days, policy, keep_log=keep_log)
+        hero.event_log.close()
+        result.runs.append(stats)
+        result.hero_days += stats.days_survived + (0 if stats.survived else 1)
+    result.elapsed_sec = time.perf_counter() - t0
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless-прогон симулятора")
+    parser.add_argument("--heroes", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="worker")
+    parser.add_argument("--difficulty", choices=["normal", "hardcore"], default="normal")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--fast-forward", action="store_true",
+                        help="перематывать дни политики как неизменного плана (только " + ", ".join(sorted(PLANS)) + ")")
+    args = parser.parse_args(argv)
+    if args.fast_forward and args.policy not in PLANS:
+        parser.error(f"для политики {args.policy} нет плана: --fast-forward работает с {', '.join(sorted(PLANS))}")
+
+    depooper_profile.enable_from_env()
+    depooper_trace.enable_from_env()
+    plan = PLANS[args.policy] if args.fast_forward else None
+    result = run_batch(args.heroes, args.days, POLICIES[args.policy], args.difficulty, args.seed, plan=plan)
+    for key, value in result.summary().items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
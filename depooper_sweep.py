@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Параллельные Монте-Карло прогоны по сетке параметров баланса.
+
+Сетка — декартово произведение режимов apply_difficulty и значений
+coffee_benefit, smoke_penalty, overeating_cost, loan_weekly_interest_pct,
+quit_attempt_cooldown_days. Перебирать можно только параметры (и больше
+одного режима сложности), от которых зависят итоги выбранной политики
+(depooper_sim.POLICY_PARAMS) — иначе точки сетки не отличались бы ничем,
+кроме шума. Займы берёт политика debtor, переедает glutton, бросает
+привычки quit; у векторного движка те же политики.
+
+Точки сетки (и их шарды) раскидываются по пулу процессов. Сид задачи
+зависит только от номера шарда, так что во всех точках живут одни и те же
+герои с теми же случайными числами: разница между точками — от параметров,
+а результат не зависит от числа воркеров и порядка их завершения. Итоги по
+точке отдаются сразу, как только досчитаны все её шарды.
+
+Запуск: python depooper_sweep.py --difficulty normal hardcore --days 90 --heroes 2000
+        python depooper_sweep.py --policy quit --quit-attempt-cooldown-days 3 7 14
+        python depooper_sweep.py --policy debtor --difficulty normal --loan-weekly-interest-pct 5 20 40
+        python depooper_sweep.py --policy glutton --engine vector --overeating-cost 0.3 1.0 2.0
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import depooper_sim
+
+
+# Параметры баланса, которые можно перебирать (поверх пресета сложности)
+SWEEP_PARAMS = (
+    "coffee_benefit",
+    "smoke_penalty",
+    "overeating_cost",
+    "loan_weekly_interest_pct",
+    "quit_attempt_cooldown_days",
+)
+
+
+def param_grid(difficulty: Sequence[str] = ("normal",), **axes: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Декартово произведение значений: [{'difficulty': ..., 'coffee_benefit': ...}, ...]."""
+    for name in axes:
+        if name not in SWEEP_PARAMS:
+            raise ValueError(f"Неизвестный параметр сетки: {name}")
+    names = ["difficulty"] + list(axes)
+    values = [list(difficulty)] + [list(v) for v in axes.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def check_grid(grid: Sequence[Dict[str, Any]], policy: str, engine: str = "scalar") -> None:
+    """ValueError, если политики нет у движка или она не зависит от параметра сетки."""
+    if engine == "vector":
+        import depooper_vec  # numpy нужен только векторному движку
+        if policy not in depooper_vec.POLICIES:
+            raise ValueError(f"Политики {policy} нет у векторного движка: "
+                             f"есть {', '.join(sorted(depooper_vec.POLICIES))}")
+    reachable = depooper_sim.POLICY_PARAMS.get(policy, ())
+    axes = {name for point in grid for name in point if name != "difficulty"}
+    if len({point["difficulty"] for point in grid}) > 1:
+        axes.add("difficulty")
+    unused = sorted(axes - set(reachable))
+    if unused:
+        fits = [name for name, params in sorted(depooper_sim.POLICY_PARAMS.items()) if set(unused) <= set(params)]
+        hint = f"; подходит политика {', '.join(fits)}" if fits else "; ни одна политика от них не зависит"
+        raise ValueError(f"Итоги политики {policy} не зависят от {', '.join(unused)}{hint}")
+
+
+def task_seed(base_seed: int, shard: int) -> int:
+    """Детерминированный сид шарда: общий для всех точек сетки и любого воркера."""
+    return base_seed * 1_009 + shard
+
+
+@dataclass
+class SweepResult:
+    """Агрегированные итоги одной точки сетки."""
+    index: int
+    params: Dict[str, Any]
+    totals: Dict[str, float] = field(default_factory=dict)
+    wall_sec: float = 0.0  # от начала прогона сетки до готовности точки
+
+    @property
+    def heroes(self) -> int:
+        return int(self.totals.get("heroes", 0))
+
+    def summary(self) -> Dict[str, float]:
+        n = self.heroes or 1
+        t = self.totals
+        elapsed = t.get("elapsed_sec", 0.0)
+        return {
+            "heroes": self.heroes,
+            "survival_rate": t.get("survived", 0) / n,
+            "main_quest_rate": t.get("main_quest_done", 0) / n,
+            "avg_days_survived": t.get("days_survived", 0) / n,
+            "avg_max_streak": t.get("max_streak", 0) / n,
+            "avg_rubles": t.get("final_rubles", 0) / n,
+            "avg_weight": t.get("final_weight", 0) / n,
+            # Время шардов суммируется: это пропускная способность одного ядра
+            "hero_days_per_cpu_sec": t.get("hero_days", 0) / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def throughput(results: Sequence[SweepResult]) -> float:
+    """Герое-дней в секунду по настенным часам за весь прогон сетки."""
+    wall = max((r.wall_sec for r in results), default=0.0)
+    return sum(r.totals.get("hero_days", 0) for r in results) / wall if wall > 0 else 0.0
+
+
+def _merge(totals: Dict[str, float], part: Dict[str, float]) -> None:
+    for key, value in part.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+# --- Воркеры (должны быть на уровне модуля для pickle) ---
+def _run_scalar(params: Dict[str, Any], heroes: int, days: int, policy: str, seed: int) -> Dict[str, float]:
+    overrides = {k: v for k, v in params.items() if k != "difficulty"}
+    result = depooper_sim.run_batch(heroes, days, depooper_sim.POLICIES[policy],
+                                    difficulty=params.get("difficulty", "normal"),
+                                    seed=seed, overrides=overrides)
+    runs = result.runs
+    return {
+        "heroes": len(runs),
+        "survived": sum(r.survived for r in runs),
+        "main_quest_done": sum(r.main_quest_done for r in runs),
+        "days_survived": sum(r.days_survived for r in runs),
+        "max_streak": sum(r.max_streak for r in runs),
+        "final_rubles": sum(r.final_rubles for r in runs),
+        "final_weight": sum(r.final_weight for r in runs),
+        "hero_days": result.hero_days,
+        "elapsed_sec": result.elapsed_sec,
+    }
+
+
+def _run_vector(params: Dict[str, Any], heroes: int, days: int, policy: str, seed: int) -> Dict[str, float]:
+    import depooper_vec  # numpy нужен только векторному движку
+    t0 = time.perf_counter()
+    pop = depooper_vec.Population(heroes, seed=seed)
+    pop.apply_difficulty(params.get("difficulty", "normal"))
+    for key, value in params.items():
+        if key != "difficulty":
+            getattr(pop, key)[:] = value
+    step = depooper_vec.POLICIES[policy]
+    for _ in range(days):
+        pop.step_day(step)
+        if not pop.alive.any():
+            break
+    dead = ~pop.alive
+    return {
+        "heroes": heroes,
+        "survived": int(pop.alive.sum()),
+        "main_quest_done": int((pop.main_quest_status == depooper_vec.QUEST_DONE).sum()),
+        "days_survived": int(pop.days_survived.sum()),
+        "max_streak": int(pop.max_streak.sum()),
+        "final_rubles": int(pop.rubles.sum()),
+        "final_weight": float(pop.weight_kg.sum()),
+        "hero_days": int(pop.days_survived.sum()) + int(dead.sum()),
+        "elapsed_sec": time.perf_counter() - t0,
+    }
+
+
+_ENGINES = {
+    "scalar": _run_scalar,
+    "vector": _run_vector,
+}
+
+
+def iter_sweep(grid: Sequence[Dict[str, Any]],
+               heroes: int = 1000,
+               days: int = 90,
+               policy: str = "worker",
+               seed: int = 0,
+               engine: str = "scalar",
+               workers: Optional[int] = None,
+               shards: int = 1) -> Iterator[SweepResult]:
+    """Прогнать сетку на пуле процессов и отдавать итоги точек по мере готовности.
+
+    heroes героев каждой точки делятся на shards независимых задач, чтобы
+    загрузить все ядра даже на маленькой сетке. ValueError — см. check_grid.
+    """
+    check_grid(grid, policy, engine)
+    run = _ENGINES[engine]
+    shards = max(1, min(int(shards), heroes))
+    per_shard = [heroes // shards + (1 if i < heroes % shards else 0) for i in range(shards)]
+    pending = {i: shards for i in range(len(grid))}
+    results = {i: SweepResult(i, dict(params)) for i, params in enumerate(grid)}
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {}
+        for i, params in enumerate(grid):
+            for s, n in enumerate(per_shard):
+                fut = pool.submit(run, params, n, days, policy, task_seed(seed, s))
+                futures[fut] = i
+        for fut in as_completed(futures):
+            i = futures[fut]
+            _merge(results[i].totals, fut.result())
+            pending[i] -= 1
+            if pending[i] == 0:
+                results[i].wall_sec = time.perf_counter() - t0
+                yield results.pop(i)
+
+
+def run_sweep(grid: Sequence[Dict[str, Any]], **kwargs: Any) -> List[SweepResult]:
+    """То же, что iter_sweep, но собирает всё и сортирует по порядку сетки."""
+    return sorted(iter_sweep(grid, **kwargs), key=lambda r: r.index)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Параллельный перебор параметров баланса")
+    parser.add_argument("--difficulty", nargs="+", choices=["normal", "hardcore"], default=["normal", "hardcore"])
+    parser.add_argument("--coffee-benefit", nargs="+", type=int)
+    parser.add_argument("--smoke-penalty", nargs="+", type=int)
+    parser.add_argument("--overeating-cost", nargs="+", type=float)
+    parser.add_argument("--loan-weekly-interest-pct", nargs="+", type=int)
+    parser.add_argument("--quit-attempt-cooldown-days", nargs="+", type=int)
+    parser.add_argument("--heroes", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--policy", choices=sorted(depooper_sim.POLICIES), default="quit")
+    parser.add_argument("--engine", choices=sorted(_ENGINES), default="scalar")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    axes = {name: getattr(args, name) for name in SWEEP_PARAMS if getattr(args, name)}
+    grid = param_grid(args.difficulty, **axes)
+    try:
+        check_grid(grid, args.policy, args.engine)
+    except ValueError as e:
+        parser.error(str(e))
+    done = []
+    for res in iter_sweep(grid, heroes=args.heroes, days=args.days, policy=args.policy,
+                          seed=args.seed, engine=args.engine, workers=args.workers, shards=args.shards):
+        s = res.summary()
+        params = ", ".join(f"{k}={v}" for k, v in res.params.items())
+        print(f"[{res.index}] {params}: квест {s['main_quest_rate']:.1%}, выжили {s['survival_rate']:.1%}, "
+              f"серия {s['avg_max_streak']:.1f}, {s['avg_rubles']:.0f} ₽, {s['avg_weight']:.1f} кг")
+        done.append(res)
+    wall = max(r.wall_sec for r in done)
+    print(f"за {wall:.2f} с: {throughput(done):.0f} герое-дней/с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Трассировка в формате Chrome trace events (chrome://tracing, ui.perfetto.dev).
+
+Профилировщик (depooper_profile) даёт суммы и перцентили; трасса показывает
+то же самое на шкале времени: какие действия, фазы конца дня и участки кадра
+GUI шли подряд и сколько длился каждый вызов. Вложенность видна как flame
+chart — end_of_day_update раскладывается на свои фазы.
+
+enable() так же, как профилировщик, подменяет методы Person на уровне класса
+(включая фазы end_of_day_update); disable() снимает только обёртки трассы,
+профилировщик может быть включён и выключен в любом порядке. Участки
+кадра GUI пишет FrameTimer из depooper_gui, когда трассировка включена.
+
+События копятся в памяти кортежами и уходят в файл пачкой по FLUSH_EVENTS
+(и при закрытии). Пачка пишется, только когда ни один обёрнутый метод не
+выполняется, — запись на диск не попадает внутрь замеряемых вызовов. Файл
+в формате JSON Array; оборванный без закрывающей скобки, он всё равно
+открывается в Perfetto.
+
+Включение из окружения: DEPOOPER_TRACE=путь.json (GUI, depooper_sim,
+depooper_replay). Или сразу прогнать запись сессии:
+
+    python depooper_trace.py session.jsonl -o trace.json
+    python depooper_trace.py --days 7 -o week.json
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from depooper import Person, NULL_SINK, RandomStream
+from depooper_patch import wrap_methods, unwrap_methods
+
+
+# Что трассируем: действия героя и фазы конца дня
+TRACED_METHODS: Tuple[str, ...] = (
+    "drink_coffee", "eat_food", "smoke", "sleep", "train", "travel",
+    "random_encounter", "gain_xp", "change_money", "quest_event",
+    "end_of_day_update", "end_of_day_habits", "end_of_day_job", "end_of_day_sleep",
+    "night_binge", "weekly_payout", "reset_daily_counters", "fast_forward",
+)
+# Сколько событий держим в памяти до записи пачкой
+FLUSH_EVENTS = 200000
+
+# Событие: (имя, категория, начало, конец, args) — время perf_counter в секундах
+Span = Tuple[str, str, float, float, Optional[Dict[str, Any]]]
+
+
+class Tracer:
+    """Буфер событий трассы с записью в файл пачками."""
+
+    def __init__(self, path: str, flush_events: int = FLUSH_EVENTS):
+        self.path = path
+        self.flush_events = flush_events
+        self.events: List[Span] = []
+        self.written = 0
+        # Сколько обёрнутых вызовов сейчас на стеке; пачку пишем только при 0
+        self.depth = 0
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write("[")
+        meta = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 1, "args": {"name": "depooper"}},
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": 1, "args": {"name": "main"}},
+        ]
+        self._write_json(meta)
+
+    def span(self, name: str, cat: str, start: float, end: float, args: Optional[Dict[str, Any]] = None) -> None:
+        """Законченный участок [start, end] (секунды perf_counter)."""
+        events = self.events
+        events.append((name, cat, start, end, args))
+        if len(events) >= self.flush_events and not self.depth:
+            self.flush()
+
+    def _write_json(self, items: List[Dict[str, Any]]) -> None:
+        if not items:
+            return
+        sep = ",\n" if self.written else "\n"
+        self._f.write(sep + ",\n".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) for e in items))
+        self.written += len(items)
+
+    def flush(self) -> None:
+        """Записать накопленные события одной пачкой."""
+        origin, pid = self.origin, self.pid
+        items = []
+        for name, cat, start, end, args in self.events:
+            event = {"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": 1,
+                     "ts": round(1e6 * (start - origin), 3), "dur": round(1e6 * (end - start), 3)}
+            if args:
+                event["args"] = args
+            items.append(event)
+        self.events = []
+        self._write_json(items)
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.write("\n]\n")
+        self._f.close()
+
+
+# Активная трасса
+_active: Optional[Tracer] = None
+
+
+def active() -> Optional[Tracer]:
+    return _active
+
+
+def _wrap_method(fn: Callable, name: str, tracer: Tracer) -> Callable:
+    perf = time.perf_counter
+    span = tracer.span
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        t0 = perf()
+        tracer.depth += 1
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            tracer.depth -= 1
+            span(name, "person", t0, perf(), {"day": self.days_elapsed})
+
+    return wrapper
+
+
+def enable(path: str, methods: Iterable[str] = TRACED_METHODS) -> Tracer:
+    """Начать трассу в path: обернуть methods класса Person."""
+    global _active
+    if _active is not None:
+        disable()
+    tracer = _active = Tracer(path)
+    wrap_methods(Person, "trace", methods, lambda name, fn: _wrap_method(fn, name, tracer))
+    return _active
+
+
+def disable() -> Optional[Tracer]:
+    """Снять обёртки трассы и дописать её."""
+    global _active
+    unwrap_methods(Person, "trace")
+    tracer, _active = _active, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def enable_from_env(environ: Optional[Dict[str, str]] = None) -> Optional[Tracer]:
+    """Включить трассу по DEPOOPER_TRACE=путь и дописать её при выходе."""
+    path = (environ if environ is not None else os.environ).get("DEPOOPER_TRACE", "")
+    if path in ("", "0"):
+        return None
+    tracer = enable(path)
+    atexit.register(disable)
+    return tracer
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import depooper_replay
+    from depooper_sim import worker_policy
+
+    parser = argparse.ArgumentParser(description="Трасса Chrome trace events по записи сессии или дням симуляции")
+    parser.add_argument("path", nargs="?", help="запись сессии (depooper_replay); без неё — дни рабочей политики")
+    parser.add_argument("--days", type=int, default=7, help="сколько дней прожить без записи")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--out", default="trace.json", help="куда записать трассу")
+    args = parser.parse_args(argv)
+
+    recording = depooper_replay.read_session(args.path) if args.path else None
+    tracer = enable(args.out)
+    try:
+        if recording is not None:
+            result = depooper_replay.replay(recording)
+            days = result.hero.days_elapsed
+        else:
+            hero = Person(name="Трасса", log_sink=NULL_SINK, rng=RandomStream(args.seed))
+            perf = time.perf_counter
+            for day in range(args.days):
+                t0 = perf()
+                worker_policy(hero, day)
+                hero.end_of_day_update()
+                hero.reset_daily_counters()
+                tracer.span("day", "sim", t0, perf(), {"day": day})
+            days = hero.days_elapsed
+    finally:
+        disable()
+    print(f"{tracer.written} событий за {days} дн. записано в {tracer.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Векторизованная популяция героев (structure-of-arrays) для балансировки.
+
+Каждое числовое поле Person хранится как массив NumPy, по ячейке на героя.
+Ядра ниже повторяют логику depooper.Person (end_of_day_update, sleep,
+eat_food, drink_coffee, smoke, train, микрозайм, попытки бросить привычку)
+пачкой, без журнала событий, и совпадают со
+скалярной версией по распределению результатов.
+
+Зависимости: numpy
+Установка: pip install numpy
+Запуск: python depooper_vec.py --heroes 1000000 --days 90
+"""
+
+import sys
+import time
+import argparse
+from dataclasses import fields
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from depooper import (Person, NULL_SINK, TRANSIENT_FIELDS, QUEST_CATALOG, QUEST_INDEX,
+                      QUEST_HIDDEN, QUEST_ACTIVE, QUEST_DONE, COFFEE_ACTIONS, FOOD_ACTIONS,
+                      TRAINING_ACTIONS)
+from depooper_sim import DEBTOR_LOAN, DEBTOR_MIN_PAYMENT
+
+
+LOCATIONS = ("home", "work", "gym", "park")
+LOCATION_CODES = {name: i for i, name in enumerate(LOCATIONS)}
+
+_MAIN = QUEST_INDEX["main"]
+_CRUNCH = QUEST_INDEX["money_crunch"]
+_CRUNCH_THRESHOLD = QUEST_CATALOG[_CRUNCH].threshold
+
+_SUPER_EVENTS = (
+    # (стоимость, изменение морали): телефон, похороны, свадьба
+    (3500, 0),
+    (2000, -10),
+    (5000, 6),
+)
+_RPG_ATTRS = ("strength", "agility", "intelligence", "charisma")
+# Привычка → (флаг привычки, базовый шанс бросить), как в attempt_to_kick_habit
+_QUIT_HABITS = {
+    "coffee": ("has_coffee_habit", 0.15),
+    "smoking": ("has_smoking_habit", 0.10),
+    "overeating": ("has_overeat_habit", 0.12),
+}
+
+
+def _numeric_schema() -> Dict[str, np.dtype]:
+    """Числовые поля Person и их dtype, по значениям по умолчанию."""
+    proto = Person(log_sink=NULL_SINK)
+    schema: Dict[str, np.dtype] = {}
+    for f in fields(Person):
+        if f.name in TRANSIENT_FIELDS:
+            continue
+        value = getattr(proto, f.name)
+        if isinstance(value, bool):
+            schema[f.name] = np.dtype(np.bool_)
+        elif isinstance(value, int):
+            schema[f.name] = np.dtype(np.int64)
+        elif isinstance(value, float):
+            schema[f.name] = np.dtype(np.float64)
+    return schema
+
+
+NUMERIC_FIELDS = _numeric_schema()
+
+Mask = Optional[np.ndarray]
+Scalar = Union[int, float, np.ndarray]
+
+
+class Population:
+    """Популяция из n героев: по массиву на каждое числовое поле Person."""
+
+    def __init__(self, n: int, seed: Optional[int] = None, template: Optional[Person] = None):
+        self.n = int(n)
+        self.rng = np.random.default_rng(seed)
+        proto = template or Person(log_sink=NULL_SINK)
+        for name, dtype in NUMERIC_FIELDS.items():
+            setattr(self, name, np.full(self.n, getattr(proto, name, 0), dtype=dtype))
+        self.location = np.full(self.n, LOCATION_CODES.get(proto.current_location, 0), dtype=np.int8)
+        # Квесты, которые трогает ядро: главный (серия) и «деньги на исходе»
+        main = QUEST_CATALOG[_MAIN]
+        self.main_quest_target = main.target
+        self.main_quest_reward_rub = main.reward_rub
+        self.main_quest_reward_xp = main.reward_xp
+        self.main_quest_status = np.full(self.n, proto.quest_status[_MAIN], dtype=np.int8)
+        self.money_crunch_status = np.full(self.n, proto.quest_status[_CRUNCH], dtype=np.int8)
+        # Строковое difficulty_mode нужно ядру только как флаг hardcore
+        self.hardcore = np.full(self.n, proto.difficulty_mode.lower() == "hardcore", dtype=np.bool_)
+        self.last_quit_attempt_day_by_habit = {
+            habit: np.full(self.n, proto.last_quit_attempt_day_by_habit.get(habit, -999), dtype=np.int64)
+            for habit in _QUIT_HABITS
+        }
+        # Итоги прогона
+        self.alive = np.ones(self.n, dtype=np.bool_)
+        self.days_survived = np.zeros(self.n, dtype=np.int64)
+        self.max_streak = np.zeros(self.n, dtype=np.int64)
+
+    # --- Конвертация ---
+    @classmethod
+    def from_person(cls, hero: Person, n: int, seed: Optional[int] = None) -> "Population":
+        """n копий героя hero."""
+        return cls(n, seed=seed, template=hero)
+
+    def to_person(self, i: int) -> Person:
+        """Собрать скалярного Person из i-й ячейки (без журнала)."""
+        hero = Person(name=f"Герой {i}", log_sink=NULL_SINK)
+        for name in NUMERIC_FIELDS:
+            setattr(hero, name, getattr(self, name)[i].item())
+        hero.current_location = LOCATIONS[int(self.location[i])]
+        hero.quest_status[_MAIN] = int(self.main_quest_status[i])
+        hero.quest_progress[_MAIN] = int(self.goal_streak_days[i])
+        hero.quest_status[_CRUNCH] = int(self.money_crunch_status[i])
+        hero.difficulty_mode = "hardcore" if self.hardcore[i] else "normal"
+        for habit, days in self.last_quit_attempt_day_by_habit.items():
+            if days[i] != -999:
+                hero.last_quit_attempt_day_by_habit[habit] = int(days[i])
+        return hero
+
+    def _mask(self, where: Mask) -> np.ndarray:
+        return self.alive if where is None else (where & self.alive)
+
+    # --- Утилиты (аналоги методов Person) ---
+    def apply_difficulty(self, mode: str = "normal", where: Mask = None) -> None:
+        m = self._mask(where)
+        self.hardcore[m] = mode.lower() == "hardcore"
+        if mode.lower() == "hardcore":
+            self.coffee_benefit[m], self.smoke_penalty[m], self.overeating_cost[m] = 6, -12, 0.6
+        else:
+            self.coffee_benefit[m], self.smoke_penalty[m], self.overeating_cost[m] = 10, -7, 0.3
+
+    def reset_daily_counters(self, where: Mask = None) -> None:
+        m = self._mask(where)
+        self.coffee_cups_today[m] = 0
+        self.cigarettes_smoked_today[m] = 0
+        self.overeaten_today[m] = False
+        self.calories_today[m] = 0
+        self.night_binge_protection_today[m] = False
+
+    def advance_time(self, minutes: Scalar, where: Mask = None) -> None:
+        m = self._mask(where)
+        minutes = np.maximum(0, np.asarray(minutes, dtype=np.int64))
+        self.time_minutes[:] = np.where(m, np.clip(self.time_minutes + minutes, 0, 23 * 60 + 59), self.time_minutes)
+
+    def change_morale(self, delta: Scalar, where: Mask = None) -> None:
+        m = self._mask(where)
+        self.morale[:] = np.where(m, np.clip(self.morale + np.asarray(delta, dtype=np.int64), 0, 100), self.morale)
+
+    def change_money(self, delta: Scalar, where: Mask = None) -> None:
+        m = self._mask(where)
+        amount = np.broadcast_to(np.asarray(delta, dtype=np.int64), (self.n,))
+        # Скидка по харизме на траты: 1% за уровень >1, до 10%
+        discount = np.clip(self.charisma - 1, 0, 10)
+        spent = np.round(amount * (100 - discount) / 100.0).astype(np.int64)
+        amount = np.where(amount < 0, spent, amount)
+        self.rubles[:] = np.where(m, self.rubles + amount, self.rubles)
+        crunch = m & (self.rubles <= _CRUNCH_THRESHOLD) & (self.money_crunch_status == QUEST_HIDDEN)
+        self.money_crunch_status[crunch] = QUEST_ACTIVE
+
+    def gain_xp(self, amount: Scalar, where: Mask = None) -> None:
+        m = self._mask(where)
+        amount = np.maximum(0, np.asarray(amount, dtype=np.int64))
+        self.xp[:] = np.where(m, self.xp + amount, self.xp)
+        up = m & (self.xp >= self.level * 100)
+        while up.any():
+            idx = np.flatnonzero(up)
+            self.xp[idx] -= self.level[idx] * 100
+            self.level[idx] += 1
+            # Случайная характеристика +1 и мораль +5
+            picks = self.rng.integers(0, len(_RPG_ATTRS), size=idx.size)
+            for k, attr in enumerate(_RPG_ATTRS):
+                getattr(self, attr)[idx[picks == k]] += 1
+            self.morale[idx] = np.minimum(100, self.morale[idx] + 5)
+            up = m & (self.xp >= self.level * 100)
+
+    # --- Действия ---
+    def drink_coffee(self, quality: str = "instant", where: Mask = None) -> np.ndarray:
+        """Возвращает маску героев, которые выпили кофе."""
+        opt = COFFEE_ACTIONS.get((quality or "instant").lower()) or COFFEE_ACTIONS["instant"]
+        ok = self._mask(where) & self.has_coffee_habit
+        if opt.needs_machine:
+            ok &= self.has_coffee_machine
+        self.coffee_cups_today[ok] += 1
+        self.alertness[ok] = np.minimum(100, self.alertness[ok] + self.coffee_benefit[ok] + opt.benefit_bonus)
+        self.change_money(-opt.cost, ok)
+        self.advance_time(opt.time_min, ok)
+        self.gain_xp(2, ok)
+        return ok
+
+    def smoke(self, where: Mask = None) -> np.ndarray:
+        ok = self._mask(where) & self.has_smoking_habit
+        self.cigarettes_smoked_today[ok] += 1
+        self.health_score[ok] = np.maximum(0, self.health_score[ok] + self.smoke_penalty[ok])
+        self.alertness[ok] = np.maximum(0, self.alertness[ok] - 5)
+        self.change_money(-20, ok)
+        self.advance_time(7, ok)
+        self.change_morale(-3, ok)
+        return ok
+
+    def eat_food(self, food_type: str = "fast", where: Mask = None) -> np.ndarray:
+        opt = FOOD_ACTIONS.get((food_type or "fast").lower()) or FOOD_ACTIONS["fast"]
+        ok = self._mask(where)
+        if opt.requires_home:
+            ok = ok & (self.location == LOCATION_CODES["home"])
+        self.change_money(-opt.cost, ok)
+        k = int(ok.sum())
+        if opt.calories_min == opt.calories_max:
+            calories = np.full(k, opt.calories_min, dtype=np.int64)
+        else:
+            calories = self.rng.integers(opt.calories_min, opt.calories_max + 1, size=k)
+        if opt.health < 0:
+            self.health_score[ok] = np.maximum(0, self.health_score[ok] + opt.health)
+        else:
+            self.health_score[ok] = np.minimum(200, self.health_score[ok] + opt.health)
+        self.alertness[ok] = np.minimum(100, self.alertness[ok] + opt.alertness)
+        if opt.binge_protection:
+            self.night_binge_protection_today[ok] = True
+        self.calories_today[ok] += calories
+        self.weight_kg[ok] = np.maximum(40.0, self.weight_kg[ok] + calories / 7700.0)
+        self.overeaten_today |= ok & (self.calories_today > 2500)
+        self.advance_time(opt.time_min, ok)
+        self.gain_xp(1, ok)
+        return ok
+
+    def sleep(self, hours: float, where: Mask = None) -> None:
+        m = self._mask(where)
+        hours = max(0.0, float(hours))
+        effective = np.maximum(0.0, hours - np.where(self.overeaten_today, 0.8, 0.0))
+        alert_gain = np.minimum(100 - self.alertness, effective * 10).astype(np.int64)
+        health_gain = np.maximum(0, effective * np.where(self.has_smoking_habit, 1, 2)).astype(np.int64)
+        self.alertness[m] = np.minimum(100, self.alertness[m] + alert_gain[m])
+        self.health_score[m] = np.minimum(200, self.health_score[m] + health_gain[m])
+        self.sleep_need[m] = np.clip(self.sleep_need[m] - 0.2, 4.0, 12.0)
+        self.advance_time(int(hours * 60), m)
+
+    def work_shift(self, productive: bool = True, where: Mask = None) -> None:
+        """Аналог depooper_sim.work_shift: смена 10:00–17:00."""
+        m = self._mask(where) & self.employed
+        self.location[m] = LOCATION_CODES["work"]
+        wait = np.maximum(0, 10 * 60 - self.time_minutes)
+        self.advance_time(wait, m)
+        m &= self.time_minutes // 60 < 17
+        self.advance_time(7 * 60, m)
+        self.worked_today[m] = True
+        self.work_productive_today[m] = productive
+        self.location[m] = LOCATION_CODES["home"]
+
+    def train(self, kind: str, where: Mask = None) -> None:
+        """Тренировка по описанию из TRAINING_ACTIONS ('gym' | 'park')."""
+        opt = TRAINING_ACTIONS[kind]
+        m = self._mask(where)
+        if opt.cost:
+            self.change_money(-opt.cost, m)
+        weight_loss = np.where(self.has_overeat_habit, opt.weight_loss_overeat, opt.weight_loss)
+        self.health_score[m] = np.minimum(200, self.health_score[m] + opt.health)
+        self.alertness[m] = np.minimum(100, self.alertness[m] + opt.alertness)
+        self.weight_kg[m] = np.maximum(40.0, self.weight_kg[m] - weight_loss[m])
+        stat_values = getattr(self, opt.stat)
+        stat = np.maximum(0, stat_values - 1)
+        if opt.sleep_relief or opt.sleep_relief_per_stat:
+            relief = opt.sleep_relief + opt.sleep_relief_per_stat * stat
+            self.sleep_need[m] = np.clip(self.sleep_need[m] - relief[m], 4.0, 12.0)
+        self.advance_time(np.maximum(opt.time_floor, opt.time_min - opt.time_per_stat * stat), m)
+        stat_values[m] += 1
+        self.gain_xp(opt.xp, m)
+
+    def take_microloan(self, amount: Scalar, where: Mask = None) -> None:
+        m = self._mask(where)
+        amount = np.maximum(0, np.asarray(amount, dtype=np.int64))
+        self.loan_principal[:] = np.where(m, self.loan_principal + amount, self.loan_principal)
+        self.rubles[:] = np.where(m, self.rubles + amount, self.rubles)
+
+    def repay_loan(self, amount: Scalar, where: Mask = None) -> None:
+        """Погасить до amount, но не больше, чем есть на руках."""
+        m = self._mask(where)
+        pay = np.minimum(np.maximum(0, np.asarray(amount, dtype=np.int64)), self.rubles)
+        m = m & (pay > 0)
+        self.loan_principal[:] = np.where(m, np.maximum(0, self.loan_principal - pay), self.loan_principal)
+        self.rubles[:] = np.where(m, self.rubles - pay, self.rubles)
+
+    def _used_today(self, habit: str) -> np.ndarray:
+        if habit == "coffee":
+            return self.coffee_cups_today > 0
+        if habit == "smoking":
+            return self.cigarettes_smoked_today > 0
+        return self.overeaten_today
+
+    def can_attempt_to_kick_habit(self, habit: str, where: Mask = None) -> np.ndarray:
+        """Маска героев, которым можно попробовать бросить привычку сегодня."""
+        flag, _ = _QUIT_HABITS[habit]
+        waited = self.days_elapsed - self.last_quit_attempt_day_by_habit[habit]
+        return (self._mask(where) & getattr(self, flag) & ~self._used_today(habit)
+                & (self.alertness >= 60) & (self.health_score >= 90)
+                & (waited >= self.quit_attempt_cooldown_days))
+
+    def attempt_to_kick_habit(self, habit: str, where: Mask = None) -> np.ndarray:
+        """Возвращает маску героев, которые бросили привычку."""
+        flag, base = _QUIT_HABITS[habit]
+        ok = self.can_attempt_to_kick_habit(habit, where)
+        chance = (base + np.where(self.alertness >= 80, 0.05, 0.0)
+                  + np.where(self.health_score >= 140, 0.05, 0.0)
+                  + np.where(self.goal_streak_days >= 7, 0.07, 0.0)
+                  - np.where(self.hardcore, 0.05, 0.0))
+        kicked = ok & (self.rng.random(self.n) < np.clip(chance, 0.02, 0.6))
+        self.last_quit_attempt_day_by_habit[habit][ok] = self.days_elapsed[ok]
+        getattr(self, flag)[kicked] = False
+        failed = ok & ~kicked
+        self.alertness[failed] = np.maximum(0, self.alertness[failed] - 10)
+        return kicked
+
+    def end_of_day_update(self, where: Mask = None) -> None:
+        """Пакетный аналог Person.end_of_day_update (без журнала)."""
+        m = self._mask(where)
+        rng = self.rng
+
+        # Сон
+        sleep_hours = np.where(self.alertness < 30,
+                               np.maximum(0.5, self.sleep_need * (self.alertness / 50)),
+                               self.sleep_need)
+        sleep_hours = sleep_hours - np.where(self.overeaten_today, self.overeating_cost, 0.0)
+
+        # Восстановление здоровья без привычек
+        clean = (self.coffee_cups_today == 0) & (self.cigarettes_smoked_today == 0)
+        heal = m & clean & (~self.has_overeat_habit | (self.weight_kg == 70.0))
+        self.health_score[heal] = np.minimum(200, self.health_score[heal] + 5)
+
+        # Серия и главный квест
+        success = clean & ~self.overeaten_today
+        self.goal_streak_days[:] = np.where(m, np.where(success, self.goal_streak_days + 1, 0), self.goal_streak_days)
+        reveal = m & (self.goal_streak_days >= 1) & (self.main_quest_status == QUEST_HIDDEN)
+        self.main_quest_status[reveal] = QUEST_ACTIVE
+        done = m & (self.main_quest_status != QUEST_DONE) & (self.goal_streak_days >= self.main_quest_target)
+        if done.any():
+            self.main_quest_status[done] = QUEST_DONE
+            self.rubles[done] += self.main_quest_reward_rub
+            self.gain_xp(self.main_quest_reward_xp, done)
+
+        # Работа
+        employed = m & self.employed
+        worked = employed & self.worked_today
+        self.wage_accrued[worked] += self.job_daily_wage[worked]
+        bonus = worked & self.work_productive_today & self.job_bonus_eligibility_today
+        self.bonus_accrued[bonus] += 500
+        absent = employed & ~self.worked_today
+        self.job_warnings[absent] += 1
+        self.change_money(-300, absent)
+        self.change_morale(-6, absent)
+        fired = absent & (self.job_warnings >= 3)
+        self.employed[fired] = False
+        self.worked_today[m] = False
+        self.work_productive_today[m] = False
+
+        # Переход к следующему дню
+        self.alertness[m] = np.clip(self.alertness[m], 0, 100)
+        short = m & (sleep_hours < 0)
+        self.health_score[short] -= (np.abs(sleep_hours[short]) * 5).astype(np.int64)
+        rested = m & ~(sleep_hours < 0)
+        self.sleep_need[rested] = np.maximum(4.0, np.minimum(self.sleep_need[rested] + (sleep_hours[rested] - 8), 12))
+
+        # Ночные жоры
+        chance = 0.2 + np.where(self.calories_today > 3000, 0.1, 0.0)
+        binge = m & ~self.night_binge_protection_today & self.has_overeat_habit & (rng.random(self.n) < chance)
+        if binge.any():
+            extra = rng.integers(400, 1201, size=int(binge.sum()))
+            self.calories_today[binge] += extra
+            self.weight_kg[binge] = np.maximum(40.0, self.weight_kg[binge] + extra / 7700.0)
+            self.change_money(-200, binge)
+            self.overeaten_today[binge] = True
+
+        # Счётчик дней и сброс рабочих флагов
+        self.days_elapsed[m] += 1
+        self.time_minutes[m] = 8 * 60
+        self.work_minutes_today[m] = 0
+        self.job_bonus_eligibility_today[m] = True
+        self.job_late_today[m] = False
+
+        # Недельные выплаты, коммуналка, проценты и супер-события
+        week = m & (self.days_elapsed % 7 == 0)
+        if week.any():
+            rpg_bonus = np.maximum(0, self.charisma - 1) * 100 + np.maximum(0, self.level - 1) * 50
+            payout = self.wage_accrued + self.bonus_accrued + 7500 + 1500 + rpg_bonus
+            paid = week & (payout > 0)
+            self.rubles[paid] += payout[paid]
+            self.wage_accrued[paid] = 0
+            self.bonus_accrued[paid] = 0
+            utilities = week & (self.utilities_weekly > 0)
+            self.rubles[utilities] -= self.utilities_weekly[utilities]
+            loan = week & (self.loan_principal > 0)
+            interest = np.ceil(self.loan_principal * self.loan_weekly_interest_pct / 100.0).astype(np.int64)
+            self.loan_principal[loan] += interest[loan]
+            surprise = week & (rng.random(self.n) < 0.15)
+            picks = rng.integers(0, len(_SUPER_EVENTS), size=self.n)
+            for k, (cost, morale) in enumerate(_SUPER_EVENTS):
+                hit = surprise & (picks == k)
+                self.rubles[hit] -= cost
+                if morale:
+                    self.change_morale(morale, hit)
+
+    # --- Прогон ---
+    def step_day(self, policy) -> None:
+        """Один день: политика, итоги дня, проверка «смерти»."""
+        policy(self)
+        self.end_of_day_update()
+        self.reset_daily_counters()
+        alive = self.alive
+        self.max_streak[alive] = np.maximum(self.max_streak[alive], self.goal_streak_days[alive])
+        dead = alive & ((self.health_score <= 0) | (self.weight_kg > 120))
+        self.alive &= ~dead
+        self.days_survived[self.alive] += 1
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "heroes": self.n,
+            "survival_rate": float(self.alive.mean()),
+            "main_quest_rate": float((self.main_quest_status == QUEST_DONE).mean()),
+            "avg_days_survived": float(self.days_survived.mean()),
+            "avg_max_streak": float(self.max_streak.mean()),
+            "avg_rubles": float(self.rubles.mean()),
+            "avg_weight": float(self.weight_kg.mean()),
+        }
+
+
+# --- Векторные политики (аналоги depooper_sim.POLICIES) ---
+def idle_policy(pop: Population) -> None:
+    pop.sleep(8.0)
+
+
+def worker_policy(pop: Population) -> None:
+    pop.eat_food("balanced")
+    pop.work_shift()
+    pop.eat_food("balanced")
+    pop.sleep(8.0)
+
+
+def habit_policy(pop: Population) -> None:
+    pop.drink_coffee("instant")
+    pop.smoke()
+    pop.eat_food("fast")
+    pop.work_shift()
+    pop.smoke()
+    pop.eat_food("fast")
+    pop.sleep(8.0)
+
+
+def quit_policy(pop: Population) -> None:
+    pop.attempt_to_kick_habit("coffee")
+    pop.drink_coffee("instant")
+    pop.attempt_to_kick_habit("smoking")
+    pop.attempt_to_kick_habit("overeating")
+    fast = pop.has_overeat_habit.copy()
+    pop.smoke()
+    pop.eat_food("fast", fast)
+    pop.eat_food("balanced", ~fast)
+    pop.work_shift()
+    pop.smoke()
+    pop.eat_food("fast", fast)
+    pop.eat_food("balanced", ~fast)
+    pop.sleep(8.0)
+
+
+def debtor_policy(pop: Population) -> None:
+    no_debt = pop.loan_principal == 0
+    payday = ~no_debt & (pop.days_elapsed % 7 == 0)
+    pop.take_microloan(DEBTOR_LOAN, no_debt)
+    pop.repay_loan(np.minimum(pop.loan_principal, np.maximum(DEBTOR_MIN_PAYMENT, pop.loan_principal // 4)), payday)
+    worker_policy(pop)
+
+
+def glutton_policy(pop: Population) -> None:
+    pop.eat_food("super")
+    pop.smoke()
+    pop.eat_food("super")
+    pop.smoke()
+    pop.work_shift()
+    pop.train("gym")
+    pop.smoke()
+    pop.eat_food("super")
+    pop.smoke()
+    pop.eat_food("super")
+    pop.smoke()
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "worker": worker_policy,
+    "habits": habit_policy,
+    "quit": quit_policy,
+    "debtor": debtor_policy,
+    "glutton": glutton_policy,
+}
+
+
+def run_population(heroes: int, days: int, policy=worker_policy, difficulty: str = "normal",
+                   seed: Optional[int] = None) -> Population:
+    pop = Population(heroes, seed=seed)
+    pop.apply_difficulty(difficulty)
+    for _ in range(days):
+        pop.step_day(policy)
+        if not pop.alive.any():
+            break
+    return pop
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Векторизованный прогон популяции")
+    parser.add_argument("--heroes", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="worker")
+    parser.add_argument("--difficulty", choices=["normal", "hardcore"], default="normal")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    pop = run_population(args.heroes, args.days, POLICIES[args.policy], args.difficulty, args.seed)
+    elapsed = time.perf_counter() - t0
+    stats = pop.summary()
+    hero_days = int(pop.days_survived.sum()) + int((~pop.alive).sum())
+    stats["hero_days_per_sec"] = hero_days / elapsed if elapsed > 0 else 0.0
+    for key, value in stats.items():
+        print(f"{key:>20}: {value:.3f}" if isinstance(value, float) else f"{key:>20}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())